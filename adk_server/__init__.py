@@ -0,0 +1,6 @@
+"""
+Serving support for run_adk.py.
+
+run_adk.py builds the ADK FastAPI app for the agent directory; this package holds what
+it needs to serve that app in production.
+"""
@@ -0,0 +1,267 @@
+"""
+Admission control and load shedding per agent.
+
+One expensive agent (image generation, a Tavily crawl) could take every slot of a worker and
+slow down all the other agents it serves. AdmissionMiddleware gives each agent its own
+limits for /run and /run_sse, in each worker process:
+
+- up to `max_concurrency` runs at once (an SSE run holds its slot until the stream ends),
+- up to `max_queue` more requests wait for a slot, in arrival order, for at most
+  `queue_timeout` seconds,
+- a request that finds the queue full gets 429 at once, and one that waited too long gets
+  503; both carry Retry-After, estimated from the agent's recent run times.
+
+Limits default to ADMISSION_MAX_CONCURRENCY, ADMISSION_MAX_QUEUE and ADMISSION_QUEUE_TIMEOUT.
+An agent overrides them in its metadata.json:
+
+    "admission": {"maxConcurrency": 2, "maxQueue": 4, "queueTimeout": 15}
+
+or with an ADMISSION_<AGENT_NAME> env var ("2,4,15"; later values may be left out), which
+wins over metadata.json. A concurrency of 0 leaves the agent unlimited.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from starlette.responses import JSONResponse
+
+from .agent_loading import LazyAgentLoader
+from .config import ADMISSION_MAX_CONCURRENCY, ADMISSION_MAX_QUEUE, ADMISSION_QUEUE_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+# Endpoints that run an agent; their JSON body names it
+RUN_PATHS = ("/run", "/run_sse")
+
+# Weight of the latest run in the average run time used for Retry-After
+_RUN_TIME_SMOOTHING = 0.2
+_MAX_RETRY_AFTER = 120
+
+
+class Rejected(Exception):
+    """A request shed by admission control."""
+
+    def __init__(self, status_code: int, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AgentLimiter:
+    """Concurrency limit and bounded FIFO wait queue of one agent."""
+
+    def __init__(self, agent_name: str, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.agent_name = agent_name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.running = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.admitted = 0
+        self.queued = 0
+        self.shed_queue_full = 0
+        self.shed_timeout = 0
+        self.wait_seconds_total = 0.0
+        self.run_seconds_avg = 1.0
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free: the queue ahead drained at the recent run rate."""
+        estimate = self.run_seconds_avg * (self.waiting + 1) / self.max_concurrency
+        return min(_MAX_RETRY_AFTER, max(1, math.ceil(estimate)))
+
+    async def acquire(self) -> None:
+        """Take a run slot, waiting in the queue if needed; raises Rejected when shed."""
+        if self.running < self.max_concurrency and not self._waiters:
+            self.running += 1
+            self.admitted += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self.shed_queue_full += 1
+            raise Rejected(429, f"Agent {self.agent_name} is at capacity", self.retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.queued += 1
+        start = time.perf_counter()
+        try:
+            # asyncio.wait doesn't cancel the waiter on timeout, so a slot handed over at the
+            # last moment is still seen below
+            await asyncio.wait((waiter,), timeout=self.queue_timeout)
+        except BaseException:
+            # The request went away while queued
+            self._leave_queue(waiter)
+            raise
+        finally:
+            self.wait_seconds_total += time.perf_counter() - start
+
+        if not waiter.done():
+            self._leave_queue(waiter)
+            self.shed_timeout += 1
+            raise Rejected(503, f"Agent {self.agent_name} is overloaded", self.retry_after())
+        self.admitted += 1
+
+    def _leave_queue(self, waiter: asyncio.Future) -> None:
+        if waiter.done():
+            # release() handed us its slot already; pass it on
+            self.release()
+        else:
+            waiter.cancel()
+            self._waiters.remove(waiter)
+
+    def release(self, run_seconds: Optional[float] = None) -> None:
+        if run_seconds is not None:
+            self.run_seconds_avg += _RUN_TIME_SMOOTHING * (run_seconds - self.run_seconds_avg)
+        if self._waiters:
+            # The slot goes straight to the longest waiting request
+            self._waiters.popleft().set_result(None)
+        else:
+            self.running -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "queue_timeout": self.queue_timeout,
+            "running": self.running,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "shed_queue_full": self.shed_queue_full,
+            "shed_timeout": self.shed_timeout,
+            "wait_ms_avg": round(self.wait_seconds_total / self.queued * 1000, 3) if self.queued else 0.0,
+            "run_seconds_avg": round(self.run_seconds_avg, 3),
+        }
+
+
+def _default_limits() -> Dict[str, float]:
+    return {
+        "max_concurrency": ADMISSION_MAX_CONCURRENCY,
+        "max_queue": ADMISSION_MAX_QUEUE,
+        "queue_timeout": ADMISSION_QUEUE_TIMEOUT,
+    }
+
+
+class AdmissionController:
+    """Limiters of the agents of one worker, created on first use from their settings."""
+
+    def __init__(self, agent_loader: LazyAgentLoader):
+        self.agent_loader = agent_loader
+        self._limiters: Dict[str, Optional[AgentLimiter]] = {}
+
+    def _limits(self, agent_name: str) -> Dict[str, float]:
+        limits = _default_limits()
+        admission = (self.agent_loader.read_metadata(agent_name) or {}).get("admission") or {}
+        fields = (("max_concurrency", "maxConcurrency"), ("max_queue", "maxQueue"), ("queue_timeout", "queueTimeout"))
+        for key, field in fields:
+            if field in admission:
+                limits[key] = admission[field]
+
+        override = os.environ.get(f"ADMISSION_{agent_name.upper()}", "")
+        for key, value in zip(("max_concurrency", "max_queue", "queue_timeout"), override.split(",")):
+            if value.strip():
+                limits[key] = float(value)
+        return {
+            "max_concurrency": int(limits["max_concurrency"]),
+            "max_queue": max(0, int(limits["max_queue"])),
+            "queue_timeout": float(limits["queue_timeout"]),
+        }
+
+    def limiter(self, agent_name: str) -> Optional[AgentLimiter]:
+        """The agent's limiter, or None if the agent is unlimited or unknown."""
+        if agent_name in self._limiters:
+            return self._limiters[agent_name]
+        if agent_name not in self.agent_loader.list_agents():
+            # Not remembered, so made-up names can't grow this dict; ADK answers 404
+            return None
+        try:
+            limits = self._limits(agent_name)
+        except (TypeError, ValueError) as e:
+            logger.error(f"Invalid admission settings for agent {agent_name}, using the defaults: {e}")
+            limits = _default_limits()
+        limiter = None
+        if limits["max_concurrency"] > 0:
+            limiter = AgentLimiter(agent_name, **limits)
+        self._limiters[agent_name] = limiter
+        return limiter
+
+    def stats(self) -> Dict[str, Any]:
+        return {name: limiter.stats() for name, limiter in self._limiters.items() if limiter is not None}
+
+
+def _app_name(body: bytes) -> Optional[str]:
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return None
+    if not isinstance(payload, dict):
+        return None
+    # RunAgentRequest accepts both field names
+    name = payload.get("app_name", payload.get("appName"))
+    return name if isinstance(name, str) else None
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying the agents' admission limits to /run and /run_sse."""
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in RUN_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        # The body names the agent; read it here and replay it to the endpoint
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                return  # client disconnected
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        body = b"".join(chunks)
+        replayed = False
+
+        async def replay():
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        agent_name = _app_name(body)
+        # For the request metrics (metrics.py)
+        scope.setdefault("state", {})["agent_name"] = agent_name
+        limiter = self.controller.limiter(agent_name) if agent_name else None
+        if limiter is None:
+            await self.app(scope, replay, send)
+            return
+
+        try:
+            await limiter.acquire()
+        except Rejected as e:
+            logger.warning(f"Shed {scope['path']} for agent {agent_name} with {e.status_code}: {e.reason}")
+            response = JSONResponse(
+                {"detail": e.reason}, status_code=e.status_code, headers={"Retry-After": str(e.retry_after)}
+            )
+            await response(scope, replay, send)
+            return
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, replay, send)
+        finally:
+            limiter.release(time.perf_counter() - start)
@@ -0,0 +1,184 @@
+"""
+On-demand agent loading.
+
+Importing an agent package pulls in its whole dependency tree (exa_py, aiohttp, LiteLLM,
+the MCP client, pydantic schemas), and `/list-apps?detailed=true` imports every agent just
+to describe it. LazyAgentLoader keeps that work off startup and off traffic to other agents:
+
+- `/list-apps` (detailed or not) is answered from each agent's metadata.json; only an agent
+  whose metadata.json lacks `rootAgentName` is imported to describe it,
+- an agent package is imported on its first request, and its toolsets (MCP connections
+  and tool catalogs) start warming in the background right away,
+- the agents in PRELOAD_AGENTS are imported when the app is built (in the gunicorn master
+  with several workers) and warmed when each worker process starts (readiness.py).
+
+Once an agent package is imported, the server's hooks are passed to its
+`register_server_hooks(**hooks)` function if it defines one, so agents never import
+adk_server themselves and still run under `adk web`/`adk run`.
+"""
+
+import asyncio
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from google.adk.agents.base_agent import BaseAgent
+from google.adk.apps.app import App
+from google.adk.cli.utils.agent_loader import AgentLoader
+from google.adk.tools.base_toolset import BaseToolset
+from google.adk.tools.computer_use.computer_use_toolset import ComputerUseToolset
+
+from .config import PRELOAD_AGENTS
+
+logger = logging.getLogger(__name__)
+
+
+def _root_agent(agent_or_app: Any) -> Optional[BaseAgent]:
+    return agent_or_app.root_agent if isinstance(agent_or_app, App) else agent_or_app
+
+
+def _toolsets(agent: BaseAgent) -> Iterator[BaseToolset]:
+    """Toolsets of an agent and all of its sub-agents."""
+    for tool in getattr(agent, "tools", None) or ():
+        if isinstance(tool, BaseToolset):
+            yield tool
+    for sub_agent in agent.sub_agents:
+        yield from _toolsets(sub_agent)
+
+
+class LazyAgentLoader(AgentLoader):
+    """Agent loader that imports agents on first use and lists them from metadata.json."""
+
+    def __init__(self, agents_dir: str, hooks: Optional[Dict[str, Callable]] = None):
+        super().__init__(agents_dir)
+        # Passed to each loaded agent package's register_server_hooks(**hooks)
+        self.hooks = hooks or {}
+        self.load_seconds: Dict[str, float] = {}
+        self._warm_tasks: Dict[str, asyncio.Task] = {}
+        # Agents PRELOAD_AGENTS asked for that failed to load, with the error
+        self.preload_errors: Dict[str, str] = {}
+
+    def read_metadata(self, agent_name: str) -> Optional[Dict[str, Any]]:
+        path = Path(self.agents_dir) / agent_name / "metadata.json"
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable {path}: {e}")
+            return None
+
+    def list_agents_detailed(self) -> List[Dict[str, Any]]:
+        apps_info = []
+        for agent_name in self.list_agents():
+            metadata = self.read_metadata(agent_name) or {}
+            try:
+                if metadata.get("rootAgentName"):
+                    root_agent_name = metadata["rootAgentName"]
+                    description = metadata.get("description", "")
+                    is_computer_use = bool(metadata.get("computerUse", False))
+                else:
+                    # metadata.json doesn't name the root agent: import it to describe it
+                    agent = _root_agent(self.load_agent(agent_name))
+                    if agent is None:
+                        continue
+                    root_agent_name = agent.name
+                    description = agent.description
+                    is_computer_use = any(isinstance(t, ComputerUseToolset) for t in getattr(agent, "tools", []))
+                apps_info.append(
+                    {
+                        "name": agent_name,
+                        "root_agent_name": root_agent_name,
+                        "description": description,
+                        "language": self._determine_agent_language(agent_name),
+                        "is_computer_use": is_computer_use,
+                    }
+                )
+            except Exception as e:
+                logger.error(f"Failed to describe agent {agent_name}: {e}")
+        return apps_info
+
+    def load_agent(self, agent_name: str) -> Any:
+        if agent_name in self._agent_cache:
+            return self._agent_cache[agent_name]
+        start = time.perf_counter()
+        agent_or_app = super().load_agent(agent_name)
+        self.load_seconds[agent_name] = time.perf_counter() - start
+        logger.info(f"Loaded agent {agent_name} in {self.load_seconds[agent_name] * 1000:.0f} ms")
+        self._register_hooks(agent_name)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # Loaded before serving (preload); warmed once the worker's event loop runs
+            pass
+        else:
+            self.start_warming(agent_name)
+        return agent_or_app
+
+    def _register_hooks(self, agent_name: str) -> None:
+        register = getattr(sys.modules.get(agent_name), "register_server_hooks", None)
+        if not self.hooks or not callable(register):
+            return
+        try:
+            register(**self.hooks)
+        except Exception as e:
+            # The agent still works without the hooks (e.g. its direct model calls go unrecorded)
+            logger.error(f"Failed to register server hooks with agent {agent_name}: {e}")
+
+    def loaded_agents(self) -> List[str]:
+        return list(self._agent_cache)
+
+    def start_warming(self, agent_name: str) -> asyncio.Task:
+        """Warm a loaded agent's toolsets in the background (once per process)."""
+        task = self._warm_tasks.get(agent_name)
+        if task is None:
+            task = self._warm_tasks[agent_name] = asyncio.create_task(self.warm(agent_name))
+        return task
+
+    async def warm(self, agent_name: str) -> Dict[str, Any]:
+        """
+        Open the agent's toolset connections (MCP sessions) and fetch their tools.
+
+        Returns the number of toolsets and tools, and the errors of toolsets that failed.
+        """
+        result: Dict[str, Any] = {"toolsets": 0, "tools": 0, "errors": []}
+        agent = _root_agent(self._agent_cache.get(agent_name))
+        if agent is None:
+            return result
+        start = time.perf_counter()
+        for toolset in _toolsets(agent):
+            result["toolsets"] += 1
+            try:
+                result["tools"] += len(await toolset.get_tools())
+            except Exception as e:
+                # The request that needs the toolset retries and reports the error
+                logger.warning(f"Failed to warm {type(toolset).__name__} of agent {agent_name}: {e}")
+                result["errors"].append(f"{type(toolset).__name__}: {e}")
+        logger.info(f"Warmed agent {agent_name} in {(time.perf_counter() - start) * 1000:.0f} ms")
+        return result
+
+    def preload(self, names: str = PRELOAD_AGENTS) -> List[str]:
+        """Import the agents in `names` ("*" or a comma-separated list); returns those loaded."""
+        available = self.list_agents()
+        if names.strip() == "*":
+            selected = available
+        else:
+            selected = [name.strip() for name in names.split(",") if name.strip()]
+        loaded = []
+        for agent_name in selected:
+            if agent_name not in available:
+                logger.warning(f"PRELOAD_AGENTS names unknown agent {agent_name}")
+                self.preload_errors[agent_name] = "unknown agent"
+                continue
+            try:
+                self.load_agent(agent_name)
+                loaded.append(agent_name)
+            except Exception as e:
+                # The agent stays loadable on demand, where the request reports the error
+                logger.error(f"Failed to preload agent {agent_name}: {e}")
+                self.preload_errors[agent_name] = str(e)
+        return loaded
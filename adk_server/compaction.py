@@ -0,0 +1,388 @@
+"""
+Session event compaction and context budget.
+
+Search agents return large tool results (five results with 1000-character snippets per
+call), and every one of them is reloaded from Postgres and resent to the model on every
+later turn. CompactionPlugin is added to every agent's runner:
+
+- when an invocation ends, tool results from before the last SESSION_COMPACTION_WINDOW
+  invocations are compacted: strings are cut to SESSION_COMPACTION_MAX_CHARS and lists to
+  SESSION_COMPACTION_MAX_ITEMS, so titles and URLs survive while snippets shrink. The full
+  event goes to the event_archive table (cold storage) and the stored event is rewritten in
+  the same transaction, so later loads read less. Archived events reference their session
+  and are deleted with it (ON DELETE CASCADE),
+- before each model call, the conversation history is capped at SESSION_CONTEXT_TOKEN_BUDGET
+  estimated tokens by dropping the oldest turns. A cut always starts at a user message, so a
+  tool call is never separated from its result. The stored session keeps its full history.
+"""
+
+import asyncio
+import json
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events.event import Event
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.plugins.base_plugin import BasePlugin
+from google.adk.sessions.session import Session
+from google.genai import types
+
+from . import session_db
+from .config import (
+    SESSION_COMPACTION_MAX_CHARS,
+    SESSION_COMPACTION_MAX_ITEMS,
+    SESSION_COMPACTION_MIN_CHARS,
+    SESSION_COMPACTION_WINDOW,
+    SESSION_CONTEXT_TOKEN_BUDGET,
+)
+
+logger = logging.getLogger(__name__)
+
+# SQLAlchemy is an optional dependency of google-adk (the "db" extra)
+try:
+    from sqlalchemy import (
+        JSON,
+        Column,
+        DateTime,
+        ForeignKeyConstraint,
+        MetaData,
+        String,
+        Table,
+        delete,
+        exists,
+        func,
+        insert,
+        inspect,
+        select,
+        update,
+    )
+    from sqlalchemy.dialects import postgresql, sqlite
+except ModuleNotFoundError:
+    Table = None
+
+# Marks a compacted event (custom_metadata key) with the size of the original tool results
+COMPACTED_KEY = "compacted_from_chars"
+
+# Foreign key tying archived events to their session, so deleting a session deletes them
+ARCHIVE_SESSION_FK = "event_archive_session_fkey"
+
+# Rough characters per token for budgeting, and the token cost of an inline image or file
+CHARS_PER_TOKEN = 4
+INLINE_DATA_TOKENS = 258
+
+if Table is not None:
+    _archive_metadata = MetaData()
+    event_archive = Table(
+        "event_archive",
+        _archive_metadata,
+        Column("app_name", String(128), primary_key=True),
+        Column("user_id", String(128), primary_key=True),
+        Column("session_id", String(128), primary_key=True),
+        Column("event_id", String(128), primary_key=True),
+        Column("invocation_id", String(256)),
+        Column("event_data", JSON),
+        Column("archived_at", DateTime(timezone=True), server_default=func.now()),
+        ForeignKeyConstraint(
+            ["app_name", "user_id", "session_id"],
+            ["sessions.app_name", "sessions.user_id", "sessions.id"],
+            name=ARCHIVE_SESSION_FK,
+            ondelete="CASCADE",
+        ),
+    )
+    # ADK's sessions table, only as the foreign key's target (never created from here)
+    _sessions = Table(
+        "sessions",
+        _archive_metadata,
+        Column("app_name", String(128), primary_key=True),
+        Column("user_id", String(128), primary_key=True),
+        Column("id", String(128), primary_key=True),
+    )
+
+
+def _json_size(value: Any) -> int:
+    return len(json.dumps(value, default=str, ensure_ascii=False))
+
+
+def trim_value(value: Any, max_chars: int = SESSION_COMPACTION_MAX_CHARS, max_items: int = SESSION_COMPACTION_MAX_ITEMS) -> Any:
+    """Cut long strings and lists anywhere in a JSON-like value, keeping its structure."""
+    if isinstance(value, str):
+        return value if len(value) <= max_chars else value[:max_chars] + "..."
+    if isinstance(value, list):
+        items = [trim_value(item, max_chars, max_items) for item in value[:max_items]]
+        if len(value) > max_items:
+            items.append(f"... {len(value) - max_items} more")
+        return items
+    if isinstance(value, dict):
+        return {key: trim_value(item, max_chars, max_items) for key, item in value.items()}
+    return value
+
+
+def compact_content(event: Event) -> Optional[Tuple[types.Content, int, int]]:
+    """
+    The event's content with its large tool results trimmed.
+
+    Returns (content, original characters, characters saved), or None if the event has no
+    tool results worth compacting or is compacted already.
+    """
+    if not event.content or not event.content.parts:
+        return None
+    if event.custom_metadata and COMPACTED_KEY in event.custom_metadata:
+        return None
+
+    parts = []
+    original_chars = 0
+    saved = 0
+    for part in event.content.parts:
+        response = part.function_response
+        if response is not None and response.response:
+            size = _json_size(response.response)
+            if size > SESSION_COMPACTION_MIN_CHARS:
+                trimmed = trim_value(response.response)
+                trimmed_size = _json_size(trimmed)
+                if trimmed_size < size:
+                    original_chars += size
+                    saved += size - trimmed_size
+                    part = part.model_copy(update={"function_response": response.model_copy(update={"response": trimmed})})
+        parts.append(part)
+    if not saved:
+        return None
+    return event.content.model_copy(update={"parts": parts}), original_chars, saved
+
+
+def _outside_window(events: List[Event], window: int) -> List[Event]:
+    """Events that belong to invocations before the last `window` ones."""
+    recent: Set[str] = set()
+    for event in reversed(events):
+        if event.invocation_id not in recent:
+            if len(recent) == window:
+                break
+            recent.add(event.invocation_id)
+    return [event for event in events if event.invocation_id not in recent]
+
+
+def estimate_tokens(content: types.Content) -> int:
+    chars = 0
+    tokens = 0
+    for part in content.parts or ():
+        if part.text:
+            chars += len(part.text)
+        elif part.function_call is not None:
+            chars += _json_size(part.function_call.args or {}) + len(part.function_call.name or "")
+        elif part.function_response is not None:
+            chars += _json_size(part.function_response.response or {})
+        elif part.inline_data is not None or part.file_data is not None:
+            tokens += INLINE_DATA_TOKENS
+    return tokens + chars // CHARS_PER_TOKEN
+
+
+def _is_user_message(content: types.Content) -> bool:
+    parts = content.parts or ()
+    return content.role == "user" and any(part.text for part in parts) and not any(
+        part.function_response is not None for part in parts
+    )
+
+
+def fit_contents(contents: List[types.Content], budget: int) -> Tuple[List[types.Content], int]:
+    """
+    The newest contents that fit in `budget` tokens, starting at a user message.
+
+    Returns the kept contents and the number of estimated tokens dropped. If even the latest
+    turn is over budget, it's kept from its user message anyway.
+    """
+    sizes = [estimate_tokens(content) for content in contents]
+    total = sum(sizes)
+    if total <= budget:
+        return contents, 0
+
+    kept = 0
+    start = len(contents)
+    for index in range(len(contents) - 1, -1, -1):
+        if kept + sizes[index] > budget:
+            break
+        kept += sizes[index]
+        start = index
+    while start < len(contents) and not _is_user_message(contents[start]):
+        start += 1
+    if start == len(contents):
+        start = max((i for i, content in enumerate(contents) if _is_user_message(content)), default=0)
+    return contents[start:], sum(sizes[:start])
+
+
+class EventArchive:
+    """Cold storage for full events replaced by compacted ones, in the session database."""
+
+    def __init__(self):
+        self._table_ready = False
+        self._table_lock = asyncio.Lock()
+
+    async def _ensure_table(self, db_service) -> None:
+        if self._table_ready:
+            return
+        async with self._table_lock:
+            if not self._table_ready:
+                async with db_service.db_engine.begin() as connection:
+                    await connection.run_sync(_archive_metadata.create_all, tables=[event_archive])
+                    await connection.run_sync(self._add_session_fk)
+                self._table_ready = True
+
+    @staticmethod
+    def _add_session_fk(connection) -> None:
+        """
+        Tie an archive created without the foreign key to its sessions.
+
+        Events archived for sessions that were deleted since are removed first.
+        """
+        if any(fk.get("name") == ARCHIVE_SESSION_FK for fk in inspect(connection).get_foreign_keys("event_archive")):
+            return
+        if connection.dialect.name == "sqlite":
+            # SQLite can't add a constraint to an existing table
+            logger.warning("event_archive has no session foreign key; recreate it to delete archives with sessions")
+            return
+        orphaned = connection.execute(
+            delete(event_archive).where(
+                ~exists().where(
+                    _sessions.c.app_name == event_archive.c.app_name,
+                    _sessions.c.user_id == event_archive.c.user_id,
+                    _sessions.c.id == event_archive.c.session_id,
+                )
+            )
+        ).rowcount
+        connection.exec_driver_sql(
+            f"ALTER TABLE event_archive ADD CONSTRAINT {ARCHIVE_SESSION_FK} "
+            "FOREIGN KEY (app_name, user_id, session_id) REFERENCES sessions (app_name, user_id, id) ON DELETE CASCADE"
+        )
+        logger.info(f"Added the session foreign key to event_archive ({orphaned} orphaned event(s) deleted)")
+
+    def _insert(self, dialect: str):
+        if dialect == "postgresql":
+            return postgresql.insert(event_archive).on_conflict_do_nothing()
+        if dialect == "sqlite":
+            return sqlite.insert(event_archive).on_conflict_do_nothing()
+        return insert(event_archive)
+
+    async def archive_and_rewrite(self, db_service, session: Session, items: List[Tuple[Dict[str, Any], Event]]) -> bool:
+        """Archive the original events and store their compacted versions, in one transaction."""
+        StorageEvent = db_service._get_schema_classes().StorageEvent
+        if not hasattr(StorageEvent, "event_data"):
+            # Pre-v1 schema stores event fields in columns; leave those sessions as they are
+            return False
+        await self._ensure_table(db_service)
+
+        keys = {"app_name": session.app_name, "user_id": session.user_id, "session_id": session.id}
+        async with db_service.database_session_factory() as sql_session:
+            await sql_session.execute(
+                self._insert(db_service.db_engine.dialect.name),
+                [
+                    {**keys, "event_id": event.id, "invocation_id": event.invocation_id, "event_data": original}
+                    for original, event in items
+                ],
+            )
+            # Bulk UPDATE by primary key
+            await sql_session.execute(
+                update(StorageEvent),
+                [
+                    {**keys, "id": event.id, "event_data": event.model_dump(exclude_none=True, mode="json")}
+                    for _, event in items
+                ],
+            )
+            await sql_session.commit()
+        return True
+
+    async def list(self, db_service, app_name: str, user_id: str, session_id: str) -> List[Dict[str, Any]]:
+        """Archived (full) events of a session, oldest first."""
+        await self._ensure_table(db_service)
+        statement = (
+            select(event_archive.c.event_data)
+            .where(
+                event_archive.c.app_name == app_name,
+                event_archive.c.user_id == user_id,
+                event_archive.c.session_id == session_id,
+            )
+            .order_by(event_archive.c.archived_at, event_archive.c.event_id)
+        )
+        async with db_service.database_session_factory() as sql_session:
+            result = await sql_session.execute(statement)
+            return [row[0] for row in result.all()]
+
+
+class CompactionPlugin(BasePlugin):
+    """Compacts old tool results after each invocation and caps the history sent to the model."""
+
+    def __init__(self):
+        super().__init__(name="session_compaction")
+        self.archive = EventArchive()
+        self.compacted_events = 0
+        self.compacted_chars_saved = 0
+        self.trimmed_requests = 0
+        self.trimmed_tokens = 0
+        self._pending: Set[asyncio.Task] = set()
+
+    async def after_run_callback(self, *, invocation_context: InvocationContext) -> None:
+        if SESSION_COMPACTION_WINDOW <= 0:
+            return
+        session = invocation_context.session
+        items = []
+        saved = 0
+        for event in _outside_window(session.events, SESSION_COMPACTION_WINDOW):
+            compacted = compact_content(event)
+            if compacted is None:
+                continue
+            content, original_chars, event_saved = compacted
+            original = event.model_dump(exclude_none=True, mode="json")
+            # Changed in place: cached copies of the session share the event objects
+            event.content = content
+            event.custom_metadata = {**(event.custom_metadata or {}), COMPACTED_KEY: original_chars}
+            items.append((original, event))
+            saved += event_saved
+        if not items:
+            return
+
+        self.compacted_events += len(items)
+        self.compacted_chars_saved += saved
+        logger.info(f"Compacted {len(items)} tool-result events of session {session.id} ({saved} chars saved)")
+
+        db_service = session_db.get_session_service()
+        if db_service is not None:
+            # Off the response path: the stream can end while the rewrite commits
+            task = asyncio.create_task(self._persist(db_service, session, items))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+    async def _persist(self, db_service, session: Session, items: List[Tuple[Dict[str, Any], Event]]) -> None:
+        try:
+            await self.archive.archive_and_rewrite(db_service, session, items)
+        except Exception as e:
+            logger.error(f"Failed to store compacted events of session {session.id}: {e}")
+
+    async def before_model_callback(
+        self, *, callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> Optional[LlmResponse]:
+        if SESSION_CONTEXT_TOKEN_BUDGET <= 0 or not llm_request.contents:
+            return None
+        contents, dropped = fit_contents(llm_request.contents, SESSION_CONTEXT_TOKEN_BUDGET)
+        if dropped:
+            self.trimmed_requests += 1
+            self.trimmed_tokens += dropped
+            logger.debug(
+                f"Dropped {len(llm_request.contents) - len(contents)} oldest contents "
+                f"(~{dropped} tokens) to fit the context budget"
+            )
+            llm_request.contents = contents
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "window_invocations": SESSION_COMPACTION_WINDOW,
+            "context_token_budget": SESSION_CONTEXT_TOKEN_BUDGET,
+            "compacted_events": self.compacted_events,
+            "compacted_chars_saved": self.compacted_chars_saved,
+            "trimmed_requests": self.trimmed_requests,
+            "trimmed_tokens": self.trimmed_tokens,
+        }
+
+
+# Loaded by the API server for every agent through get_fast_api_app(extra_plugins=...)
+compaction_plugin = CompactionPlugin()
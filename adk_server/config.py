@@ -0,0 +1,97 @@
+"""
+Configuration settings for the agent directory server (run_adk.py).
+"""
+
+import os
+
+# Optional: load .env automatically if python-dotenv is installed.
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ModuleNotFoundError:
+    pass
+
+# Worker processes: a number, or "auto" for one per CPU core. 1 serves from a single
+# uvicorn process; more than 1 serves through gunicorn with the app preloaded.
+WEB_CONCURRENCY = os.environ.get("WEB_CONCURRENCY", "1")
+
+# Recycle a worker after this many requests (0 disables); the jitter spreads restarts so
+# the workers don't all recycle at the same time
+WORKER_MAX_REQUESTS = int(os.environ.get("WORKER_MAX_REQUESTS", "5000"))
+WORKER_MAX_REQUESTS_JITTER = int(os.environ.get("WORKER_MAX_REQUESTS_JITTER", "500"))
+
+# Recycle a worker once its RSS has grown this much since it started (0 disables)
+WORKER_MAX_MEMORY_GROWTH_MB = int(os.environ.get("WORKER_MAX_MEMORY_GROWTH_MB", "512"))
+WORKER_MEMORY_CHECK_INTERVAL = float(os.environ.get("WORKER_MEMORY_CHECK_INTERVAL", "30"))
+
+# Seconds a silent worker is given before it's restarted, and to finish requests on shutdown
+WORKER_TIMEOUT = int(os.environ.get("WORKER_TIMEOUT", "120"))
+WORKER_GRACEFUL_TIMEOUT = int(os.environ.get("WORKER_GRACEFUL_TIMEOUT", "30"))
+WORKER_KEEPALIVE = int(os.environ.get("WORKER_KEEPALIVE", "5"))
+
+# Agents imported when the server starts, before the first request: "*" for all of them
+# or a comma-separated list of agent names. The others are imported on their first request.
+PRELOAD_AGENTS = os.environ.get("PRELOAD_AGENTS", "")
+
+# Startup budgets checked by `python run_adk.py --profile-startup`, in milliseconds: the
+# whole startup (import and app build with every agent loaded) and each agent (0 = none)
+STARTUP_BUDGET_MS = float(os.environ.get("STARTUP_BUDGET_MS", "0"))
+STARTUP_AGENT_BUDGET_MS = float(os.environ.get("STARTUP_AGENT_BUDGET_MS", "0"))
+
+# Seconds each warm-up step (session pool, an agent's MCP toolsets) may take before
+# /readyz reports it failed
+READINESS_TIMEOUT = float(os.environ.get("READINESS_TIMEOUT", "60"))
+
+# Admission control for /run and /run_sse, per agent and worker: runs at once, requests
+# waiting for a slot, and seconds one may wait. An agent's metadata.json "admission" block
+# or an ADMISSION_<AGENT_NAME> env var ("concurrency,queue,timeout") overrides these.
+# ADMISSION_MAX_CONCURRENCY=0 turns admission control off.
+ADMISSION_MAX_CONCURRENCY = int(os.environ.get("ADMISSION_MAX_CONCURRENCY", "16"))
+ADMISSION_MAX_QUEUE = int(os.environ.get("ADMISSION_MAX_QUEUE", "32"))
+ADMISSION_QUEUE_TIMEOUT = float(os.environ.get("ADMISSION_QUEUE_TIMEOUT", "30"))
+
+# Prometheus metrics at /metrics (needs prometheus_client)
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() == "true"
+
+# Session database (Postgres via asyncpg) connection pool, per worker process.
+# SESSION_DB_POOL_SIZE=0 disables local pooling (e.g. behind an external PgBouncer).
+SESSION_DB_POOL_SIZE = int(os.environ.get("SESSION_DB_POOL_SIZE", "5"))
+SESSION_DB_MAX_OVERFLOW = int(os.environ.get("SESSION_DB_MAX_OVERFLOW", "5"))
+SESSION_DB_POOL_TIMEOUT = float(os.environ.get("SESSION_DB_POOL_TIMEOUT", "10"))
+# Seconds before a pooled connection is replaced (Neon drops idle connections on suspend)
+SESSION_DB_POOL_RECYCLE = int(os.environ.get("SESSION_DB_POOL_RECYCLE", "300"))
+SESSION_DB_POOL_PRE_PING = os.environ.get("SESSION_DB_POOL_PRE_PING", "true").lower() == "true"
+SESSION_DB_CONNECT_TIMEOUT = float(os.environ.get("SESSION_DB_CONNECT_TIMEOUT", "10"))
+SESSION_DB_COMMAND_TIMEOUT = float(os.environ.get("SESSION_DB_COMMAND_TIMEOUT", "30"))
+SESSION_DB_SSL = os.environ.get("SESSION_DB_SSL", "require")
+
+# asyncpg statement cache size and whether to use named server-side prepared statements
+SESSION_DB_STATEMENT_CACHE_SIZE = int(os.environ.get("SESSION_DB_STATEMENT_CACHE_SIZE", "100"))
+SESSION_DB_PREPARED_STATEMENTS = os.environ.get("SESSION_DB_PREPARED_STATEMENTS", "true").lower() == "true"
+
+# PgBouncer transaction-mode compatibility: "true", "false" or "auto" (on for Neon
+# "-pooler" hosts). Disables the statement caches and uses unique statement names.
+SESSION_DB_PGBOUNCER = os.environ.get("SESSION_DB_PGBOUNCER", "auto").lower()
+
+# Hot sessions cached per worker (0 disables the cache)
+SESSION_CACHE_SIZE = int(os.environ.get("SESSION_CACHE_SIZE", "1000"))
+# Check a cached session's revision before serving it. Only turn off when every session
+# is served by one worker (a single worker and replica, or session-affine routing).
+SESSION_CACHE_REVALIDATE = os.environ.get("SESSION_CACHE_REVALIDATE", "true").lower() == "true"
+
+# Write the events of a turn in one transaction instead of one per event, and the most
+# events buffered per session before they're written regardless
+SESSION_EVENT_BATCHING = os.environ.get("SESSION_EVENT_BATCHING", "true").lower() == "true"
+SESSION_EVENT_BATCH_MAX = int(os.environ.get("SESSION_EVENT_BATCH_MAX", "50"))
+
+# Event compaction: tool results from before the last SESSION_COMPACTION_WINDOW invocations
+# are trimmed in storage (originals kept in the event_archive table); 0 disables it
+SESSION_COMPACTION_WINDOW = int(os.environ.get("SESSION_COMPACTION_WINDOW", "2"))
+# Only tool results larger than this (serialized characters) are compacted
+SESSION_COMPACTION_MIN_CHARS = int(os.environ.get("SESSION_COMPACTION_MIN_CHARS", "2000"))
+# Compacted results keep strings up to this length and lists up to this many items
+SESSION_COMPACTION_MAX_CHARS = int(os.environ.get("SESSION_COMPACTION_MAX_CHARS", "200"))
+SESSION_COMPACTION_MAX_ITEMS = int(os.environ.get("SESSION_COMPACTION_MAX_ITEMS", "5"))
+
+# Estimated tokens of conversation history sent to the model per call (0 = unlimited)
+SESSION_CONTEXT_TOKEN_BUDGET = int(os.environ.get("SESSION_CONTEXT_TOKEN_BUDGET", "32000"))
@@ -0,0 +1,289 @@
+"""
+Batched event writes to the Postgres session store.
+
+ADK's DatabaseSessionService writes every event in its own transaction: lock the session
+row, read app and user state, insert the event, update the session and commit, several
+round-trips per event. One agent turn appends many events (user message, tool calls, tool
+results, model replies), so commit latency grew with the number of tool calls.
+
+BatchingSessionService sits between the session cache and the database:
+
+- an event is applied to the in-memory session at once (the runner sees it immediately)
+  and buffered,
+- the buffer is written in one transaction: one session lock and revision check, the
+  merged state deltas, and a multi-row insert of the events,
+- it's written when the turn's final response is appended (before it is streamed), at
+  the end of the run or when the run fails (EventBatchPlugin), before the session is
+  read, and once it holds SESSION_EVENT_BATCH_MAX events. User messages are written at
+  once, so a stale session is still rejected before the agent runs.
+- a failed write keeps the batch for the next flush, except when the session went stale
+  or was deleted, where it can never be written and is dropped. Either way the session
+  cache is told (on_flush_failed), since its copy holds events the database doesn't.
+
+The write mirrors DatabaseSessionService.append_event for a list of events, through
+DatabaseSessionService internals of the pinned google-adk version.
+"""
+
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.errors._stale_session_error import StaleSessionError
+from google.adk.errors.session_not_found_error import SessionNotFoundError
+from google.adk.events.event import Event
+from google.adk.plugins.base_plugin import BasePlugin
+from google.adk.sessions import _session_util
+from google.adk.sessions.base_session_service import (
+    BaseSessionService,
+    GetSessionConfig,
+    ListSessionsResponse,
+)
+from google.adk.sessions.database_session_service import _STALE_SESSION_ERROR_MESSAGE
+from google.adk.sessions.session import Session
+
+from . import session_db
+
+logger = logging.getLogger(__name__)
+
+SessionKey = Tuple[str, str, str]
+
+class _PendingEvents:
+    """Events of one session object waiting to be written."""
+
+    __slots__ = ("session", "events")
+
+    def __init__(self, session: Session):
+        self.session = session
+        self.events: List[Event] = []
+
+
+class BatchingSessionService(BaseSessionService):
+    """Session service that writes the events of a turn to the database in one transaction."""
+
+    def __init__(self, backend, max_batch: int):
+        self.backend = backend
+        self.max_batch = max_batch
+        self._pending: Dict[SessionKey, _PendingEvents] = {}
+        # Called with (session, previous revision) after buffered events were written
+        self.on_flush: Optional[Callable[[Session, Optional[str]], None]] = None
+        # Called with the session whose buffered events failed to be written
+        self.on_flush_failed: Optional[Callable[[Session], None]] = None
+        self.batches = 0
+        self.batched_events = 0
+        self.failed_writes = 0
+        self.dropped_events = 0
+        self.write_seconds_total = 0.0
+
+    @staticmethod
+    def _key(session: Session) -> SessionKey:
+        return (session.app_name, session.user_id, session.id)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event
+        self._apply_temp_state(session, event)
+        event = self._trim_temp_delta_state(event)
+
+        key = self._key(session)
+        pending = self._pending.get(key)
+        if pending is not None and pending.session is not session:
+            # Another copy of the session was appended to; write its events first
+            await self._flush_key(key)
+            pending = None
+        if pending is None:
+            pending = self._pending[key] = _PendingEvents(session)
+        pending.events.append(event)
+        self._commit_event_to_session(session, event)
+
+        if event.author == "user" or event.is_final_response() or len(pending.events) >= self.max_batch:
+            await self._flush_key(key)
+        return event
+
+    async def flush_session(self, session: Session) -> None:
+        """Write the buffered events of a session."""
+        await self._flush_key(self._key(session))
+
+    async def flush(self) -> None:
+        for key in list(self._pending):
+            await self._flush_key(key)
+        await self.backend.flush()
+
+    async def _flush_key(self, key: SessionKey) -> None:
+        # Taken out first, so concurrent flushes never write the same events twice
+        pending = self._pending.pop(key, None)
+        if pending is None or not pending.events:
+            return
+        start = time.perf_counter()
+        try:
+            previous = await self._write(pending.session, pending.events)
+        except (StaleSessionError, SessionNotFoundError):
+            # Can't ever be written; the run that appended them reports the error
+            self.failed_writes += 1
+            self.dropped_events += len(pending.events)
+            logger.error(f"Dropped {len(pending.events)} buffered events of session {key[2]}: session is stale or gone")
+            self._flush_failed(pending.session)
+            raise
+        except BaseException:
+            # Kept for the next flush: a later append, the end of the run or a read
+            self.failed_writes += 1
+            self._restore(key, pending)
+            self._flush_failed(pending.session)
+            raise
+        self.batches += 1
+        self.batched_events += len(pending.events)
+        self.write_seconds_total += time.perf_counter() - start
+        if self.on_flush is not None:
+            self.on_flush(pending.session, previous)
+
+    def _restore(self, key: SessionKey, pending: _PendingEvents) -> None:
+        current = self._pending.get(key)
+        if current is None:
+            self._pending[key] = pending
+        elif current.session is pending.session:
+            # Appended to while we were writing; ours come first
+            current.events[:0] = pending.events
+        else:
+            self.dropped_events += len(pending.events)
+            logger.error(f"Dropped {len(pending.events)} buffered events of session {key[2]}: superseded by another copy")
+
+    def _flush_failed(self, session: Session) -> None:
+        if self.on_flush_failed is not None:
+            self.on_flush_failed(session)
+
+    async def _write(self, session: Session, events: List[Event]) -> Optional[str]:
+        """Store `events` in one transaction; returns the session revision they were appended to."""
+        db = self.backend
+        await db.prepare_tables()
+        schema = db._get_schema_classes()
+        row_locking = db._supports_row_level_locking()
+
+        app_delta: Dict[str, Any] = {}
+        user_delta: Dict[str, Any] = {}
+        session_delta: Dict[str, Any] = {}
+        for event in events:
+            if event.actions and event.actions.state_delta:
+                deltas = _session_util.extract_json_safe_state_delta(event.actions.state_delta)
+                app_delta.update(deltas["app"])
+                user_delta.update(deltas["user"])
+                session_delta.update(deltas["session"])
+
+        async with db._with_session_lock(app_name=session.app_name, user_id=session.user_id, session_id=session.id):
+            # Read under the lock: an earlier batch of this session may have just advanced it
+            previous = session._storage_update_marker
+            async with db._rollback_on_exception_session() as sql_session:
+                storage_session = await sql_session.get(
+                    schema.StorageSession,
+                    (session.app_name, session.user_id, session.id),
+                    with_for_update=row_locking,
+                    populate_existing=True,
+                )
+                if storage_session is None:
+                    raise SessionNotFoundError(f"Session {session.id} not found.")
+                if previous is not None and previous != storage_session.get_update_marker():
+                    raise StaleSessionError(_STALE_SESSION_ERROR_MESSAGE)
+
+                if app_delta:
+                    app_state = await sql_session.get(schema.StorageAppState, session.app_name, with_for_update=row_locking)
+                    if app_state is None:
+                        raise ValueError(f"App state missing for app_name={session.app_name!r}.")
+                    app_state.state.update(app_delta)
+                if user_delta:
+                    user_state = await sql_session.get(
+                        schema.StorageUserState, (session.app_name, session.user_id), with_for_update=row_locking
+                    )
+                    if user_state is None:
+                        raise ValueError(
+                            f"User state missing for app_name={session.app_name!r}, user_id={session.user_id!r}."
+                        )
+                    user_state.state.update(user_delta)
+                if session_delta:
+                    storage_session.state.update(session_delta)
+
+                update_time = datetime.fromtimestamp(events[-1].timestamp, timezone.utc)
+                if db._uses_naive_datetime():
+                    update_time = update_time.replace(tzinfo=None)
+                storage_session.update_time = update_time
+                # Flushed as a single multi-row INSERT
+                sql_session.add_all([schema.StorageEvent.from_event(session, event) for event in events])
+
+                # Read before commit (post-commit attribute access would lazy-load)
+                last_update_time = storage_session.get_update_timestamp()
+                revision = storage_session.get_update_marker()
+                await sql_session.commit()
+
+            session.last_update_time = last_update_time
+            session._storage_update_marker = revision
+        return previous
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        return await self.backend.create_session(app_name=app_name, user_id=user_id, state=state, session_id=session_id)
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        # Reads see the session's buffered events
+        await self._flush_key((app_name, user_id, session_id))
+        return await self.backend.get_session(app_name=app_name, user_id=user_id, session_id=session_id, config=config)
+
+    async def list_sessions(self, *, app_name: str, user_id: Optional[str] = None) -> ListSessionsResponse:
+        return await self.backend.list_sessions(app_name=app_name, user_id=user_id)
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        self._pending.pop((app_name, user_id, session_id), None)
+        await self.backend.delete_session(app_name=app_name, user_id=user_id, session_id=session_id)
+
+    async def get_user_state(self, *, app_name: str, user_id: str) -> Dict[str, Any]:
+        return await self.backend.get_user_state(app_name=app_name, user_id=user_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_batch": self.max_batch,
+            "pending_sessions": len(self._pending),
+            "batches": self.batches,
+            "events": self.batched_events,
+            "events_per_batch": round(self.batched_events / self.batches, 2) if self.batches else 0.0,
+            "failed_writes": self.failed_writes,
+            "dropped_events": self.dropped_events,
+            "write_ms_avg": round(self.write_seconds_total / self.batches * 1000, 3) if self.batches else 0.0,
+        }
+
+
+class EventBatchPlugin(BasePlugin):
+    """Writes a session's buffered events when its run ends or fails."""
+
+    def __init__(self):
+        super().__init__(name="event_batching")
+
+    async def after_run_callback(self, *, invocation_context: InvocationContext) -> None:
+        batcher = session_db.get_event_batcher()
+        if batcher is not None:
+            await batcher.flush_session(invocation_context.session)
+
+    async def on_run_error_callback(self, *, invocation_context: InvocationContext, error: Exception) -> None:
+        # after_run_callback is skipped when the run raises; the events so far still count
+        batcher = session_db.get_event_batcher()
+        if batcher is None:
+            return
+        try:
+            await batcher.flush_session(invocation_context.session)
+        except Exception as e:
+            # The run's own error is the one re-raised
+            logger.error(f"Could not write buffered events after a failed run: {e}")
+
+
+# Loaded by the API server for every agent through get_fast_api_app(extra_plugins=...)
+event_batch_plugin = EventBatchPlugin()
@@ -0,0 +1,337 @@
+"""
+Prometheus metrics for agents, tools, models and the server's own layers.
+
+`GET /metrics` exposes, per worker:
+
+- adk_request_duration_seconds{agent,endpoint,status}: /run and /run_sse latency, including
+  admission queueing and, for SSE, the whole stream (MetricsMiddleware),
+- adk_tool_duration_seconds{agent,tool} and adk_tool_calls_total{agent,tool,outcome},
+- adk_llm_duration_seconds{model}, adk_llm_calls_total{model,outcome} and
+  adk_llm_tokens_total{model,type} (MetricsPlugin, added to every agent's runner, and
+  generate_content for model calls agents make directly, outside the LLM flow),
+- the session cache, connection pool, event batching, compaction and admission statistics,
+  read from those layers at scrape time (ServerStatsCollector).
+
+A tool call's outcome is "error" when it raised or returned {"status": "error"}, and a
+model call's when it raised or answered with an error code, so upstream error rates are
+the error share of each.
+Recording is a dictionary lookup and a histogram observation per call.
+
+prometheus_client is optional; without it (or with METRICS_ENABLED=false) there's no
+/metrics. With several workers, set PROMETHEUS_MULTIPROC_DIR to an empty directory so
+request, tool and model metrics are aggregated across workers; the statistics collected at
+scrape time then describe the worker that answered.
+"""
+
+import logging
+import os
+import time
+from typing import Any, AsyncGenerator, Dict, Iterable, List, Optional, Tuple
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.plugins.base_plugin import BasePlugin
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.tool_context import ToolContext
+
+from . import compaction, session_db
+from .admission import RUN_PATHS
+from .config import METRICS_ENABLED
+
+logger = logging.getLogger(__name__)
+
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+    from prometheus_client import multiprocess
+    from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+except ModuleNotFoundError:
+    Histogram = None
+
+# Agent runs take seconds to minutes; tool and model calls, milliseconds to a minute
+_RUN_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+_CALL_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+if Histogram is not None:
+    REQUEST_DURATION = Histogram(
+        "adk_request_duration_seconds",
+        "Latency of agent run requests",
+        ["agent", "endpoint", "status"],
+        buckets=_RUN_BUCKETS,
+    )
+    TOOL_DURATION = Histogram(
+        "adk_tool_duration_seconds", "Latency of tool calls", ["agent", "tool"], buckets=_CALL_BUCKETS
+    )
+    TOOL_CALLS = Counter("adk_tool_calls_total", "Tool calls by outcome", ["agent", "tool", "outcome"])
+    LLM_DURATION = Histogram("adk_llm_duration_seconds", "Latency of model calls", ["model"], buckets=_CALL_BUCKETS)
+    LLM_CALLS = Counter("adk_llm_calls_total", "Model calls by outcome", ["model", "outcome"])
+    LLM_TOKENS = Counter("adk_llm_tokens_total", "Tokens of model calls", ["model", "type"])
+
+
+# The collector registered with the default registry by install()
+_stats_collector = None
+
+
+def enabled() -> bool:
+    return METRICS_ENABLED and Histogram is not None
+
+
+def _multiprocess() -> bool:
+    return bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+
+def mark_worker_dead(pid: int) -> None:
+    """Drop a finished worker's live metrics files (gunicorn child_exit hook)."""
+    if Histogram is not None and _multiprocess():
+        multiprocess.mark_process_dead(pid)
+
+
+def _tool_failed(result: Any) -> bool:
+    return isinstance(result, dict) and result.get("status") == "error"
+
+
+def record_llm_call(model: str, seconds: Optional[float], failed: bool, usage: Any = None) -> None:
+    """Record one finished model call; seconds is None when the start wasn't seen."""
+    if not enabled():
+        return
+    if seconds is not None:
+        LLM_DURATION.labels(model).observe(seconds)
+    LLM_CALLS.labels(model, "error" if failed else "ok").inc()
+    if usage is not None:
+        if usage.prompt_token_count:
+            LLM_TOKENS.labels(model, "prompt").inc(usage.prompt_token_count)
+        if usage.candidates_token_count:
+            LLM_TOKENS.labels(model, "completion").inc(usage.candidates_token_count)
+
+
+async def generate_content(llm: BaseLlm, llm_request: LlmRequest) -> AsyncGenerator[LlmResponse, None]:
+    """
+    llm.generate_content_async, recorded like the model calls MetricsPlugin sees.
+
+    For agents that call a model directly: those calls skip the model callbacks.
+    """
+    model = llm_request.model or llm.model or "unknown"
+    start = time.perf_counter()
+    failed = False
+    usage = None
+    try:
+        async for llm_response in llm.generate_content_async(llm_request):
+            if not llm_response.partial:
+                failed = failed or bool(llm_response.error_code)
+                usage = llm_response.usage_metadata or usage
+            yield llm_response
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        record_llm_call(model, time.perf_counter() - start, failed, usage)
+
+
+class MetricsPlugin(BasePlugin):
+    """Records tool and model call latency, outcomes and token counts."""
+
+    def __init__(self):
+        super().__init__(name="metrics")
+        # Start times of calls in progress: tools by call id, models by invocation and agent
+        self._tool_starts: Dict[Tuple[str, str], float] = {}
+        self._model_starts: Dict[Tuple[str, str], Tuple[str, float]] = {}
+
+    @staticmethod
+    def _tool_key(tool: BaseTool, tool_context: ToolContext) -> Tuple[str, str]:
+        return (tool_context.invocation_id, tool_context.function_call_id or tool.name)
+
+    async def before_tool_callback(
+        self, *, tool: BaseTool, tool_args: Dict[str, Any], tool_context: ToolContext
+    ) -> Optional[Dict[str, Any]]:
+        self._tool_starts[self._tool_key(tool, tool_context)] = time.perf_counter()
+        return None
+
+    def _record_tool(self, tool: BaseTool, tool_context: ToolContext, failed: bool) -> None:
+        start = self._tool_starts.pop(self._tool_key(tool, tool_context), None)
+        agent = tool_context.agent_name
+        if start is not None:
+            TOOL_DURATION.labels(agent, tool.name).observe(time.perf_counter() - start)
+        TOOL_CALLS.labels(agent, tool.name, "error" if failed else "ok").inc()
+
+    async def after_tool_callback(
+        self, *, tool: BaseTool, tool_args: Dict[str, Any], tool_context: ToolContext, result: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        self._record_tool(tool, tool_context, _tool_failed(result))
+        return None
+
+    async def on_tool_error_callback(
+        self, *, tool: BaseTool, tool_args: Dict[str, Any], tool_context: ToolContext, error: Exception
+    ) -> Optional[Dict[str, Any]]:
+        self._record_tool(tool, tool_context, True)
+        return None
+
+    async def before_model_callback(
+        self, *, callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> Optional[LlmResponse]:
+        key = (callback_context.invocation_id, callback_context.agent_name)
+        self._model_starts[key] = (llm_request.model or "unknown", time.perf_counter())
+        return None
+
+    async def after_model_callback(
+        self, *, callback_context: CallbackContext, llm_response: LlmResponse
+    ) -> Optional[LlmResponse]:
+        if llm_response.partial:
+            return None  # streamed chunks; the call ends with the complete response
+        started = self._model_starts.pop((callback_context.invocation_id, callback_context.agent_name), None)
+        if started is None:
+            return None
+        model, start = started
+        record_llm_call(model, time.perf_counter() - start, bool(llm_response.error_code), llm_response.usage_metadata)
+        return None
+
+    async def on_model_error_callback(
+        self, *, callback_context: CallbackContext, llm_request: LlmRequest, error: Exception
+    ) -> Optional[LlmResponse]:
+        started = self._model_starts.pop((callback_context.invocation_id, callback_context.agent_name), None)
+        model = started[0] if started else llm_request.model or "unknown"
+        record_llm_call(model, None, True)
+        return None
+
+    async def after_run_callback(self, *, invocation_context: InvocationContext) -> None:
+        # Calls cut short (cancelled runs) never reach their after callback
+        invocation_id = invocation_context.invocation_id
+        for starts in (self._tool_starts, self._model_starts):
+            for key in [key for key in starts if key[0] == invocation_id]:
+                del starts[key]
+
+
+class ServerStatsCollector:
+    """Exposes the statistics of the session, batching, compaction and admission layers."""
+
+    def __init__(self, admission=None):
+        self.admission = admission
+
+    def collect(self) -> Iterable[Any]:
+        yield from self._pool()
+        yield from self._cache()
+        yield from self._batching()
+        yield from self._compaction()
+        yield from self._admission()
+
+    def _pool(self) -> Iterable[Any]:
+        stats = session_db.pool_stats()
+        if not stats or not stats.get("pooled"):
+            return
+        for key in ("size", "checked_out", "idle", "overflow", "waiting"):
+            if key in stats:
+                yield GaugeMetricFamily(f"adk_session_pool_{key}", f"Session DB pool: {key}", value=stats[key])
+        if "checkouts" in stats:
+            yield CounterMetricFamily("adk_session_pool_checkouts", "Session DB pool checkouts", value=stats["checkouts"])
+            yield CounterMetricFamily(
+                "adk_session_pool_timeouts", "Session DB pool checkouts timed out", value=stats["timeouts"]
+            )
+            yield CounterMetricFamily(
+                "adk_session_pool_wait_seconds", "Time spent waiting for a connection", value=stats["wait_seconds_total"]
+            )
+
+    def _cache(self) -> Iterable[Any]:
+        cache = session_db.get_session_cache()
+        if cache is None:
+            return
+        stats = cache.stats()
+        yield GaugeMetricFamily("adk_session_cache_sessions", "Sessions cached", value=stats["sessions"])
+        yield GaugeMetricFamily("adk_session_cache_hit_ratio", "Session cache hit ratio", value=stats["hit_ratio"])
+        for key in ("hits", "misses", "revalidations", "invalidations", "evictions"):
+            yield CounterMetricFamily(f"adk_session_cache_{key}", f"Session cache {key}", value=stats[key])
+
+    def _batching(self) -> Iterable[Any]:
+        batcher = session_db.get_event_batcher()
+        if batcher is None:
+            return
+        stats = batcher.stats()
+        yield CounterMetricFamily("adk_event_batches", "Event batches written", value=stats["batches"])
+        yield CounterMetricFamily("adk_event_batch_events", "Events written in batches", value=stats["events"])
+        yield CounterMetricFamily(
+            "adk_event_batch_write_seconds", "Time spent writing event batches", value=batcher.write_seconds_total
+        )
+
+    def _compaction(self) -> Iterable[Any]:
+        stats = compaction.compaction_plugin.stats()
+        yield CounterMetricFamily("adk_compacted_events", "Tool-result events compacted", value=stats["compacted_events"])
+        yield CounterMetricFamily(
+            "adk_compacted_chars_saved", "Characters saved by compaction", value=stats["compacted_chars_saved"]
+        )
+        yield CounterMetricFamily("adk_context_trimmed_tokens", "History tokens trimmed", value=stats["trimmed_tokens"])
+
+    def _admission(self) -> Iterable[Any]:
+        if self.admission is None:
+            return
+        gauges: Dict[str, Any] = {
+            key: GaugeMetricFamily(f"adk_admission_{key}", f"Agent runs {key}", labels=["agent"])
+            for key in ("running", "waiting")
+        }
+        shed = CounterMetricFamily("adk_admission_shed", "Requests shed by admission control", labels=["agent", "reason"])
+        for agent, stats in self.admission.stats().items():
+            for key, gauge in gauges.items():
+                gauge.add_metric([agent], stats[key])
+            shed.add_metric([agent, "queue_full"], stats["shed_queue_full"])
+            shed.add_metric([agent, "timeout"], stats["shed_timeout"])
+        yield from gauges.values()
+        yield shed
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing /run and /run_sse per agent; the admission layer names the agent."""
+
+    def __init__(self, app, agent_names: List[str]):
+        self.app = app
+        # Unknown names from request bodies share one label, so they can't grow the series
+        self.agent_names = set(agent_names)
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope["path"] not in RUN_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            agent = scope.get("state", {}).get("agent_name")
+            REQUEST_DURATION.labels(
+                agent if agent in self.agent_names else "other", scope["path"].lstrip("/"), str(status)
+            ).observe(time.perf_counter() - start)
+
+
+def install(app, agent_names: List[str], admission=None) -> None:
+    """Add /metrics and the request timing middleware to the app."""
+    from fastapi import Response
+
+    global _stats_collector
+    collector = ServerStatsCollector(admission)
+    if not _multiprocess():
+        if _stats_collector is not None:
+            REGISTRY.unregister(_stats_collector)
+        REGISTRY.register(collector)
+    _stats_collector = collector
+    app.add_middleware(MetricsMiddleware, agent_names=agent_names)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def prometheus_metrics() -> Response:
+        """Prometheus metrics of this worker (all workers in multiprocess mode)."""
+        if _multiprocess():
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+            registry.register(collector)
+        else:
+            registry = REGISTRY
+        return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+
+# Loaded by the API server for every agent through get_fast_api_app(extra_plugins=...)
+metrics_plugin = MetricsPlugin()
@@ -0,0 +1,136 @@
+"""
+Liveness and readiness of a worker process.
+
+The server used to take traffic as soon as it was listening, so the first requests after a
+deploy paid for unopened database connections and cold MCP sessions. When a worker starts,
+its lifespan warms it up in the background:
+
+- the session database: tables checked and the connection pool opened (session_db.prime_pool),
+- every preloaded agent (PRELOAD_AGENTS): its MCP sessions opened and tool lists fetched.
+
+`/healthz` answers as long as the process serves requests. `/readyz` answers 503 until every
+warm-up step has finished and the session database is reachable, then 200; the body lists
+each component's status, time taken and error. A failed database warm-up is retried by
+later /readyz calls. A failed agent warm-up is reported but doesn't hold readiness back:
+the agent still connects on its first request.
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, Set, Tuple
+
+from fastapi import FastAPI
+
+from . import session_db
+from .agent_loading import LazyAgentLoader
+from .config import READINESS_TIMEOUT
+
+# Readiness waits for these components to be ready, not just finished
+REQUIRED_COMPONENTS = ("session_db",)
+
+# Seconds before a failed required component is retried by the next /readyz
+RETRY_INTERVAL = 5.0
+
+
+class Readiness:
+    """Warm-up state of this worker process."""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.stopping = False
+        self.components: Dict[str, Dict[str, Any]] = {}
+        self._warm_ups: Dict[str, Callable[[], Awaitable[Any]]] = {}
+        self._finished_at: Dict[str, float] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    def track(self, name: str, warm_up: Callable[[], Awaitable[Any]]) -> None:
+        """Run a warm-up step in the background and record its outcome under `name`."""
+        self._warm_ups[name] = warm_up
+        self.components[name] = {"status": "pending"}
+        task = asyncio.create_task(self._run(name, warm_up()))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def fail(self, name: str, error: str) -> None:
+        self.components[name] = {"status": "failed", "error": error}
+
+    async def _run(self, name: str, warm_up: Awaitable[Any]) -> None:
+        start = time.perf_counter()
+        component: Dict[str, Any]
+        try:
+            detail = await asyncio.wait_for(warm_up, READINESS_TIMEOUT)
+            component = {"status": "ready"}
+            if isinstance(detail, dict):
+                component.update(detail)
+        except asyncio.TimeoutError:
+            component = {"status": "failed", "error": f"timed out after {READINESS_TIMEOUT:g}s"}
+        except Exception as e:
+            component = {"status": "failed", "error": str(e)}
+        component["ms"] = round((time.perf_counter() - start) * 1000, 1)
+        self.components[name] = component
+        self._finished_at[name] = time.monotonic()
+
+    def _retry_failed(self) -> None:
+        # A database that was unreachable at startup shouldn't keep the worker out for good
+        for name in REQUIRED_COMPONENTS:
+            if (
+                self.components.get(name, {}).get("status") == "failed"
+                and name in self._warm_ups
+                and time.monotonic() - self._finished_at.get(name, 0.0) >= RETRY_INTERVAL
+            ):
+                self.track(name, self._warm_ups[name])
+
+    def is_ready(self) -> bool:
+        if self.stopping:
+            return False
+        if any(component["status"] == "pending" for component in self.components.values()):
+            return False
+        return all(self.components.get(name, {}).get("status") == "ready" for name in REQUIRED_COMPONENTS)
+
+    def liveness(self) -> Dict[str, Any]:
+        return {"status": "ok", "uptime_s": round(time.time() - self.started_at, 1)}
+
+    def report(self) -> Tuple[bool, Dict[str, Any]]:
+        """Whether the worker is ready, and the /readyz body."""
+        if not self.stopping:
+            self._retry_failed()
+        ready = self.is_ready()
+        if self.stopping:
+            status = "stopping"
+        elif ready:
+            status = "ready"
+        else:
+            status = "starting" if any(c["status"] == "pending" for c in self.components.values()) else "unavailable"
+        return ready, {"status": status, "components": self.components}
+
+    def lifespan(self, agent_loader: LazyAgentLoader):
+        """FastAPI lifespan that warms this worker process up (see the module docstring)."""
+
+        @asynccontextmanager
+        async def _lifespan(app: FastAPI):
+            self.started_at = time.time()
+            self.stopping = False
+            self.track("session_db", session_db.prime_pool)
+            for agent_name, error in agent_loader.preload_errors.items():
+                self.fail(f"agent:{agent_name}", error)
+            for agent_name in agent_loader.loaded_agents():
+                self.track(f"agent:{agent_name}", lambda name=agent_name: _warm_agent(agent_loader, name))
+            try:
+                yield
+            finally:
+                self.stopping = True
+
+        return _lifespan
+
+
+async def _warm_agent(agent_loader: LazyAgentLoader, agent_name: str) -> Dict[str, Any]:
+    # Shielded: a warm-up timeout stops waiting, it doesn't cancel the toolset connection
+    result = await asyncio.shield(agent_loader.start_warming(agent_name))
+    if result["errors"]:
+        raise RuntimeError("; ".join(result["errors"]))
+    return {"toolsets": result["toolsets"], "tools": result["tools"]}
+
+
+# Shared by the lifespan and the /healthz and /readyz endpoints of this process
+readiness = Readiness()
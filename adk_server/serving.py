@@ -0,0 +1,164 @@
+"""
+Multi-worker serving.
+
+A single uvicorn process runs the whole agent directory on one core and one event loop.
+With WEB_CONCURRENCY > 1 the app is served by gunicorn instead:
+
+- the app and the agents in PRELOAD_AGENTS are imported once in the master process
+  (preload) and the workers are forked from it, so imports are paid once and shared
+  copy-on-write,
+- workers run uvicorn with uvloop and httptools when they are installed,
+- a worker is recycled after WORKER_MAX_REQUESTS requests, or once its RSS has grown by
+  WORKER_MAX_MEMORY_GROWTH_MB, and the master forks a fresh one in its place.
+"""
+
+import gc
+import logging
+import os
+import signal
+import threading
+import time
+import warnings
+from importlib.util import find_spec
+from typing import Any, Callable, Dict, Optional
+
+import uvicorn
+from fastapi import FastAPI
+
+from .config import (
+    WEB_CONCURRENCY,
+    WORKER_GRACEFUL_TIMEOUT,
+    WORKER_KEEPALIVE,
+    WORKER_MAX_MEMORY_GROWTH_MB,
+    WORKER_MAX_REQUESTS,
+    WORKER_MAX_REQUESTS_JITTER,
+    WORKER_MEMORY_CHECK_INTERVAL,
+    WORKER_TIMEOUT,
+)
+from .metrics import mark_worker_dead
+
+logger = logging.getLogger(__name__)
+
+# gunicorn is only needed for multi-worker serving
+try:
+    from gunicorn.app.base import BaseApplication
+
+    try:
+        from uvicorn_worker import UvicornWorker
+    except ModuleNotFoundError:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", DeprecationWarning)
+            from uvicorn.workers import UvicornWorker
+except ModuleNotFoundError:
+    BaseApplication = None
+    UvicornWorker = None
+
+
+def worker_count() -> int:
+    """Configured number of worker processes (WEB_CONCURRENCY, "auto" = one per core)."""
+    value = WEB_CONCURRENCY.strip().lower()
+    if value == "auto":
+        return os.cpu_count() or 1
+    return max(1, int(value))
+
+
+def current_rss_mb() -> Optional[float]:
+    """Resident set size of this process in MB, or None where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _describe_event_loop() -> str:
+    loop = "uvloop" if find_spec("uvloop") else "asyncio"
+    http = "httptools" if find_spec("httptools") else "h11"
+    return f"{loop} event loop, {http} parser"
+
+
+if UvicornWorker is not None:
+
+    class RecyclingUvicornWorker(UvicornWorker):
+        """Uvicorn worker that also recycles itself when its memory grows too much."""
+
+        # "auto" picks uvloop and httptools when installed
+        CONFIG_KWARGS = {"loop": "auto", "http": "auto"}
+
+        def run(self) -> None:
+            if WORKER_MAX_MEMORY_GROWTH_MB > 0:
+                threading.Thread(target=self._watch_memory, name="memory-watchdog", daemon=True).start()
+            super().run()
+
+        def _watch_memory(self) -> None:
+            baseline = current_rss_mb()
+            if baseline is None:
+                logger.warning("Cannot read worker RSS; memory-based recycling is disabled")
+                return
+            limit = baseline + WORKER_MAX_MEMORY_GROWTH_MB
+            while True:
+                time.sleep(WORKER_MEMORY_CHECK_INTERVAL)
+                rss = current_rss_mb()
+                if rss is not None and rss > limit:
+                    logger.warning(
+                        f"Worker {self.pid} RSS {rss:.0f} MB exceeds {limit:.0f} MB "
+                        f"(started at {baseline:.0f} MB); recycling"
+                    )
+                    # Graceful shutdown: in-flight requests finish, then the master replaces us
+                    os.kill(self.pid, signal.SIGTERM)
+                    return
+
+    class _PreloadedApplication(BaseApplication):
+        """gunicorn application that builds the app once in the master process."""
+
+        def __init__(self, app_factory: Callable[[], FastAPI], options: Dict[str, Any]):
+            self._app_factory = app_factory
+            self._options = options
+            super().__init__()
+
+        def load_config(self) -> None:
+            for key, value in self._options.items():
+                self.cfg.set(key, value)
+
+        def load(self) -> FastAPI:
+            app = self._app_factory()
+            # Everything loaded so far is shared copy-on-write with the workers; freezing it
+            # keeps their garbage collector from touching (and so copying) those pages
+            gc.collect()
+            gc.freeze()
+            return app
+
+
+def serve(app_factory: Callable[[], FastAPI], host: str, port: int) -> None:
+    """
+    Serve the app built by `app_factory()`.
+
+    One worker runs uvicorn in-process as before; more run gunicorn with the app preloaded
+    in the master.
+    """
+    workers = worker_count()
+    if workers > 1 and BaseApplication is None:
+        logger.warning(f"WEB_CONCURRENCY={workers} but gunicorn is not installed; serving from a single process")
+        workers = 1
+
+    if workers == 1:
+        logger.info(f"Serving on {host}:{port} from a single process ({_describe_event_loop()})")
+        uvicorn.run(app_factory(), host=host, port=port, loop="auto", http="auto")
+        return
+
+    options = {
+        "bind": f"{host}:{port}",
+        "workers": workers,
+        "worker_class": RecyclingUvicornWorker,
+        "preload_app": True,
+        "max_requests": WORKER_MAX_REQUESTS,
+        "max_requests_jitter": WORKER_MAX_REQUESTS_JITTER,
+        "timeout": WORKER_TIMEOUT,
+        "graceful_timeout": WORKER_GRACEFUL_TIMEOUT,
+        "keepalive": WORKER_KEEPALIVE,
+        # Multiprocess Prometheus metrics keep files per worker (metrics.py)
+        "child_exit": lambda server, worker: mark_worker_dead(worker.pid),
+    }
+    logger.info(f"Serving on {host}:{port} with {workers} workers ({_describe_event_loop()})")
+    _PreloadedApplication(app_factory, options).run()
@@ -0,0 +1,223 @@
+"""
+Read-through session cache in front of the database session service.
+
+Every /run and /run_sse loads the whole session and its event history from Postgres, and
+does so twice (the API server's existence check and the runner). CachedSessionService keeps
+hot sessions in a bounded LRU per worker:
+
+- reads are served from memory; with SESSION_CACHE_REVALIDATE a hit is first checked
+  against the session's storage revision with a metadata-only read (no events), so a
+  session another worker or replica appended to is reloaded rather than served stale,
+- events are written through to the database (or its event batching layer) and then
+  applied to the cached session,
+- app- and user-scoped state changes are applied to every cached session they belong to.
+
+Callers get their own copy of a cached session (event list and state), so the runner can
+append to it as it would to a freshly loaded one.
+"""
+
+import copy
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from google.adk.errors._stale_session_error import StaleSessionError
+from google.adk.events.event import Event
+from google.adk.sessions.base_session_service import (
+    BaseSessionService,
+    GetSessionConfig,
+    ListSessionsResponse,
+)
+from google.adk.sessions.session import Session
+from google.adk.sessions.state import State
+
+logger = logging.getLogger(__name__)
+
+SessionKey = Tuple[str, str, str]
+
+# Metadata-only read used to revalidate a cached session
+_REVISION_ONLY = GetSessionConfig(num_recent_events=0)
+
+
+def _is_full_read(config: Optional[GetSessionConfig]) -> bool:
+    return config is None or (config.num_recent_events is None and not config.after_timestamp)
+
+
+def _copy_session(session: Session, config: Optional[GetSessionConfig] = None) -> Session:
+    """A copy with its own event list and state, filtered like the database would."""
+    events = session.events
+    if config is not None:
+        if config.after_timestamp:
+            events = [event for event in events if event.timestamp >= config.after_timestamp]
+        if config.num_recent_events is not None:
+            events = events[-config.num_recent_events:] if config.num_recent_events else []
+    return session.model_copy(update={"events": list(events), "state": copy.deepcopy(session.state)})
+
+
+class CachedSessionService(BaseSessionService):
+    """Session service that serves hot sessions from a bounded in-memory LRU."""
+
+    def __init__(self, backend: BaseSessionService, max_sessions: int, revalidate: bool = True):
+        self.backend = backend
+        self.max_sessions = max_sessions
+        self.revalidate = revalidate
+        self._sessions: "OrderedDict[SessionKey, Session]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def _put(self, key: SessionKey, session: Session) -> None:
+        self._sessions[key] = session
+        self._sessions.move_to_end(key)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evictions += 1
+
+    def _invalidate(self, key: SessionKey) -> None:
+        if self._sessions.pop(key, None) is not None:
+            self.invalidations += 1
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        session = await self.backend.create_session(
+            app_name=app_name, user_id=user_id, state=state, session_id=session_id
+        )
+        self._put((app_name, user_id, session.id), _copy_session(session))
+        return session
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        key = (app_name, user_id, session_id)
+        cached = self._sessions.get(key)
+
+        if cached is not None and self.revalidate:
+            self.revalidations += 1
+            current = await self.backend.get_session(
+                app_name=app_name, user_id=user_id, session_id=session_id, config=_REVISION_ONLY
+            )
+            if current is None:
+                self._invalidate(key)
+                return None
+            if current._storage_update_marker != cached._storage_update_marker:
+                # Appended to elsewhere since we cached it
+                self._invalidate(key)
+                cached = None
+            else:
+                # Same session revision; app and user state may still have changed through
+                # other sessions
+                cached.state = current.state
+
+        if cached is not None:
+            self.hits += 1
+            self._sessions.move_to_end(key)
+            return _copy_session(cached, config)
+
+        self.misses += 1
+        session = await self.backend.get_session(
+            app_name=app_name, user_id=user_id, session_id=session_id, config=config
+        )
+        # Only complete sessions are cached, and never over one cached while we were loading
+        if session is not None and _is_full_read(config) and key not in self._sessions:
+            self._put(key, _copy_session(session))
+        return session
+
+    async def list_sessions(self, *, app_name: str, user_id: Optional[str] = None) -> ListSessionsResponse:
+        return await self.backend.list_sessions(app_name=app_name, user_id=user_id)
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        self._invalidate((app_name, user_id, session_id))
+        await self.backend.delete_session(app_name=app_name, user_id=user_id, session_id=session_id)
+
+    async def get_user_state(self, *, app_name: str, user_id: str) -> Dict[str, Any]:
+        return await self.backend.get_user_state(app_name=app_name, user_id=user_id)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return await self.backend.append_event(session, event)
+
+        key = (session.app_name, session.user_id, session.id)
+        cached = self._sessions.get(key)
+        # Checked before the write: a batching backend may advance the cached revision itself
+        in_sync = cached is not None and cached._storage_update_marker == session._storage_update_marker
+        try:
+            event = await self.backend.append_event(session, event)
+        except StaleSessionError:
+            self._invalidate(key)
+            raise
+
+        cached = self._sessions.get(key)
+        if cached is not None:
+            if in_sync:
+                cached.events.append(event)
+                self._update_session_state(cached, event)
+                cached.last_update_time = session.last_update_time
+                cached._storage_update_marker = session._storage_update_marker
+            else:
+                # The caller's session and the cached one have diverged; reload next time
+                self._invalidate(key)
+        self._share_scoped_state(key, event)
+        return event
+
+    def revision_advanced(self, session: Session, previous: Optional[str]) -> None:
+        """
+        Called by a batching backend after it wrote buffered events of `session`.
+
+        The cached session already holds those events, so only its revision moves forward.
+        """
+        cached = self._sessions.get((session.app_name, session.user_id, session.id))
+        if cached is not None and cached._storage_update_marker == previous:
+            cached.last_update_time = session.last_update_time
+            cached._storage_update_marker = session._storage_update_marker
+
+    def write_failed(self, session: Session) -> None:
+        """Called by a batching backend when buffered events of `session` weren't written."""
+        # The cached copy holds those events; the next read goes to the database
+        self._invalidate((session.app_name, session.user_id, session.id))
+
+    def _share_scoped_state(self, key: SessionKey, event: Event) -> None:
+        """Apply app:/user: state changes to the other cached sessions of the app/user."""
+        delta = event.actions.state_delta if event.actions else None
+        if not delta:
+            return
+        app_delta = {k: v for k, v in delta.items() if k.startswith(State.APP_PREFIX)}
+        user_delta = {k: v for k, v in delta.items() if k.startswith(State.USER_PREFIX)}
+        if not app_delta and not user_delta:
+            return
+        app_name, user_id, _ = key
+        for other_key, other in self._sessions.items():
+            if other_key == key or other_key[0] != app_name:
+                continue
+            other.state.update(app_delta)
+            if other_key[1] == user_id:
+                other.state.update(user_delta)
+
+    async def flush(self) -> None:
+        await self.backend.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "revalidate": self.revalidate,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "revalidations": self.revalidations,
+            "invalidations": self.invalidations,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,241 @@
+"""
+Session database (Postgres via asyncpg) connection pool.
+
+ADK's DatabaseSessionService creates its SQLAlchemy engine with default pool settings,
+which under load opens connections in bursts against Neon. This module builds the engine
+arguments from SESSION_DB_* env vars (pool size, overflow, timeouts, recycle, statement
+caches, PgBouncer mode) and registers the session service factory for
+postgresql+asyncpg:// URIs, so the service's pool can be observed:
+
+- checked-out, idle and overflow connections,
+- checkouts currently waiting for a connection, and the time spent waiting.
+
+The service is put behind event batching (event_batching.py) unless SESSION_EVENT_BATCHING
+is off, and behind the session cache (session_cache.py) unless SESSION_CACHE_SIZE=0.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from uuid import uuid4
+
+from .config import (
+    SESSION_CACHE_REVALIDATE,
+    SESSION_CACHE_SIZE,
+    SESSION_DB_COMMAND_TIMEOUT,
+    SESSION_DB_CONNECT_TIMEOUT,
+    SESSION_DB_MAX_OVERFLOW,
+    SESSION_DB_PGBOUNCER,
+    SESSION_DB_POOL_PRE_PING,
+    SESSION_DB_POOL_RECYCLE,
+    SESSION_DB_POOL_SIZE,
+    SESSION_DB_POOL_TIMEOUT,
+    SESSION_DB_PREPARED_STATEMENTS,
+    SESSION_DB_SSL,
+    SESSION_DB_STATEMENT_CACHE_SIZE,
+    SESSION_EVENT_BATCH_MAX,
+    SESSION_EVENT_BATCHING,
+)
+
+logger = logging.getLogger(__name__)
+
+# URI scheme run_adk.py normalizes the session database URI to
+SESSION_DB_SCHEME = "postgresql+asyncpg"
+
+# SQLAlchemy is an optional dependency of google-adk (the "db" extra)
+try:
+    from sqlalchemy import text
+    from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+    from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
+except ModuleNotFoundError:
+    AsyncAdaptedQueuePool = None
+    NullPool = None
+
+# The database session service created by the registered factory (one per process),
+# and the event batching and cache layers in front of it
+_session_service = None
+_event_batcher = None
+_session_cache = None
+
+
+if AsyncAdaptedQueuePool is not None:
+
+    class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+        """Queue pool that also counts checkouts waiting for a connection and their wait time."""
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.waiting = 0
+            self.checkouts = 0
+            self.timeouts = 0
+            self.wait_seconds_total = 0.0
+            self.wait_seconds_max = 0.0
+
+        def _do_get(self):
+            start = time.perf_counter()
+            self.waiting += 1
+            try:
+                return super()._do_get()
+            except PoolTimeoutError:
+                self.timeouts += 1
+                raise
+            finally:
+                self.waiting -= 1
+                elapsed = time.perf_counter() - start
+                self.checkouts += 1
+                self.wait_seconds_total += elapsed
+                self.wait_seconds_max = max(self.wait_seconds_max, elapsed)
+
+
+def normalize_uri(uri: str) -> str:
+    """Convert to the asyncpg scheme and strip unsupported query args (sslmode/channel_binding)."""
+    if uri.startswith("postgresql://"):
+        uri = uri.replace("postgresql://", f"{SESSION_DB_SCHEME}://", 1)
+
+    parsed = urlsplit(uri)
+    qs = parse_qsl(parsed.query, keep_blank_values=True)
+    filtered = [(k, v) for (k, v) in qs if k.lower() not in {"sslmode", "channel_binding", "channelbinding"}]
+    return urlunsplit(parsed._replace(query=urlencode(filtered)))
+
+
+def _use_pgbouncer_mode(uri: str) -> bool:
+    if SESSION_DB_PGBOUNCER == "auto":
+        # Neon's pooled endpoints are PgBouncer in transaction mode
+        return "-pooler" in (urlsplit(uri).hostname or "")
+    return SESSION_DB_PGBOUNCER == "true"
+
+
+def engine_kwargs(uri: str) -> Dict[str, Any]:
+    """create_async_engine arguments for the session database, from the SESSION_DB_* settings."""
+    connect_args: Dict[str, Any] = {
+        "timeout": SESSION_DB_CONNECT_TIMEOUT,
+        "command_timeout": SESSION_DB_COMMAND_TIMEOUT,
+    }
+    if SESSION_DB_SSL:
+        connect_args["ssl"] = SESSION_DB_SSL
+
+    if _use_pgbouncer_mode(uri):
+        # A transaction-mode pooler hands each transaction to any server connection, so
+        # named statements prepared on one may be missing (or taken) on the next
+        connect_args["statement_cache_size"] = 0
+        connect_args["prepared_statement_cache_size"] = 0
+        connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid4()}__"
+    elif not SESSION_DB_PREPARED_STATEMENTS:
+        connect_args["statement_cache_size"] = 0
+        connect_args["prepared_statement_cache_size"] = 0
+    else:
+        connect_args["statement_cache_size"] = SESSION_DB_STATEMENT_CACHE_SIZE
+        connect_args["prepared_statement_cache_size"] = SESSION_DB_STATEMENT_CACHE_SIZE
+
+    kwargs: Dict[str, Any] = {"connect_args": connect_args, "pool_pre_ping": SESSION_DB_POOL_PRE_PING}
+    if SESSION_DB_POOL_SIZE <= 0:
+        kwargs["poolclass"] = NullPool
+    else:
+        kwargs.update(
+            poolclass=InstrumentedQueuePool,
+            pool_size=SESSION_DB_POOL_SIZE,
+            max_overflow=SESSION_DB_MAX_OVERFLOW,
+            pool_timeout=SESSION_DB_POOL_TIMEOUT,
+            pool_recycle=SESSION_DB_POOL_RECYCLE,
+        )
+    return kwargs
+
+
+def _create_session_service(uri: str, **kwargs: Any):
+    from google.adk.sessions.database_session_service import DatabaseSessionService
+
+    global _session_service, _event_batcher, _session_cache
+    kwargs.pop("agents_dir", None)
+    _session_service = DatabaseSessionService(db_url=uri, **kwargs)
+    engine = _session_service.db_engine
+    # Connections inherited from a preloading master belong to its process; a forked
+    # worker starts with an empty pool of its own
+    os.register_at_fork(after_in_child=lambda: engine.sync_engine.dispose(close=False))
+    logger.info(f"Session database pool: {engine.pool.status()}")
+
+    service = _session_service
+    if SESSION_EVENT_BATCHING:
+        from .event_batching import BatchingSessionService
+
+        _event_batcher = service = BatchingSessionService(service, SESSION_EVENT_BATCH_MAX)
+    if SESSION_CACHE_SIZE > 0:
+        from .session_cache import CachedSessionService
+
+        _session_cache = service = CachedSessionService(service, SESSION_CACHE_SIZE, SESSION_CACHE_REVALIDATE)
+        if _event_batcher is not None:
+            _event_batcher.on_flush = _session_cache.revision_advanced
+            _event_batcher.on_flush_failed = _session_cache.write_failed
+    return service
+
+
+def register_session_service() -> None:
+    """Have ADK create postgresql+asyncpg:// session services through this module."""
+    from google.adk.cli.service_registry import get_service_registry
+
+    get_service_registry().register_session_service(SESSION_DB_SCHEME, _create_session_service)
+
+
+def get_session_service():
+    """The database session service of this process, once ADK has created it."""
+    return _session_service
+
+
+def get_event_batcher():
+    """The event batching layer of this process, or None if it is disabled or not created yet."""
+    return _event_batcher
+
+
+def get_session_cache():
+    """The session cache of this process, or None if it is disabled or not created yet."""
+    return _session_cache
+
+
+async def prime_pool() -> Dict[str, Any]:
+    """
+    Create the session tables if needed and open the pool's connections ahead of traffic.
+
+    Returns the number of connections opened; raises if the database can't be reached.
+    """
+    if _session_service is None:
+        raise RuntimeError("The session service has not been created")
+    await _session_service.prepare_tables()
+
+    async def ping() -> None:
+        async with _session_service.db_engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    # Concurrent, so the pool opens (and keeps) that many connections
+    connections = max(1, SESSION_DB_POOL_SIZE)
+    await asyncio.gather(*(ping() for _ in range(connections)))
+    return {"connections": connections}
+
+
+def pool_stats() -> Optional[Dict[str, Any]]:
+    """Current pool statistics, or None before the session service exists."""
+    if _session_service is None:
+        return None
+    pool = _session_service.db_engine.pool
+    if NullPool is not None and isinstance(pool, NullPool):
+        return {"pooled": False}
+
+    stats: Dict[str, Any] = {
+        "pooled": True,
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(0, pool.overflow()),
+        "max_overflow": SESSION_DB_MAX_OVERFLOW,
+    }
+    if isinstance(pool, InstrumentedQueuePool):
+        stats.update(
+            waiting=pool.waiting,
+            checkouts=pool.checkouts,
+            timeouts=pool.timeouts,
+            wait_seconds_total=round(pool.wait_seconds_total, 6),
+            wait_ms_avg=round(pool.wait_seconds_total / pool.checkouts * 1000, 3) if pool.checkouts else 0.0,
+            wait_ms_max=round(pool.wait_seconds_max * 1000, 3),
+        )
+    return stats
@@ -0,0 +1,165 @@
+"""
+Startup profiler for the agent directory server.
+
+`python run_adk.py --profile-startup` builds the app in a child interpreter started with
+`-X importtime`, with every agent preloaded, and reports:
+
+- the time to import run_adk and to build the app,
+- each agent's construction time (its package import and root agent creation; shared
+  packages such as LiteLLM count towards the first agent that imports them),
+- the slowest module imports, by cumulative and by self time.
+
+The report is printed sorted; `--trace FILE` also writes it as JSON. With a budget
+(STARTUP_BUDGET_MS for the whole startup, STARTUP_AGENT_BUDGET_MS for each agent) the
+command exits with status 1 when it's exceeded, so CI can catch startup regressions.
+"""
+
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from .config import STARTUP_AGENT_BUDGET_MS, STARTUP_BUDGET_MS
+
+logger = logging.getLogger(__name__)
+
+# Prefix of the child's result line on stdout
+_RESULT_MARKER = "STARTUP_PROFILE "
+
+_IMPORTTIME_PREFIX = "import time:"
+
+
+def parse_importtime(text: str) -> List[Dict[str, Any]]:
+    """Module entries of `-X importtime` output, in the order their imports finished."""
+    modules = []
+    for line in text.splitlines():
+        if not line.startswith(_IMPORTTIME_PREFIX):
+            continue
+        fields = line[len(_IMPORTTIME_PREFIX):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # the header line
+        name = fields[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules.append(
+            {
+                "module": name.strip(),
+                "self_ms": int(fields[0]) / 1000,
+                "cumulative_ms": int(fields[1]) / 1000,
+                "depth": depth,
+            }
+        )
+    return modules
+
+
+def _measure() -> None:
+    """Child side: import run_adk and build the app with all agents preloaded."""
+    start = time.perf_counter()
+    import run_adk
+
+    imported = time.perf_counter()
+    app = run_adk.build_app()
+    built = time.perf_counter()
+
+    agent_loader = app.state.agent_loader
+    agents = {name: seconds * 1000 for name, seconds in agent_loader.load_seconds.items()}
+    result = {
+        "phases": {
+            "import_run_adk_ms": (imported - start) * 1000,
+            "build_app_ms": (built - imported) * 1000,
+        },
+        "total_ms": (built - start) * 1000,
+        "agents": agents,
+        "failed_agents": [name for name in agent_loader.list_agents() if name not in agents],
+    }
+    print(_RESULT_MARKER + json.dumps(result), flush=True)
+
+
+def profile(trace_path: Optional[str] = None, top: int = 25) -> Dict[str, Any]:
+    """Profile a startup in a child interpreter; returns the profile and prints its report."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    start = time.perf_counter()
+    child = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "adk_server.startup_profile"],
+        cwd=root,
+        env={**os.environ, "PRELOAD_AGENTS": "*"},
+        capture_output=True,
+        text=True,
+    )
+    process_ms = (time.perf_counter() - start) * 1000
+
+    result_lines = [line for line in child.stdout.splitlines() if line.startswith(_RESULT_MARKER)]
+    if child.returncode != 0 or not result_lines:
+        errors = "\n".join(line for line in child.stderr.splitlines() if not line.startswith(_IMPORTTIME_PREFIX))
+        raise RuntimeError(f"Startup profiling failed (exit status {child.returncode}):\n{errors}")
+
+    result = json.loads(result_lines[-1][len(_RESULT_MARKER):])
+    result["process_ms"] = process_ms
+    result["modules"] = parse_importtime(child.stderr)
+    result["budget_ms"] = STARTUP_BUDGET_MS
+    result["agent_budget_ms"] = STARTUP_AGENT_BUDGET_MS
+    result["over_budget"] = _over_budget(result)
+
+    print(format_report(result, top))
+    if trace_path:
+        with open(trace_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nTrace written to {trace_path}")
+    return result
+
+
+def _over_budget(result: Dict[str, Any]) -> List[str]:
+    """Descriptions of the budgets the profile exceeds."""
+    exceeded = []
+    if STARTUP_BUDGET_MS > 0 and result["total_ms"] > STARTUP_BUDGET_MS:
+        exceeded.append(f"startup {result['total_ms']:.0f} ms > {STARTUP_BUDGET_MS:.0f} ms")
+    if STARTUP_AGENT_BUDGET_MS > 0:
+        for name, ms in sorted(result["agents"].items()):
+            if ms > STARTUP_AGENT_BUDGET_MS:
+                exceeded.append(f"agent {name} {ms:.0f} ms > {STARTUP_AGENT_BUDGET_MS:.0f} ms")
+    return exceeded
+
+
+def format_report(result: Dict[str, Any], top: int = 25) -> str:
+    lines = [
+        f"Startup: {result['total_ms']:.0f} ms "
+        f"(import run_adk {result['phases']['import_run_adk_ms']:.0f} ms, "
+        f"build_app {result['phases']['build_app_ms']:.0f} ms; "
+        f"process {result['process_ms']:.0f} ms)",
+        "",
+        "Agents (import + construction):",
+    ]
+    for name, ms in sorted(result["agents"].items(), key=lambda item: -item[1]):
+        lines.append(f"  {ms:9.1f} ms  {name}")
+    for name in result["failed_agents"]:
+        lines.append(f"  {'failed':>12}  {name}")
+
+    modules = result["modules"]
+    lines += ["", f"Slowest imports, cumulative (top {top}):", f"  {'cumulative':>12}  {'self':>9}  module"]
+    for entry in sorted(modules, key=lambda m: -m["cumulative_ms"])[:top]:
+        lines.append(f"  {entry['cumulative_ms']:9.1f} ms  {entry['self_ms']:6.1f} ms  {entry['module']}")
+    lines += ["", f"Slowest imports, self (top {top}):"]
+    for entry in sorted(modules, key=lambda m: -m["self_ms"])[:top]:
+        lines.append(f"  {entry['self_ms']:9.1f} ms  {entry['module']}")
+
+    if result["over_budget"]:
+        lines += ["", "OVER BUDGET:"] + [f"  {item}" for item in result["over_budget"]]
+    elif result["budget_ms"] > 0 or result["agent_budget_ms"] > 0:
+        lines += ["", "Within budget."]
+    return "\n".join(lines)
+
+
+def main(trace_path: Optional[str] = None) -> int:
+    """Run the profiler; the exit status is 1 when an agent fails to load or a budget is exceeded."""
+    try:
+        result = profile(trace_path)
+    except RuntimeError as e:
+        logger.error(str(e))
+        return 2
+    return 1 if result["failed_agents"] or result["over_budget"] else 0
+
+
+if __name__ == "__main__":
+    _measure()
@@ -8,18 +8,20 @@ from google.adk.tools import load_artifacts
 
 ## config imports
 from .config.llm import FAST_MODEL
+from .config.config import IMAGE_JOB_MODE
 
 ## tools imports
 from .tools.image_generation import generate_image
+from .tools.image_jobs import get_image_job
 
 ## prompt imports
-from .prompt.prompt import prompt_v2
+from .prompt.prompt import prompt_v2, job_mode_instructions
 
 
 root_agent = LlmAgent(
     name="image_generation_agent",
     model=FAST_MODEL,
     description="AI assistant that generates images based on a prompt",
-    instruction=prompt_v2,
-    tools=[generate_image, load_artifacts],
+    instruction=prompt_v2 + job_mode_instructions if IMAGE_JOB_MODE else prompt_v2,
+    tools=[generate_image, get_image_job, load_artifacts] if IMAGE_JOB_MODE else [generate_image, load_artifacts],
 )
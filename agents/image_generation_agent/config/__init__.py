@@ -1,3 +1,27 @@
 from .utils import get_current_date
 from .llm import *
 from .config import EXA_API_KEY, DEFAULT_SEARCH_RESULTS_LIMIT
+from .config import (
+    IMAGE_POSTPROCESSING_ENABLED,
+    IMAGE_POSTPROCESSING_WORKERS,
+    IMAGE_THUMBNAIL_SIZE,
+    IMAGE_THUMBNAIL_QUALITY,
+    IMAGE_PREVIEW_MAX_SIZE,
+    IMAGE_PREVIEW_QUALITY,
+    IMAGE_RENDITION_FORMAT,
+    ARTIFACT_SAVE_CONCURRENCY,
+    IMAGE_SAVER_DEBUG,
+    IMAGE_GENERATION_TIMEOUT_SECONDS,
+    IMAGE_JOB_MODE,
+    IMAGE_JOB_WORKERS,
+    IMAGE_JOB_QUEUE_SIZE,
+    IMAGE_JOB_DB_PATH,
+    IMAGE_JOB_MAX_WAIT_SECONDS,
+    IMAGE_JOB_RETENTION_SECONDS,
+    WEB_CONCURRENCY,
+    IMAGE_SCHEDULER_MAX_CONCURRENCY,
+    IMAGE_SCHEDULER_MAX_PER_SESSION,
+    IMAGE_SCHEDULER_MAX_PER_USER,
+    IMAGE_SCHEDULER_DEFAULT_PRIORITY,
+    IMAGE_SCHEDULER_MAX_WAIT_SECONDS,
+)
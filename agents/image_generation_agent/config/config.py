@@ -11,4 +11,45 @@ load_dotenv()
 EXA_API_KEY = os.environ.get("EXA_API_KEY")
 
 # Search settings
-DEFAULT_SEARCH_RESULTS_LIMIT = 5
\ No newline at end of file
+DEFAULT_SEARCH_RESULTS_LIMIT = 5
+
+# Image post-processing settings (thumbnails and size-optimized renditions)
+IMAGE_POSTPROCESSING_ENABLED = os.environ.get("IMAGE_POSTPROCESSING_ENABLED", "true").lower() == "true"
+IMAGE_POSTPROCESSING_WORKERS = int(os.environ.get("IMAGE_POSTPROCESSING_WORKERS", "2"))
+IMAGE_THUMBNAIL_SIZE = int(os.environ.get("IMAGE_THUMBNAIL_SIZE", "256"))
+IMAGE_THUMBNAIL_QUALITY = int(os.environ.get("IMAGE_THUMBNAIL_QUALITY", "70"))
+IMAGE_PREVIEW_MAX_SIZE = int(os.environ.get("IMAGE_PREVIEW_MAX_SIZE", "1024"))
+IMAGE_PREVIEW_QUALITY = int(os.environ.get("IMAGE_PREVIEW_QUALITY", "82"))
+# Output format for the renditions: "webp" or "jpeg"
+IMAGE_RENDITION_FORMAT = os.environ.get("IMAGE_RENDITION_FORMAT", "webp").lower()
+
+# Artifact settings: maximum concurrent saves when storing a batch of artifacts
+ARTIFACT_SAVE_CONCURRENCY = int(os.environ.get("ARTIFACT_SAVE_CONCURRENCY", "4"))
+
+# Callback settings: log the full model response structure in after_model_callback (expensive)
+IMAGE_SAVER_DEBUG = os.environ.get("IMAGE_SAVER_DEBUG", "false").lower() == "true"
+
+# Image generation settings
+IMAGE_GENERATION_TIMEOUT_SECONDS = int(os.environ.get("IMAGE_GENERATION_TIMEOUT_SECONDS", "120"))
+
+# Image job queue settings: generate_image enqueues a job and returns a job id instead of waiting
+IMAGE_JOB_MODE = os.environ.get("IMAGE_JOB_MODE", "false").lower() == "true"
+IMAGE_JOB_WORKERS = int(os.environ.get("IMAGE_JOB_WORKERS", "4"))
+IMAGE_JOB_QUEUE_SIZE = int(os.environ.get("IMAGE_JOB_QUEUE_SIZE", "100"))
+# Optional SQLite file so queued and finished jobs survive a restart (in-memory only if unset)
+IMAGE_JOB_DB_PATH = os.environ.get("IMAGE_JOB_DB_PATH")
+# Upper bound for how long get_image_job waits for a job in a single call (0 = answer at once)
+IMAGE_JOB_MAX_WAIT_SECONDS = int(os.environ.get("IMAGE_JOB_MAX_WAIT_SECONDS", "0"))
+# Finished jobs (and their image bytes, if never collected) are forgotten after this long
+IMAGE_JOB_RETENTION_SECONDS = int(os.environ.get("IMAGE_JOB_RETENTION_SECONDS", "3600"))
+# Server worker processes (see the server README); job mode keeps its queue in one process
+WEB_CONCURRENCY = os.environ.get("WEB_CONCURRENCY", "1")
+
+# Upstream generation scheduler: global concurrency budget for OpenRouter, shared fairly across sessions
+IMAGE_SCHEDULER_MAX_CONCURRENCY = int(os.environ.get("IMAGE_SCHEDULER_MAX_CONCURRENCY", "8"))
+IMAGE_SCHEDULER_MAX_PER_SESSION = int(os.environ.get("IMAGE_SCHEDULER_MAX_PER_SESSION", "2"))
+IMAGE_SCHEDULER_MAX_PER_USER = int(os.environ.get("IMAGE_SCHEDULER_MAX_PER_USER", "4"))
+# Priority lane used when the session state doesn't set one: "high", "normal" or "low"
+IMAGE_SCHEDULER_DEFAULT_PRIORITY = os.environ.get("IMAGE_SCHEDULER_DEFAULT_PRIORITY", "normal").lower()
+# Maximum time a request waits for a slot before it is rejected as busy (0 = wait indefinitely)
+IMAGE_SCHEDULER_MAX_WAIT_SECONDS = int(os.environ.get("IMAGE_SCHEDULER_MAX_WAIT_SECONDS", "300"))
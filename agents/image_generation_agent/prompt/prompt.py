@@ -86,6 +86,17 @@ I am now generating the image for you..."
 - You are proactive—if a request is vague, you make "best-practice" artistic choices based on the detected vertical.
 """
 
+# Appended to the active prompt when IMAGE_JOB_MODE is enabled
+job_mode_instructions = """
+## 7. JOB MODE
+
+- `generate_image` does not wait for the image. It returns `status: "queued"` and a `job_id`.
+- Tell the user the image is being generated and end your turn. Keep the `job_id` in your reply.
+- On the user's next message, call **get_image_job** once with the `job_id`.
+- If it returns `queued` or `running`, tell the user it is still in progress. Do not call it again in the same turn.
+- When it returns `success`, the images have been saved as artifacts; describe them as usual.
+"""
+
 prompt_v1 = """
 You are an AI assistant that generates high-quality images by converting user requests into structured JSON prompts.
 
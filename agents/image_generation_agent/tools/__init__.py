@@ -5,8 +5,12 @@ Image Agent Tools package.
 # Image generation tool
 from .image_generation import generate_image
 
+# Image job queue (job mode)
+from .image_jobs import get_image_job
 
 __all__ = [
     # Image generation
     "generate_image",
+    # Image job queue
+    "get_image_job",
 ]
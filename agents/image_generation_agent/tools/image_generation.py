@@ -2,16 +2,23 @@
 Image generation tool that directly calls OpenRouter API with proper modalities parameter.
 """
 
+import asyncio
 import logging
 import os
 import base64
 import re
-from typing import Dict, Any, Optional, TypedDict
+import time
+from typing import Dict, Any, List, Optional, Tuple, TypedDict
 import aiohttp
 from google.adk.tools import FunctionTool
 from google.adk.tools.tool_context import ToolContext
 import google.genai.types as types
 
+from ..config import IMAGE_GENERATION_TIMEOUT_SECONDS, IMAGE_JOB_MODE
+from ..utils.artifact_saver import save_artifacts_batch
+from ..utils.image_postprocessing import postprocess_image, rendition_filename
+from ..utils.generation_scheduler import SchedulerBusyError, generation_scheduler, scheduling_hints
+
 logger = logging.getLogger(__name__)
 
 # OpenRouter API endpoint
@@ -24,6 +31,234 @@ class ImageData(TypedDict):
     size_bytes: int
 
 
+async def request_images(
+    prompt: str,
+    aspect_ratio: Optional[str] = "1:1",
+    session_id: Optional[str] = None,
+    user_id: Optional[str] = None,
+    priority: str = "normal",
+    weight: float = 1.0,
+) -> Dict[str, Any]:
+    """
+    Call OpenRouter's image generation API and decode the returned images.
+
+    The upstream call runs under the generation scheduler, which shares OpenRouter
+    concurrency fairly across sessions and users.
+
+    Args:
+        prompt: Text description of the image to generate
+        aspect_ratio: Image aspect ratio (default: "1:1")
+        session_id: Requesting session, used for fair scheduling
+        user_id: Requesting user, used for per-user limits
+        priority: Scheduler lane: "high", "normal" or "low"
+        weight: Fair-share weight of the session within its lane
+
+    Returns:
+        Dict with status, decoded "images" (list of ImageData), "text_response" and
+        per-stage "timings_ms" ("scheduler_wait" is time spent waiting for a slot);
+        or an error dict with status and message
+    """
+    api_key = os.getenv("OPENROUTER_API_KEY")
+    if not api_key:
+        return {"status": "error", "message": "OPENROUTER_API_KEY environment variable not set"}
+
+    # Prepare the request payload
+    payload = {
+        "model": "google/gemini-2.5-flash-image-preview",
+        "messages": [{"role": "user", "content": prompt}],
+        "modalities": ["image", "text"],  # Required for image generation
+        "image_config": {"aspect_ratio": aspect_ratio},
+    }
+
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
+        "HTTP-Referer": "https://github.com/google/adk",  # Optional but recommended
+        "X-Title": "ADK Image Agent",  # Optional but recommended
+    }
+
+    logger.info(f"Calling OpenRouter API for image generation: {prompt[:50]}...")
+
+    # Per-stage timings exposed in the tool result
+    timings_ms: Dict[str, float] = {}
+
+    # Make the API call once the scheduler grants a slot
+    try:
+        async with generation_scheduler.slot(session_id, user_id, priority, weight) as slot:
+            timings_ms["scheduler_wait"] = slot.wait_ms
+            stage_start = time.perf_counter()
+            async with aiohttp.ClientSession() as session:
+                async with session.post(
+                    f"{OPENROUTER_API_BASE}/chat/completions",
+                    headers=headers,
+                    json=payload,
+                    timeout=aiohttp.ClientTimeout(total=IMAGE_GENERATION_TIMEOUT_SECONDS),
+                ) as response:
+                    if response.status != 200:
+                        error_text = await response.text()
+                        logger.error(f"OpenRouter API error {response.status}: {error_text}")
+                        return {
+                            "status": "error",
+                            "message": f"OpenRouter API error: {response.status} - {error_text}",
+                        }
+
+                    result = await response.json()
+            timings_ms["upstream_request"] = (time.perf_counter() - stage_start) * 1000
+    except SchedulerBusyError as e:
+        logger.warning(f"Image generation rejected for session {session_id}: {e}")
+        return {"status": "error", "message": f"{e}. Please try again in a moment."}
+    except asyncio.TimeoutError:
+        logger.error(f"OpenRouter image generation timed out after {IMAGE_GENERATION_TIMEOUT_SECONDS}s")
+        return {
+            "status": "error",
+            "message": f"Image generation timed out after {IMAGE_GENERATION_TIMEOUT_SECONDS} seconds",
+        }
+
+    # Extract images from the response
+    stage_start = time.perf_counter()
+    images: list[ImageData] = []
+    message = {}
+    if result.get("choices"):
+        message = result["choices"][0].get("message", {})
+        if message.get("images"):
+            for img in message["images"]:
+                image_url = img.get("image_url", {}).get("url", "")
+                if image_url.startswith("data:image/"):
+                    # Extract base64 data
+                    parts = image_url.split(",", 1)
+                    if len(parts) == 2:
+                        mime_part = parts[0]  # data:image/png;base64
+                        base64_data = parts[1]
+
+                        # Extract MIME type
+                        mime_match = re.search(r"data:image/([^;]+)", mime_part)
+                        mime_type = (
+                            f"image/{mime_match.group(1)}" if mime_match else "image/png"
+                        )
+
+                        # Decode base64
+                        image_bytes = base64.b64decode(base64_data)
+
+                        images.append(
+                            {
+                                "mime_type": mime_type,
+                                "data": image_bytes,
+                                "size_bytes": len(image_bytes),
+                            }
+                        )
+    timings_ms["decode"] = (time.perf_counter() - stage_start) * 1000
+
+    text_content = message.get("content", "") or ""
+    if not images:
+        logger.warning(f"No images found in response. Text content: {text_content[:100]}")
+        return {
+            "status": "error",
+            "message": "No images generated. The model may not have generated images.",
+            "text_response": text_content,
+        }
+
+    return {
+        "status": "success",
+        "images": images,
+        "text_response": text_content,
+        "timings_ms": timings_ms,
+    }
+
+
+async def save_generated_images(
+    tool_context: ToolContext,
+    images: List[ImageData],
+    timings_ms: Dict[str, float],
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Post-process images and save them (and their renditions) as artifacts.
+
+    Args:
+        tool_context: Tool context used to save the artifacts
+        images: Decoded images returned by request_images
+        timings_ms: Timings dict, updated in place with the "postprocess" and
+            "save_artifacts" stages
+
+    Returns:
+        Tuple of (saved_artifacts, failed_artifacts)
+    """
+    # Render thumbnails and size-optimized renditions off the event loop
+    stage_start = time.perf_counter()
+    postprocessed = await asyncio.gather(*(postprocess_image(img["data"]) for img in images))
+    timings_ms["postprocess"] = (time.perf_counter() - stage_start) * 1000
+
+    # Save images (and their renditions) as artifacts in one concurrent batch
+    stage_start = time.perf_counter()
+    ext_map = {
+        "image/png": "png",
+        "image/jpeg": "jpg",
+        "image/jpg": "jpg",
+        "image/webp": "webp",
+        "image/gif": "gif",
+    }
+
+    # Filenames are fixed up front so they don't depend on save completion order
+    batch = []
+    batch_info = []
+    for idx, img_data in enumerate(images):
+        ext = ext_map.get(img_data["mime_type"], "png")
+        filename = f"generated_image_{idx + 1}.{ext}"
+        batch.append(
+            (filename, types.Part.from_bytes(data=img_data["data"], mime_type=img_data["mime_type"]))
+        )
+        batch_info.append(
+            {
+                "image_index": idx,
+                "mime_type": img_data["mime_type"],
+                "size_bytes": img_data["size_bytes"],
+            }
+        )
+
+        for rendition in (postprocessed[idx] or {}).get("renditions", []):
+            rendition_name = rendition_filename(filename, rendition["variant"], rendition["extension"])
+            batch.append(
+                (rendition_name, types.Part.from_bytes(data=rendition["data"], mime_type=rendition["mime_type"]))
+            )
+            batch_info.append(
+                {
+                    "image_index": idx,
+                    "variant": rendition["variant"],
+                    "mime_type": rendition["mime_type"],
+                    "width": rendition["width"],
+                    "height": rendition["height"],
+                    "size_bytes": rendition["size_bytes"],
+                }
+            )
+
+    save_results = await save_artifacts_batch(tool_context, batch)
+
+    saved_artifacts = []
+    failed_artifacts = []
+    originals: Dict[int, Dict[str, Any]] = {}
+    renditions: Dict[int, list] = {}
+    for info, saved in zip(batch_info, save_results):
+        if saved["status"] != "success":
+            failed_artifacts.append({"filename": saved["filename"], "error": saved["error"]})
+            continue
+        idx = info.pop("image_index")
+        entry = {"filename": saved["filename"], "version": saved["version"], **info}
+        if "variant" in info:
+            renditions.setdefault(idx, []).append(entry)
+        else:
+            originals[idx] = entry
+        logger.info(f"Saved image artifact: {saved['filename']} (version {saved['version']})")
+
+    for idx in sorted(originals):
+        artifact_info = originals[idx]
+        artifact_info["renditions"] = renditions.get(idx, [])
+        if postprocessed[idx]:
+            artifact_info["postprocessing_timings_ms"] = postprocessed[idx]["timings_ms"]
+        saved_artifacts.append(artifact_info)
+    timings_ms["save_artifacts"] = (time.perf_counter() - stage_start) * 1000
+
+    return saved_artifacts, failed_artifacts
+
+
 async def generate_image_tool(
     prompt: str,
     aspect_ratio: Optional[str] = "1:1",
@@ -35,6 +270,9 @@ async def generate_image_tool(
     This tool directly calls OpenRouter's API with the proper modalities parameter,
     bypassing ADK/LiteLLM to ensure images are returned correctly.
 
+    In job mode (IMAGE_JOB_MODE=true) the generation is queued instead and the tool
+    returns a job id right away; use get_image_job to collect the result.
+
     Args:
         prompt: Text description of the image to generate
         aspect_ratio: Image aspect ratio (default: "1:1")
@@ -45,128 +283,40 @@ async def generate_image_tool(
         Dict with status, image data, and artifact information
     """
     try:
-        api_key = os.getenv("OPENROUTER_API_KEY")
-        if not api_key:
-            return {"status": "error", "message": "OPENROUTER_API_KEY environment variable not set"}
-
-        # Prepare the request payload
-        payload = {
-            "model": "google/gemini-2.5-flash-image-preview",
-            "messages": [{"role": "user", "content": prompt}],
-            "modalities": ["image", "text"],  # Required for image generation
-            "image_config": {"aspect_ratio": aspect_ratio},
-        }
+        if IMAGE_JOB_MODE:
+            # Imported here: the job queue module builds on this one
+            from .image_jobs import submit_image_job
 
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json",
-            "HTTP-Referer": "https://github.com/google/adk",  # Optional but recommended
-            "X-Title": "ADK Image Agent",  # Optional but recommended
-        }
+            return await submit_image_job(prompt, aspect_ratio, tool_context)
 
-        logger.info(f"Calling OpenRouter API for image generation: {prompt[:50]}...")
-
-        # Make the API call
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{OPENROUTER_API_BASE}/chat/completions", headers=headers, json=payload
-            ) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    logger.error(f"OpenRouter API error {response.status}: {error_text}")
-                    return {
-                        "status": "error",
-                        "message": f"OpenRouter API error: {response.status} - {error_text}",
-                    }
-
-                result = await response.json()
-
-        # Extract images from the response
-        images: list[ImageData] = []
-        if result.get("choices"):
-            message = result["choices"][0].get("message", {})
-            if message.get("images"):
-                for img in message["images"]:
-                    image_url = img.get("image_url", {}).get("url", "")
-                    if image_url.startswith("data:image/"):
-                        # Extract base64 data
-                        parts = image_url.split(",", 1)
-                        if len(parts) == 2:
-                            mime_part = parts[0]  # data:image/png;base64
-                            base64_data = parts[1]
-
-                            # Extract MIME type
-                            mime_match = re.search(r"data:image/([^;]+)", mime_part)
-                            mime_type = (
-                                f"image/{mime_match.group(1)}" if mime_match else "image/png"
-                            )
-
-                            # Decode base64
-                            image_bytes = base64.b64decode(base64_data)
-
-                            images.append(
-                                {
-                                    "mime_type": mime_type,
-                                    "data": image_bytes,
-                                    "size_bytes": len(image_bytes),
-                                }
-                            )
-
-        if not images:
-            # Check if there's text response
-            text_content = message.get("content", "")
-            logger.warning(f"No images found in response. Text content: {text_content[:100]}")
-            return {
-                "status": "error",
-                "message": "No images generated. The model may not have generated images.",
-                "text_response": text_content,
-            }
+        priority, weight = scheduling_hints(tool_context.state if tool_context else None)
+        result = await request_images(
+            prompt,
+            aspect_ratio,
+            session_id=tool_context.session.id if tool_context else None,
+            user_id=tool_context.user_id if tool_context else None,
+            priority=priority,
+            weight=weight,
+        )
+        if result["status"] != "success":
+            return result
+
+        images = result["images"]
+        timings_ms = result["timings_ms"]
 
-        # Save images as artifacts
         saved_artifacts = []
+        failed_artifacts = []
         if tool_context:
-            for idx, img_data in enumerate(images):
-                try:
-                    # Create Part from bytes
-                    image_part = types.Part.from_bytes(
-                        data=img_data["data"], mime_type=img_data["mime_type"]
-                    )
-
-                    # Determine file extension
-                    ext_map = {
-                        "image/png": "png",
-                        "image/jpeg": "jpg",
-                        "image/jpg": "jpg",
-                        "image/webp": "webp",
-                        "image/gif": "gif",
-                    }
-                    ext = ext_map.get(img_data["mime_type"], "png")
-                    filename = f"generated_image_{idx + 1}.{ext}"
-
-                    # Save artifact
-                    version = await tool_context.save_artifact(
-                        filename=filename, artifact=image_part
-                    )
-
-                    saved_artifacts.append(
-                        {
-                            "filename": filename,
-                            "version": version,
-                            "mime_type": img_data["mime_type"],
-                            "size_bytes": img_data["size_bytes"],
-                        }
-                    )
-
-                    logger.info(f"Saved image artifact: {filename} (version {version})")
-                except Exception as e:
-                    logger.error(f"Error saving image artifact: {e}", exc_info=True)
+            saved_artifacts, failed_artifacts = await save_generated_images(tool_context, images, timings_ms)
 
         return {
             "status": "success",
             "message": f"Generated {len(images)} image(s)",
             "images_count": len(images),
             "artifacts": saved_artifacts,
-            "text_response": message.get("content", ""),
+            "failed_artifacts": failed_artifacts,
+            "text_response": result["text_response"],
+            "timings_ms": timings_ms,
         }
 
     except Exception as e:
@@ -0,0 +1,509 @@
+"""
+Asynchronous image job queue.
+
+Image generation can take tens of seconds upstream. In job mode, generate_image only
+enqueues the request and returns a job id; a bounded pool of in-process workers calls
+OpenRouter in the background, and get_image_job reports progress and saves the
+finished images into the session. get_image_job answers at once by default, so the
+agent turn (and the HTTP request) ends while the image is generated; the agent checks
+the job again on the user's next message.
+
+Finished jobs are forgotten after IMAGE_JOB_RETENTION_SECONDS, whether their images
+were collected or not. Jobs can optionally be persisted to a local SQLite file
+(IMAGE_JOB_DB_PATH) so queued and finished jobs survive a restart.
+
+The queue lives in one process: with several server workers (WEB_CONCURRENCY > 1) a
+poll may reach a worker that doesn't know the job, so job mode needs a single worker.
+Clients can follow a job without an agent turn through run_adk.py's image job route
+(ImageJobQueue.status), which reads the SQLite store when IMAGE_JOB_DB_PATH is set.
+"""
+
+import asyncio
+import base64
+import json
+import logging
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from google.adk.tools import FunctionTool
+from google.adk.tools.tool_context import ToolContext
+
+from ..config import (
+    IMAGE_JOB_WORKERS,
+    IMAGE_JOB_QUEUE_SIZE,
+    IMAGE_JOB_DB_PATH,
+    IMAGE_JOB_MAX_WAIT_SECONDS,
+    IMAGE_JOB_RETENTION_SECONDS,
+    WEB_CONCURRENCY,
+)
+from ..utils.generation_scheduler import scheduling_hints
+from .image_generation import request_images, save_generated_images
+
+logger = logging.getLogger(__name__)
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+DELIVERED = "delivered"
+
+FINISHED_STATES = {SUCCEEDED, FAILED, DELIVERED}
+
+
+class ImageJobStore:
+    """Minimal SQLite persistence for image jobs (blocking; called through a thread)."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS image_jobs (
+                    job_id TEXT PRIMARY KEY,
+                    session_id TEXT,
+                    user_id TEXT,
+                    status TEXT NOT NULL,
+                    request TEXT NOT NULL,
+                    result TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """A connection that commits on success and is always closed."""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def save(self, job: Dict[str, Any]) -> None:
+        result = job.get("result")
+        if result and result.get("images"):
+            # Image bytes are stored base64-encoded inside the JSON result
+            result = {
+                **result,
+                "images": [
+                    {**img, "data": base64.b64encode(img["data"]).decode("ascii")}
+                    for img in result["images"]
+                ],
+            }
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO image_jobs
+                    (job_id, session_id, user_id, status, request, result, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    job["job_id"],
+                    job["session_id"],
+                    job["user_id"],
+                    job["status"],
+                    json.dumps(job["request"]),
+                    json.dumps(result) if result is not None else None,
+                    job["created_at"],
+                    time.time(),
+                ),
+            )
+
+    def load_all(self) -> List[Dict[str, Any]]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT job_id, session_id, user_id, status, request, result, created_at, updated_at FROM image_jobs"
+            ).fetchall()
+
+        jobs = []
+        for job_id, session_id, user_id, status, request, result, created_at, updated_at in rows:
+            result = json.loads(result) if result else None
+            if result and result.get("images"):
+                for img in result["images"]:
+                    img["data"] = base64.b64decode(img["data"])
+            job = {
+                "job_id": job_id,
+                "session_id": session_id,
+                "user_id": user_id,
+                "status": status,
+                "request": json.loads(request),
+                "result": result,
+                "created_at": created_at,
+            }
+            if status in FINISHED_STATES:
+                job["finished_at"] = updated_at
+            jobs.append(job)
+        return jobs
+
+    def get_summary(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """One job without its image bytes (for status checks from any server process)."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT session_id, user_id, status, result, created_at, updated_at FROM image_jobs WHERE job_id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        session_id, user_id, status, result, created_at, updated_at = row
+        job = {
+            "job_id": job_id,
+            "session_id": session_id,
+            "user_id": user_id,
+            "status": status,
+            "result": json.loads(result) if result else None,
+            "created_at": created_at,
+        }
+        if status in FINISHED_STATES:
+            job["finished_at"] = updated_at
+        return job
+
+    def delete_finished_before(self, cutoff: float) -> int:
+        placeholders = ", ".join("?" for _ in FINISHED_STATES)
+        with self._connect() as conn:
+            return conn.execute(
+                f"DELETE FROM image_jobs WHERE status IN ({placeholders}) AND updated_at < ?",
+                (*sorted(FINISHED_STATES), cutoff),
+            ).rowcount
+
+
+class ImageJobQueue:
+    """Bounded in-process queue with a fixed pool of generation workers."""
+
+    def __init__(
+        self,
+        max_workers: int,
+        max_queue_size: int,
+        db_path: Optional[str] = None,
+        retention_seconds: float = IMAGE_JOB_RETENTION_SECONDS,
+    ):
+        self.max_workers = max(1, max_workers)
+        self.max_queue_size = max(1, max_queue_size)
+        self.retention_seconds = retention_seconds
+        self.store = ImageJobStore(db_path) if db_path else None
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._done_events: Dict[str, asyncio.Event] = {}
+        self._delivery_locks: Dict[str, asyncio.Lock] = {}
+        self._start_lock: Optional[asyncio.Lock] = None
+
+    async def _ensure_started(self) -> None:
+        """Start the workers on the running loop and restore persisted jobs."""
+        if self._workers:
+            return
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._workers:
+                return
+            # The bound is enforced in submit(); restored jobs are always re-queued
+            self._queue = asyncio.Queue()
+
+            if self.store:
+                for job in await asyncio.to_thread(self.store.load_all):
+                    self.jobs[job["job_id"]] = job
+                    if job["status"] in (QUEUED, RUNNING):
+                        # Interrupted by a restart: run it again
+                        job["status"] = QUEUED
+                        self._done_events[job["job_id"]] = asyncio.Event()
+                        self._queue.put_nowait(job["job_id"])
+                    else:
+                        event = asyncio.Event()
+                        event.set()
+                        self._done_events[job["job_id"]] = event
+
+            self._workers = [
+                asyncio.create_task(self._worker(i), name=f"image-job-worker-{i}")
+                for i in range(self.max_workers)
+            ]
+            logger.info(f"Started {self.max_workers} image job worker(s)")
+            if WEB_CONCURRENCY != "1":
+                logger.warning(
+                    f"Image job mode keeps jobs in one process, but WEB_CONCURRENCY={WEB_CONCURRENCY}: "
+                    "polls that reach another worker won't find their job"
+                )
+
+    async def _evict_expired(self) -> None:
+        """Forget finished jobs older than the retention period, with their image bytes."""
+        cutoff = time.time() - self.retention_seconds
+        expired = [
+            job_id
+            for job_id, job in self.jobs.items()
+            if job["status"] in FINISHED_STATES and job.get("finished_at", job["created_at"]) < cutoff
+        ]
+        for job_id in expired:
+            del self.jobs[job_id]
+            self._done_events.pop(job_id, None)
+            self._delivery_locks.pop(job_id, None)
+        if expired:
+            logger.info(f"Evicted {len(expired)} finished image job(s)")
+            if self.store:
+                try:
+                    await asyncio.to_thread(self.store.delete_finished_before, cutoff)
+                except Exception as e:
+                    logger.error(f"Failed to delete expired image jobs: {e}", exc_info=True)
+
+    async def _persist(self, job: Dict[str, Any]) -> None:
+        if self.store:
+            try:
+                await asyncio.to_thread(self.store.save, job)
+            except Exception as e:
+                logger.error(f"Failed to persist image job {job['job_id']}: {e}", exc_info=True)
+
+    async def submit(
+        self,
+        prompt: str,
+        aspect_ratio: Optional[str],
+        session_id: Optional[str],
+        user_id: Optional[str],
+        priority: str = "normal",
+        weight: float = 1.0,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Enqueue a generation job.
+
+        Returns:
+            The job dict, or None if the queue is full
+        """
+        await self._ensure_started()
+        await self._evict_expired()
+        if self._queue.qsize() >= self.max_queue_size:
+            return None
+
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "session_id": session_id,
+            "user_id": user_id,
+            "status": QUEUED,
+            "request": {
+                "prompt": prompt,
+                "aspect_ratio": aspect_ratio,
+                "priority": priority,
+                "weight": weight,
+            },
+            "result": None,
+            "created_at": time.time(),
+        }
+        self.jobs[job["job_id"]] = job
+        self._done_events[job["job_id"]] = asyncio.Event()
+        await self._persist(job)
+        self._queue.put_nowait(job["job_id"])
+        return job
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """Wait up to `timeout` seconds for a job to finish and return it."""
+        await self._ensure_started()
+        await self._evict_expired()
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        if timeout > 0 and job["status"] not in FINISHED_STATES:
+            try:
+                await asyncio.wait_for(self._done_events[job_id].wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+        return job
+
+    async def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Status of a job for clients (the /image-jobs route), without image bytes.
+
+        Read from the SQLite store when there is one, so any server process can answer;
+        otherwise from this process's jobs.
+        """
+        if self.store:
+            job = await asyncio.to_thread(self.store.get_summary, job_id)
+        else:
+            job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        result = job.get("result") or {}
+        summary = {
+            "job_id": job_id,
+            "session_id": job["session_id"],
+            "user_id": job["user_id"],
+            "status": job["status"],
+            "created_at": job["created_at"],
+            "finished_at": job.get("finished_at"),
+        }
+        if job["status"] == SUCCEEDED:
+            summary["images_count"] = len(result.get("images") or [])
+            summary["message"] = "Images are ready; they are saved to the session on the next message."
+        elif job["status"] == DELIVERED:
+            summary["images_count"] = result.get("images_count", 0)
+            summary["artifacts"] = result.get("artifacts", [])
+        elif job["status"] == FAILED:
+            summary["message"] = result.get("message")
+        return summary
+
+    def delivery_lock(self, job_id: str) -> asyncio.Lock:
+        """Lock that keeps concurrent polls from saving the same job's images twice."""
+        return self._delivery_locks.setdefault(job_id, asyncio.Lock())
+
+    async def mark_delivered(self, job: Dict[str, Any], delivery: Dict[str, Any]) -> None:
+        """Drop the image bytes once they are saved as artifacts and keep the summary."""
+        job["status"] = DELIVERED
+        job["result"] = {**delivery, "images": []}
+        self._delivery_locks.pop(job["job_id"], None)
+        await self._persist(job)
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    async def _worker(self, worker_id: int) -> None:
+        while True:
+            job_id = await self._queue.get()
+            job = self.jobs.get(job_id)
+            try:
+                if job is None or job["status"] != QUEUED:
+                    continue
+                job["status"] = RUNNING
+                job["started_at"] = time.time()
+                await self._persist(job)
+
+                try:
+                    result = await request_images(
+                        **job["request"],
+                        session_id=job["session_id"],
+                        user_id=job["user_id"],
+                    )
+                except Exception as e:
+                    logger.error(f"Image job {job_id} failed: {e}", exc_info=True)
+                    result = {"status": "error", "message": f"Failed to generate image: {str(e)}"}
+
+                job["result"] = result
+                job["status"] = SUCCEEDED if result["status"] == "success" else FAILED
+                job["finished_at"] = time.time()
+                await self._persist(job)
+                logger.info(f"Image job {job_id} {job['status']} (worker {worker_id})")
+            finally:
+                event = self._done_events.get(job_id)
+                if event is not None and job is not None and job["status"] in FINISHED_STATES:
+                    event.set()
+                self._queue.task_done()
+
+
+image_job_queue = ImageJobQueue(
+    max_workers=IMAGE_JOB_WORKERS,
+    max_queue_size=IMAGE_JOB_QUEUE_SIZE,
+    db_path=IMAGE_JOB_DB_PATH,
+)
+
+
+async def submit_image_job(
+    prompt: str,
+    aspect_ratio: Optional[str],
+    tool_context: Optional[ToolContext],
+) -> Dict[str, Any]:
+    """Queue an image generation and return its job id (used by generate_image in job mode)."""
+    priority, weight = scheduling_hints(tool_context.state if tool_context else None)
+    job = await image_job_queue.submit(
+        prompt,
+        aspect_ratio,
+        session_id=tool_context.session.id if tool_context else None,
+        user_id=tool_context.user_id if tool_context else None,
+        priority=priority,
+        weight=weight,
+    )
+    if job is None:
+        return {
+            "status": "error",
+            "message": "Image generation queue is full. Please try again in a moment.",
+        }
+
+    return {
+        "status": "queued",
+        "job_id": job["job_id"],
+        "message": "Image generation queued. Collect it with get_image_job on the user's next message.",
+        "queue_depth": image_job_queue.queue_depth(),
+    }
+
+
+async def get_image_job_tool(
+    job_id: str,
+    wait_seconds: int = 0,
+    tool_context: Optional[ToolContext] = None,
+) -> Dict[str, Any]:
+    """
+    Check an image generation job and collect its images when it is done.
+
+    Call it once per user message; if the job is still running, tell the user and
+    check again when they come back. Finished images are saved as artifacts in the
+    current session the first time the job is collected.
+
+    Args:
+        job_id: Job id returned by generate_image
+        wait_seconds: Seconds to wait for completion before reporting progress
+            (default 0, capped by IMAGE_JOB_MAX_WAIT_SECONDS)
+        tool_context: Tool context (automatically provided)
+
+    Returns:
+        Dict with status ("queued", "running", "success" or "error") and, once done,
+        the same artifact information generate_image returns
+    """
+    try:
+        wait_seconds = max(0, min(wait_seconds, IMAGE_JOB_MAX_WAIT_SECONDS))
+        job = await image_job_queue.wait(job_id, timeout=wait_seconds)
+        if job is None:
+            return {
+                "status": "error",
+                "message": f"Unknown image job: {job_id} (it may have expired or been queued by another server process)",
+            }
+
+        if tool_context and job["session_id"] and job["session_id"] != tool_context.session.id:
+            return {"status": "error", "message": f"Image job {job_id} belongs to another session"}
+
+        if job["status"] in (QUEUED, RUNNING):
+            return {
+                "status": job["status"],
+                "job_id": job_id,
+                "message": (
+                    "Image is still being generated. Tell the user and check the job again on their "
+                    "next message; don't call get_image_job again in this turn."
+                ),
+                "elapsed_seconds": round(time.time() - job["created_at"], 1),
+            }
+
+        if job["status"] == FAILED:
+            return {**job["result"], "job_id": job_id}
+
+        async with image_job_queue.delivery_lock(job_id):
+            result = job["result"]
+            if job["status"] == DELIVERED:
+                return {**result, "job_id": job_id, "message": "Images were already saved as artifacts"}
+
+            images = result["images"]
+            timings_ms = dict(result["timings_ms"])
+            timings_ms["queue_wait"] = (job.get("started_at", job["created_at"]) - job["created_at"]) * 1000
+
+            saved_artifacts = []
+            failed_artifacts = []
+            if tool_context:
+                saved_artifacts, failed_artifacts = await save_generated_images(tool_context, images, timings_ms)
+
+            delivery = {
+                "status": "success",
+                "message": f"Generated {len(images)} image(s)",
+                "images_count": len(images),
+                "artifacts": saved_artifacts,
+                "failed_artifacts": failed_artifacts,
+                "text_response": result["text_response"],
+                "timings_ms": timings_ms,
+            }
+            if tool_context:
+                await image_job_queue.mark_delivered(job, delivery)
+            return {**delivery, "job_id": job_id}
+
+    except Exception as e:
+        logger.error(f"Error in get_image_job_tool: {str(e)}", exc_info=True)
+        return {"status": "error", "message": f"Failed to check image job: {str(e)}"}
+
+
+# Create FunctionTool instance
+get_image_job = FunctionTool(get_image_job_tool)
@@ -0,0 +1,55 @@
+"""
+Batched artifact saving.
+
+Saving artifacts one by one costs a full round-trip per image with a database- or
+cloud-backed artifact service. save_artifacts_batch saves a batch concurrently under a
+semaphore.
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import google.genai.types as types
+from google.adk.agents.callback_context import CallbackContext
+
+from ..config import ARTIFACT_SAVE_CONCURRENCY
+
+logger = logging.getLogger(__name__)
+
+
+async def save_artifacts_batch(
+    context: CallbackContext,
+    artifacts: List[Tuple[str, types.Part]],
+    max_concurrency: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Save several artifacts at once.
+
+    Filenames are chosen by the caller, so naming stays deterministic regardless of the
+    order in which the saves complete. A failed save does not affect the others.
+
+    Args:
+        context: Tool or callback context of the current invocation
+        artifacts: List of (filename, part) pairs to save
+        max_concurrency: Maximum saves in flight (default: ARTIFACT_SAVE_CONCURRENCY)
+
+    Returns:
+        One dict per input item, in input order:
+        {"filename": str, "status": "success"|"error", "version": int|None, "error": str|None}
+    """
+    if not artifacts:
+        return []
+
+    semaphore = asyncio.Semaphore(max(1, max_concurrency or ARTIFACT_SAVE_CONCURRENCY))
+
+    async def _save_one(filename: str, part: types.Part) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                version = await context.save_artifact(filename=filename, artifact=part)
+                return {"filename": filename, "status": "success", "version": version, "error": None}
+            except Exception as e:
+                logger.error(f"Error saving artifact {filename}: {e}", exc_info=True)
+                return {"filename": filename, "status": "error", "version": None, "error": str(e)}
+
+    return list(await asyncio.gather(*(_save_one(filename, part) for filename, part in artifacts)))
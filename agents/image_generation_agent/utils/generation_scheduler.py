@@ -0,0 +1,303 @@
+"""
+Priority and fairness scheduler for upstream image generation.
+
+All generations share a global concurrency budget for OpenRouter. Without scheduling,
+one session asking for many images takes every slot and everyone else waits behind it.
+The scheduler:
+
+- caps in-flight generations per session and per user,
+- serves priority lanes strictly in order (high before normal before low),
+- within a lane, uses weighted fair queueing across sessions: each request gets a
+  virtual finish tag of max(lane virtual time, session's last tag) + 1 / weight, and
+  the lowest eligible tag runs next, so sessions take turns instead of queueing FIFO.
+  Tags the lane clock has passed are forgotten, and when a lane goes idle its clock
+  moves past every tag, so sessions start the next busy period even.
+
+Queue wait and generation time are tracked separately.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from ..config import (
+    IMAGE_SCHEDULER_DEFAULT_PRIORITY,
+    IMAGE_SCHEDULER_MAX_CONCURRENCY,
+    IMAGE_SCHEDULER_MAX_PER_SESSION,
+    IMAGE_SCHEDULER_MAX_PER_USER,
+    IMAGE_SCHEDULER_MAX_WAIT_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_LANES = ("high", "normal", "low")
+
+# Number of recent samples kept for latency percentiles
+_SAMPLE_WINDOW = 1000
+
+
+# Session state keys an application can set to change a session's scheduling
+PRIORITY_STATE_KEY = "image_generation_priority"
+WEIGHT_STATE_KEY = "image_generation_weight"
+
+
+class SchedulerBusyError(Exception):
+    """Raised when a request waited longer than the allowed queue time."""
+
+
+class _Waiter:
+    __slots__ = ("session_id", "user_id", "lane", "start_tag", "finish_tag", "future", "enqueued_at")
+
+    def __init__(self, session_id: str, user_id: str, lane: str, start_tag: float, finish_tag: float):
+        self.session_id = session_id
+        self.user_id = user_id
+        self.lane = lane
+        self.start_tag = start_tag
+        self.finish_tag = finish_tag
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.enqueued_at = time.perf_counter()
+
+
+class _LatencyStats:
+    """Running count/sum/max plus a window of recent samples for percentiles."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.samples: Deque[float] = deque(maxlen=_SAMPLE_WINDOW)
+
+    def observe(self, value_ms: float) -> None:
+        self.count += 1
+        self.total_ms += value_ms
+        self.max_ms = max(self.max_ms, value_ms)
+        self.samples.append(value_ms)
+
+    def summary(self) -> Dict[str, float]:
+        ordered = sorted(self.samples)
+
+        def percentile(p: float) -> float:
+            return ordered[min(len(ordered) - 1, int(p * len(ordered)))] if ordered else 0.0
+
+        return {
+            "count": self.count,
+            "avg_ms": self.total_ms / self.count if self.count else 0.0,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "max_ms": self.max_ms,
+        }
+
+
+class SchedulerSlot:
+    """Handle for a granted generation slot; records its own timings."""
+
+    def __init__(self, lane: str, wait_ms: float):
+        self.lane = lane
+        self.wait_ms = wait_ms
+        self.started_at = time.perf_counter()
+        self.generation_ms = 0.0
+
+
+class GenerationScheduler:
+    """Weighted fair queueing across sessions with per-session/per-user caps and priority lanes."""
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_per_session: int,
+        max_per_user: int,
+        max_wait_seconds: Optional[float] = None,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_per_session = max(1, max_per_session)
+        self.max_per_user = max(1, max_per_user)
+        self.max_wait_seconds = max_wait_seconds
+
+        self._in_flight = 0
+        self._lane_in_flight: Dict[str, int] = defaultdict(int)
+        self._session_in_flight: Dict[str, int] = defaultdict(int)
+        self._user_in_flight: Dict[str, int] = defaultdict(int)
+
+        self._heap: List[tuple] = []
+        self._sequence = itertools.count()
+        self._virtual_time: Dict[str, float] = defaultdict(float)
+        self._last_finish: Dict[tuple, float] = {}
+        # Per lane, (finish tag, session) of every request, to forget tags the lane clock passed
+        self._finish_tags: Dict[str, List[Tuple[float, str]]] = defaultdict(list)
+
+        self._queue_wait = {lane: _LatencyStats() for lane in PRIORITY_LANES}
+        self._generation = {lane: _LatencyStats() for lane in PRIORITY_LANES}
+        self._rejected = 0
+
+    def _enqueue(self, session_id: str, user_id: str, lane: str, weight: float) -> _Waiter:
+        key = (lane, session_id)
+        start_tag = max(self._virtual_time[lane], self._last_finish.get(key, 0.0))
+        finish_tag = start_tag + 1.0 / max(weight, 0.01)
+        self._last_finish[key] = finish_tag
+        heapq.heappush(self._finish_tags[lane], (finish_tag, session_id))
+
+        waiter = _Waiter(session_id, user_id, lane, start_tag, finish_tag)
+        heapq.heappush(
+            self._heap,
+            (PRIORITY_LANES.index(lane), finish_tag, next(self._sequence), waiter),
+        )
+        return waiter
+
+    def _eligible(self, waiter: _Waiter) -> bool:
+        return (
+            self._session_in_flight[waiter.session_id] < self.max_per_session
+            and self._user_in_flight[waiter.user_id] < self.max_per_user
+        )
+
+    def _dispatch(self) -> None:
+        """Grant free slots to the best eligible waiters."""
+        skipped = []
+        while self._heap and self._in_flight < self.max_concurrency:
+            entry = heapq.heappop(self._heap)
+            waiter = entry[3]
+            if waiter.future.done():
+                # Cancelled or timed out while queued
+                continue
+            if not self._eligible(waiter):
+                skipped.append(entry)
+                continue
+
+            self._in_flight += 1
+            self._lane_in_flight[waiter.lane] += 1
+            self._session_in_flight[waiter.session_id] += 1
+            self._user_in_flight[waiter.user_id] += 1
+            self._virtual_time[waiter.lane] = max(self._virtual_time[waiter.lane], waiter.start_tag)
+            self._prune_finish_tags(waiter.lane)
+            waiter.future.set_result(None)
+
+        for entry in skipped:
+            heapq.heappush(self._heap, entry)
+
+    def _prune_finish_tags(self, lane: str) -> None:
+        """Forget sessions' finish tags the lane clock has passed; max() would ignore them anyway."""
+        tags = self._finish_tags[lane]
+        virtual_time = self._virtual_time[lane]
+        while tags and tags[0][0] <= virtual_time:
+            finish_tag, session_id = heapq.heappop(tags)
+            key = (lane, session_id)
+            # Only if no later request of the session has moved its tag since
+            if self._last_finish.get(key) == finish_tag:
+                del self._last_finish[key]
+
+    def _release(self, session_id: str, user_id: str, lane: str) -> None:
+        self._in_flight -= 1
+        self._lane_in_flight[lane] -= 1
+        if not self._lane_in_flight[lane] and not any(
+            entry[3].lane == lane and not entry[3].future.done() for entry in self._heap
+        ):
+            # Idle lane: its busy period is over, so no session keeps a head start or a debt
+            tags = self._finish_tags[lane]
+            if tags:
+                self._virtual_time[lane] = max(self._virtual_time[lane], max(tag for tag, _ in tags))
+                self._prune_finish_tags(lane)
+        self._session_in_flight[session_id] -= 1
+        if not self._session_in_flight[session_id]:
+            del self._session_in_flight[session_id]
+        self._user_in_flight[user_id] -= 1
+        if not self._user_in_flight[user_id]:
+            del self._user_in_flight[user_id]
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        session_id: Optional[str],
+        user_id: Optional[str],
+        priority: str = "normal",
+        weight: float = 1.0,
+    ):
+        """
+        Wait for a generation slot and hold it for the duration of the block.
+
+        Args:
+            session_id: Session requesting the generation (fairness unit)
+            user_id: User requesting the generation (capped across their sessions)
+            priority: Lane name: "high", "normal" or "low"
+            weight: Relative share of the session within its lane (default 1.0)
+
+        Raises:
+            SchedulerBusyError: If the request waited longer than max_wait_seconds
+        """
+        lane = priority if priority in PRIORITY_LANES else "normal"
+        session_id = session_id or "anonymous"
+        user_id = user_id or session_id
+
+        waiter = self._enqueue(session_id, user_id, lane, weight)
+        self._dispatch()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout=self.max_wait_seconds)
+        except asyncio.TimeoutError:
+            if waiter.future.done():
+                # Granted right at the deadline: give the slot back
+                self._release(session_id, user_id, lane)
+            else:
+                waiter.future.cancel()
+            self._rejected += 1
+            raise SchedulerBusyError(
+                f"Image generation is busy; request waited more than {self.max_wait_seconds}s"
+            )
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                self._release(session_id, user_id, lane)
+            else:
+                waiter.future.cancel()
+            raise
+
+        handle = SchedulerSlot(lane, (time.perf_counter() - waiter.enqueued_at) * 1000)
+        self._queue_wait[lane].observe(handle.wait_ms)
+        try:
+            yield handle
+        finally:
+            handle.generation_ms = (time.perf_counter() - handle.started_at) * 1000
+            self._generation[lane].observe(handle.generation_ms)
+            self._release(session_id, user_id, lane)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Snapshot of in-flight counts and queue-wait vs generation latency per lane."""
+        queued = sum(1 for entry in self._heap if not entry[3].future.done())
+        return {
+            "in_flight": self._in_flight,
+            "queued": queued,
+            "max_concurrency": self.max_concurrency,
+            "sessions_in_flight": dict(self._session_in_flight),
+            "users_in_flight": dict(self._user_in_flight),
+            "rejected": self._rejected,
+            "queue_wait": {lane: stats.summary() for lane, stats in self._queue_wait.items()},
+            "generation": {lane: stats.summary() for lane, stats in self._generation.items()},
+        }
+
+
+def scheduling_hints(state: Optional[Dict[str, Any]]) -> Tuple[str, float]:
+    """
+    Read the priority lane and fair-share weight for a session from its state.
+
+    Returns:
+        Tuple of (priority, weight), falling back to IMAGE_SCHEDULER_DEFAULT_PRIORITY and 1.0
+    """
+    priority = IMAGE_SCHEDULER_DEFAULT_PRIORITY
+    weight = 1.0
+    if state is not None:
+        priority = str(state.get(PRIORITY_STATE_KEY) or priority).lower()
+        try:
+            weight = float(state.get(WEIGHT_STATE_KEY) or weight)
+        except (TypeError, ValueError):
+            logger.warning(f"Ignoring invalid {WEIGHT_STATE_KEY}: {state.get(WEIGHT_STATE_KEY)!r}")
+    return priority, weight
+
+
+generation_scheduler = GenerationScheduler(
+    max_concurrency=IMAGE_SCHEDULER_MAX_CONCURRENCY,
+    max_per_session=IMAGE_SCHEDULER_MAX_PER_SESSION,
+    max_per_user=IMAGE_SCHEDULER_MAX_PER_USER,
+    max_wait_seconds=IMAGE_SCHEDULER_MAX_WAIT_SECONDS or None,
+)
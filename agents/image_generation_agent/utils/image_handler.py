@@ -7,6 +7,8 @@ from typing import Optional, List, Dict, Any, Tuple
 import google.genai.types as types
 from google.adk.agents.callback_context import CallbackContext
 
+from .artifact_saver import save_artifacts_batch
+
 logger = logging.getLogger(__name__)
 
 
@@ -31,6 +33,17 @@ async def extract_and_save_images(
     if not response.content or not response.content.parts:
         return saved_images
     
+    ext_map = {
+        "image/png": "png",
+        "image/jpeg": "jpg",
+        "image/jpg": "jpg",
+        "image/webp": "webp",
+        "image/gif": "gif",
+    }
+
+    # Collect all images first so filenames follow response order
+    pending: List[Tuple[str, types.Part]] = []
+    image_info: List[Dict[str, Any]] = []
     image_count = 0
     for part in response.content.parts:
         # Check if this part contains image data
@@ -38,56 +51,35 @@ async def extract_and_save_images(
             image_count += 1
             image_bytes = part.inline_data.data
             mime_type = part.inline_data.mime_type
-            
-            # Determine file extension from MIME type
-            ext_map = {
-                "image/png": "png",
-                "image/jpeg": "jpg",
-                "image/jpg": "jpg",
-                "image/webp": "webp",
-                "image/gif": "gif",
-            }
+
+            # Determine file extension from MIME type and generate filename
             ext = ext_map.get(mime_type, "png")
-            
-            # Generate filename
             filename = f"{filename_prefix}_{image_count}.{ext}"
-            
-            # Save if context is provided
-            if context:
-                try:
-                    # Create artifact part
-                    artifact_part = types.Part.from_bytes(
-                        data=image_bytes,
-                        mime_type=mime_type
-                    )
-                    
-                    # Save the artifact
-                    version = await context.save_artifact(
-                        filename=filename,
-                        artifact=artifact_part
-                    )
-                    
-                    saved_images.append({
-                        "filename": filename,
-                        "version": version,
-                        "mime_type": mime_type,
-                        "size_bytes": len(image_bytes),
-                    })
-                    
-                    logger.info(
-                        f"Saved generated image as artifact: {filename} (version {version})"
-                    )
-                except Exception as e:
-                    logger.error(f"Error saving image {filename}: {str(e)}", exc_info=True)
-            else:
-                # Just track the image without saving
-                saved_images.append({
-                    "filename": filename,
-                    "version": None,
-                    "mime_type": mime_type,
-                    "size_bytes": len(image_bytes),
-                })
-    
+
+            pending.append((filename, types.Part.from_bytes(data=image_bytes, mime_type=mime_type)))
+            image_info.append({
+                "filename": filename,
+                "version": None,
+                "mime_type": mime_type,
+                "size_bytes": len(image_bytes),
+            })
+
+    if not context:
+        # Just track the images without saving
+        return image_info
+
+    # Save all images concurrently
+    results = await save_artifacts_batch(context, pending)
+    for info, saved in zip(image_info, results):
+        if saved["status"] == "success":
+            info["version"] = saved["version"]
+            saved_images.append(info)
+            logger.info(
+                f"Saved generated image as artifact: {info['filename']} (version {saved['version']})"
+            )
+        else:
+            logger.error(f"Error saving image {info['filename']}: {saved['error']}")
+
     return saved_images
 
 
@@ -0,0 +1,162 @@
+"""
+Post-processing for generated images: thumbnails and size-optimized renditions.
+
+Decoding, resizing and re-encoding full-resolution PNGs is CPU-bound, so the work runs
+in a process pool and the tool only awaits the result. The original image is left
+untouched; renditions are saved next to it as sibling artifacts.
+"""
+
+import asyncio
+import io
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, TypedDict
+
+from ..config import (
+    IMAGE_POSTPROCESSING_ENABLED,
+    IMAGE_POSTPROCESSING_WORKERS,
+    IMAGE_THUMBNAIL_SIZE,
+    IMAGE_THUMBNAIL_QUALITY,
+    IMAGE_PREVIEW_MAX_SIZE,
+    IMAGE_PREVIEW_QUALITY,
+    IMAGE_RENDITION_FORMAT,
+)
+
+# Optional: Pillow is only needed for post-processing.
+try:
+    from PIL import Image
+except ModuleNotFoundError:
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+RENDITION_FORMATS = {
+    "webp": {"pil_format": "WEBP", "mime_type": "image/webp", "extension": "webp"},
+    "jpeg": {"pil_format": "JPEG", "mime_type": "image/jpeg", "extension": "jpg"},
+}
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+class ImageRendition(TypedDict):
+    variant: str
+    mime_type: str
+    extension: str
+    data: bytes
+    width: int
+    height: int
+    size_bytes: int
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    """Create the shared process pool on first use."""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=max(1, IMAGE_POSTPROCESSING_WORKERS))
+    return _executor
+
+
+def _rendition_specs() -> List[Dict[str, Any]]:
+    """Build the rendition list from configuration."""
+    image_format = IMAGE_RENDITION_FORMAT if IMAGE_RENDITION_FORMAT in RENDITION_FORMATS else "webp"
+    return [
+        {
+            "variant": "thumbnail",
+            "max_size": IMAGE_THUMBNAIL_SIZE,
+            "quality": IMAGE_THUMBNAIL_QUALITY,
+            "format": image_format,
+        },
+        {
+            "variant": "preview",
+            "max_size": IMAGE_PREVIEW_MAX_SIZE,
+            "quality": IMAGE_PREVIEW_QUALITY,
+            "format": image_format,
+        },
+    ]
+
+
+def _render_renditions(data: bytes, specs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Decode an image once and render every requested variant.
+
+    Runs inside a worker process, so it only takes and returns picklable values.
+
+    Returns:
+        Dict with "renditions" (list of ImageRendition) and "timings_ms" per stage
+    """
+    timings: Dict[str, float] = {}
+    renditions: List[ImageRendition] = []
+
+    start = time.perf_counter()
+    with Image.open(io.BytesIO(data)) as source:
+        source.load()
+        timings["decode"] = (time.perf_counter() - start) * 1000
+
+        for spec in specs:
+            variant = spec["variant"]
+            image_format = RENDITION_FORMATS[spec["format"]]
+
+            start = time.perf_counter()
+            image = source.copy()
+            image.thumbnail((spec["max_size"], spec["max_size"]), Image.LANCZOS)
+            if image_format["pil_format"] == "JPEG" and image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+            timings[f"{variant}_resize"] = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            buffer = io.BytesIO()
+            image.save(buffer, format=image_format["pil_format"], quality=spec["quality"], optimize=True)
+            encoded = buffer.getvalue()
+            timings[f"{variant}_encode"] = (time.perf_counter() - start) * 1000
+
+            renditions.append(
+                {
+                    "variant": variant,
+                    "mime_type": image_format["mime_type"],
+                    "extension": image_format["extension"],
+                    "data": encoded,
+                    "width": image.width,
+                    "height": image.height,
+                    "size_bytes": len(encoded),
+                }
+            )
+
+    return {"renditions": renditions, "timings_ms": timings}
+
+
+async def postprocess_image(data: bytes) -> Optional[Dict[str, Any]]:
+    """
+    Produce a thumbnail and a size-optimized rendition of an image off the event loop.
+
+    Args:
+        data: Raw image bytes as returned by the image model
+
+    Returns:
+        Dict with "renditions" and per-stage "timings_ms", or None when post-processing
+        is disabled, Pillow is not installed, or the image could not be processed
+    """
+    if not IMAGE_POSTPROCESSING_ENABLED:
+        return None
+
+    if Image is None:
+        logger.warning("Pillow is not installed; skipping image post-processing")
+        return None
+
+    start = time.perf_counter()
+    try:
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(_get_executor(), _render_renditions, data, _rendition_specs())
+    except Exception as e:
+        logger.error(f"Image post-processing failed: {e}", exc_info=True)
+        return None
+
+    # Includes process pool scheduling and transfer overhead on top of the worker stages
+    result["timings_ms"]["total"] = (time.perf_counter() - start) * 1000
+    return result
+
+
+def rendition_filename(filename: str, variant: str, extension: str) -> str:
+    """Build a sibling artifact name, e.g. generated_image_1.png -> generated_image_1_thumbnail.webp."""
+    stem = filename.rsplit(".", 1)[0]
+    return f"{stem}_{variant}.{extension}"
@@ -1 +1,2 @@
-from . import agent
\ No newline at end of file
+from . import agent
+from .utils.model_calls import register_server_hooks
@@ -7,15 +7,35 @@ from google.adk.agents import LlmAgent, SequentialAgent
 from google.adk.tools import AgentTool
 
 ## config imports
+from .config import SCREENING_MODE
 from .config.llm import FAST_MODEL, REASONING_MODEL
 
 ## prompt imports
 from .prompt.prompt import prompt_v0
 
 ## sub agents imports
-from .sub_agents import doc_parser_agent, job_requirements_agent
+from .sub_agents import (
+    doc_parser_agent,
+    job_requirements_agent,
+    match_scoring_agent,
+    match_narrator_agent,
+)
+from .sub_agents.bulk_screening_agent import BulkScreeningAgent
 
+if SCREENING_MODE == "bulk":
+    # Parse the job once, then every uploaded CV concurrently
+    parsing_agent = BulkScreeningAgent(
+        name="bulk_screening_agent",
+        description="Screens every uploaded CV against one job posting in parallel",
+        job_requirements_agent=job_requirements_agent,
+        cv_parser_agent=doc_parser_agent,
+    )
+    parsing_agents = [parsing_agent]
+else:
+    parsing_agents = [doc_parser_agent, job_requirements_agent]
+
+# Parse, score locally, then let the LLM narrate the ranking
 root_agent = SequentialAgent(
     name="resume_screener_agent",
-    sub_agents=[doc_parser_agent, job_requirements_agent],
-)
\ No newline at end of file
+    sub_agents=[*parsing_agents, match_scoring_agent, match_narrator_agent],
+)
@@ -0,0 +1,3 @@
+"""
+Resume Screener micro-benchmarks.
+"""
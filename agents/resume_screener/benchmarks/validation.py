@@ -0,0 +1,127 @@
+"""
+Validation throughput micro-benchmark for CandidateInfoFlat and JobRequirement.
+
+Bulk screening validates every parsed CV at least twice (model output, parse cache,
+matching features), so schema validation cost is tracked per 1k records for:
+
+- raw: model-shaped input (comma-separated strings, skills/location dicts, "title" keys)
+- normalized: dicts that were already validated once (state, cache payloads)
+- json: the same records as JSON strings (model output, parse cache)
+
+Usage:
+    python -m resume_screener.benchmarks.validation [--records 1000] [--repeat 5]
+"""
+
+import argparse
+import copy
+import json
+import random
+import time
+from typing import Any, Callable, Dict, List
+
+from ..schemas import CandidateInfo, CandidateInfoFlat, JobRequirement
+
+SKILLS = [
+    "Python", "JS", "ReactJS", "Node.js", "Kubernetes (k8s)", "AWS", "PostgreSQL", "Docker",
+    "Machine Learning", "5 years of TypeScript", "Go", "Terraform", "Communication", "Leadership",
+]
+LANGUAGES = ["English (native)", "German - fluent", "French", "Spanish - B2"]
+
+
+def raw_candidate(rng: random.Random, index: int) -> Dict[str, Any]:
+    """A candidate shaped like typical model output, before any normalization."""
+    return {
+        "personal_information": {"name": f"Candidate {index}"},
+        "email": f"candidate{index}@example.com",
+        "location": {"city": "Berlin", "country": "Germany"},
+        "skills": {
+            "technical": ", ".join(rng.sample(SKILLS[:12], 6)),
+            "soft": rng.sample(SKILLS[12:], 2),
+        },
+        "work_experience": [
+            {
+                "title": "Software Engineer",
+                "company": f"Company {n}",
+                "start_date": f"Jan {2012 + 3 * n}",
+                "end_date": "Present" if n == 2 else f"Dec {2014 + 3 * n}",
+                "description": ["Built services", "Led migrations"],
+            }
+            for n in range(3)
+        ],
+        "education": [{"degree": "MSc", "institution": "TU Berlin", "field_of_study": "Computer Science"}],
+        "languages": ", ".join(rng.sample(LANGUAGES, 2)),
+        "certifications": "CKA, AWS Solutions Architect",
+    }
+
+
+def raw_job(rng: random.Random, index: int) -> Dict[str, Any]:
+    """A job posting shaped like typical model output."""
+    return {
+        "job_title": f"Backend Engineer {index}",
+        "company": "Acme",
+        "location": {"city": "Berlin", "country": "Germany"},
+        "required_skills": ", ".join(rng.sample(SKILLS, 5)),
+        "preferred_skills": ", ".join(rng.sample(SKILLS, 3)),
+        "required_experience": "5+ years",
+        "required_education": "Bachelor's degree",
+        "education_field": "Computer Science, Engineering",
+        "languages": "English, German",
+        "responsibilities": "Design APIs, Run services, Mentor engineers",
+        "benefits": "Remote budget, Equity",
+        "remote_option": "yes",
+    }
+
+
+def measure(label: str, records: List[Any], validate: Callable[[Any], Any], repeat: int, copy_input: bool) -> Dict[str, Any]:
+    """Best-of-`repeat` time to validate `records`, reported per 1k records."""
+    best = float("inf")
+    for _ in range(repeat):
+        # Validators may normalize their input dicts in place, so each round gets fresh copies
+        batch = copy.deepcopy(records) if copy_input else records
+        started = time.perf_counter()
+        for record in batch:
+            validate(record)
+        best = min(best, time.perf_counter() - started)
+    per_1k_ms = best * 1000 / len(records) * 1000
+    return {"case": label, "ms_per_1k": round(per_1k_ms, 2), "records_per_s": round(len(records) / best)}
+
+
+def run(records: int = 1000, repeat: int = 5, seed: int = 7) -> List[Dict[str, Any]]:
+    """Run every case and return one result row per case."""
+    rng = random.Random(seed)
+    candidates = [raw_candidate(rng, i) for i in range(records)]
+    jobs = [raw_job(rng, i) for i in range(records)]
+    normalized_candidates = [CandidateInfoFlat.model_validate(copy.deepcopy(c)).model_dump() for c in candidates]
+    normalized_jobs = [JobRequirement.model_validate(copy.deepcopy(j)).model_dump() for j in jobs]
+    candidate_json = [json.dumps(c) for c in normalized_candidates]
+    job_json = [json.dumps(j) for j in normalized_jobs]
+
+    return [
+        measure("CandidateInfoFlat raw", candidates, CandidateInfoFlat.model_validate, repeat, True),
+        measure("CandidateInfoFlat normalized", normalized_candidates, CandidateInfoFlat.model_validate, repeat, True),
+        measure("CandidateInfoFlat json", candidate_json, CandidateInfoFlat.model_validate_json, repeat, False),
+        measure("CandidateInfo raw", candidates, CandidateInfo.model_validate, repeat, True),
+        measure("JobRequirement raw", jobs, JobRequirement.model_validate, repeat, True),
+        measure("JobRequirement normalized", normalized_jobs, JobRequirement.model_validate, repeat, True),
+        measure("JobRequirement json", job_json, JobRequirement.model_validate_json, repeat, False),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Schema validation throughput per 1k records")
+    parser.add_argument("--records", type=int, default=1000, help="Records per case (default: 1000)")
+    parser.add_argument("--repeat", type=int, default=5, help="Rounds per case; the best is reported (default: 5)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON (for tracking over time)")
+    args = parser.parse_args()
+
+    results = run(records=args.records, repeat=args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'case':<32}{'ms / 1k records':>18}{'records / s':>14}")
+    for row in results:
+        print(f"{row['case']:<32}{row['ms_per_1k']:>18.2f}{row['records_per_s']:>14,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+"""
+Resume Screener Callbacks package.
+
+candidate_cache and job_requirements_cache provide the before/after agent callbacks of
+one parsing agent; output_repair provides model callbacks shared by both.
+"""
+
+from . import candidate_cache, job_requirements_cache, output_repair
+
+__all__ = [
+    "candidate_cache",
+    "job_requirements_cache",
+    "output_repair",
+]
@@ -0,0 +1,106 @@
+"""
+Parse cache callbacks for doc_parser_agent.
+
+before_agent_callback looks up the uploaded CV in the parse cache and, on a hit, answers
+with the cached CandidateInfoFlat without calling the model. On a miss it remembers the
+CV's content hash, and after_agent_callback stores the validated parse result under it.
+"""
+
+import logging
+from typing import Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.genai import types
+
+from ..schemas import CandidateInfoFlat
+from ..tools.artifact_tools import is_cv_artifact_name
+from ..utils.parse_cache import get_parse_cache, part_content_hash
+
+logger = logging.getLogger(__name__)
+
+# Session state key written by doc_parser_agent (its output_key)
+CANDIDATE_INFO_STATE_KEY = "candidate_info"
+# Content hash of the CV being parsed in this invocation (not persisted)
+CV_HASH_STATE_KEY = "temp:cv_content_hash"
+# Content hash of the CV screened in this invocation, for the candidate pool id (not persisted)
+CV_SOURCE_STATE_KEY = "temp:cv_source"
+
+_DOCUMENT_MIME_PREFIXES = (
+    "application/pdf",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "application/msword",
+    "text/",
+)
+
+candidate_cache = get_parse_cache("candidate", CandidateInfoFlat)
+
+
+async def _find_cv_part(callback_context: CallbackContext) -> Optional[types.Part]:
+    """
+    Return the CV document of this invocation, if there is exactly one.
+
+    Looks at documents attached to the user message first, then at the session's CV
+    artifacts. With several candidates we can't tell which one is the CV, so None.
+    """
+    user_content = callback_context.user_content
+    documents = []
+    if user_content and user_content.parts:
+        documents = [
+            part
+            for part in user_content.parts
+            if part.inline_data and (part.inline_data.mime_type or "").startswith(_DOCUMENT_MIME_PREFIXES)
+        ]
+    if len(documents) == 1:
+        return documents[0]
+    if documents:
+        return None
+
+    filenames = [
+        name
+        for name in await callback_context.list_artifacts()
+        if is_cv_artifact_name(name, callback_context.state)
+    ]
+    if len(filenames) != 1:
+        return None
+    return await callback_context.load_artifact(filename=filenames[0])
+
+
+async def before_agent_callback(callback_context: CallbackContext) -> Optional[types.Content]:
+    """Answer from the parse cache when this CV was already parsed under the current schema."""
+    try:
+        part = await _find_cv_part(callback_context)
+        key = part_content_hash(part) if part else None
+        if key is None:
+            return None
+        callback_context.state[CV_SOURCE_STATE_KEY] = {
+            "invocation_id": callback_context.invocation_id,
+            "content_hash": key,
+        }
+
+        cached = await candidate_cache.get(key)
+        if cached is None:
+            callback_context.state[CV_HASH_STATE_KEY] = key
+            # A previous CV's parse must not be cached under this hash if this parse fails
+            callback_context.state[CANDIDATE_INFO_STATE_KEY] = None
+            return None
+
+        logger.info(f"Parse cache hit for CV {key[:12]}; skipping the model call")
+        callback_context.state[CANDIDATE_INFO_STATE_KEY] = cached.model_dump()
+        return types.Content(role="model", parts=[types.Part.from_text(text=cached.model_dump_json())])
+    except Exception as e:
+        logger.error(f"Error in before_agent_callback: {str(e)}", exc_info=True)
+        return None
+
+
+async def after_agent_callback(callback_context: CallbackContext) -> None:
+    """Store the freshly parsed candidate under the CV's content hash."""
+    try:
+        key = callback_context.state.get(CV_HASH_STATE_KEY)
+        result = callback_context.state.get(CANDIDATE_INFO_STATE_KEY)
+        if not key or not result:
+            return None
+        await candidate_cache.put(key, CandidateInfoFlat.model_validate(result))
+        callback_context.state[CV_HASH_STATE_KEY] = None
+    except Exception as e:
+        logger.error(f"Error in after_agent_callback: {str(e)}", exc_info=True)
+    return None
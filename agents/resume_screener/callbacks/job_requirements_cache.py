@@ -0,0 +1,232 @@
+"""
+Job requirements cache callbacks for job_requirements_agent.
+
+Popular postings are parsed again for every candidate and every recruiter. Parsed
+JobRequirement objects are cached under a hash of the job sources in the message: the
+text, the bytes of attached documents and the visible text of linked pages. A linked
+page's hash is trusted for JOB_CACHE_REVALIDATE_SECONDS; after that the page is
+revalidated with a conditional GET (ETag / Last-Modified), so a changed posting gets a
+new key. A hit answers for the agent, so the model and url_context are skipped entirely.
+"""
+
+import logging
+import re
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import aiohttp
+from google.adk.agents.callback_context import CallbackContext
+from google.genai import types
+from pydantic import BaseModel
+
+from ..config import JOB_CACHE_REVALIDATE_SECONDS, JOB_CACHE_FETCH_TIMEOUT_SECONDS
+from ..schemas import JobRequirement
+from ..utils.parse_cache import content_hash, get_parse_cache, part_content_hash
+
+logger = logging.getLogger(__name__)
+
+# Session state key written by job_requirements_agent (its output_key)
+JOB_REQUIREMENTS_STATE_KEY = "job_requirements"
+# Cache key of the job sources parsed in this invocation (not persisted)
+JOB_CACHE_KEY_STATE_KEY = "temp:job_cache_key"
+
+URL_PATTERN = re.compile(r"https?://[^\s<>\"'\])]+")
+# Placeholder SaveFilesAsArtifactsPlugin leaves for an upload it stored as an artifact
+UPLOADED_ARTIFACT_PATTERN = re.compile(r'\[Uploaded Artifact: "([^"]+)"\]')
+
+# Query parameters that never change the posting itself
+_TRACKING_PARAMS = re.compile(r"^(utm_.*|gclid|fbclid|msclkid|mc_[a-z]+|ref|refid|trk|trackingid|src)$", re.IGNORECASE)
+
+_SCRIPT_PATTERN = re.compile(r"<(script|style|noscript)\b.*?</\1>", re.IGNORECASE | re.DOTALL)
+_TAG_PATTERN = re.compile(r"<[^>]+>")
+
+
+class PageValidators(BaseModel):
+    """What we know about the posting page when it was last parsed or revalidated."""
+
+    url: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: Optional[str] = None
+    checked_at: float = 0.0
+
+
+job_requirements_cache = get_parse_cache("job_requirements", JobRequirement)
+page_validators_cache = get_parse_cache("job_requirements_page", PageValidators)
+
+
+def canonicalize_url(url: str) -> str:
+    """Normalize a posting URL: lowercase host, no fragment/tracking params, sorted query."""
+    parsed = urlsplit(url.rstrip(".,;:!?"))
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True) if not _TRACKING_PARAMS.match(k)
+    )
+    path = parsed.path.rstrip("/") or "/"
+    return urlunsplit((parsed.scheme.lower(), parsed.netloc.lower(), path, urlencode(query), ""))
+
+
+def _visible_text_hash(html: str) -> str:
+    """Hash the visible text of a page, ignoring markup, scripts and whitespace changes."""
+    text = _TAG_PATTERN.sub(" ", _SCRIPT_PATTERN.sub(" ", html))
+    return content_hash(" ".join(text.split()).encode("utf-8"))
+
+
+async def _fetch_validators(url: str, previous: Optional[PageValidators] = None) -> Optional[Tuple[bool, PageValidators]]:
+    """
+    Fetch the posting page, conditionally when we have validators.
+
+    Returns:
+        (unchanged, validators), or None if the page could not be fetched
+    """
+    headers: Dict[str, str] = {}
+    if previous is not None:
+        if previous.etag:
+            headers["If-None-Match"] = previous.etag
+        if previous.last_modified:
+            headers["If-Modified-Since"] = previous.last_modified
+
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(
+                url,
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=JOB_CACHE_FETCH_TIMEOUT_SECONDS),
+            ) as response:
+                if response.status == 304 and previous is not None:
+                    return True, previous.model_copy(update={"checked_at": time.time()})
+                if response.status != 200:
+                    logger.warning(f"Revalidation of {url} returned HTTP {response.status}")
+                    return None
+                body = await response.text(errors="replace")
+                validators = PageValidators(
+                    url=url,
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified"),
+                    content_hash=_visible_text_hash(body),
+                    checked_at=time.time(),
+                )
+    except Exception as e:
+        logger.warning(f"Could not fetch {url} for revalidation: {e}")
+        return None
+
+    unchanged = previous is not None and previous.content_hash == validators.content_hash
+    return unchanged, validators
+
+
+async def _page_hash(url: str) -> Optional[str]:
+    """
+    Visible-text hash of a linked page, revalidated after JOB_CACHE_REVALIDATE_SECONDS.
+
+    Returns None when the page was never fetched successfully.
+    """
+    validators_key = f"url:{content_hash(url.encode('utf-8'))}"
+    previous = await page_validators_cache.get(validators_key)
+    if previous is not None and time.time() - previous.checked_at <= JOB_CACHE_REVALIDATE_SECONDS:
+        return previous.content_hash
+
+    fetched = await _fetch_validators(url, previous)
+    if fetched is None:
+        # Page unreachable: keep serving the last good parse
+        return previous.content_hash if previous is not None else None
+    unchanged, validators = fetched
+    if previous is not None and not unchanged:
+        logger.info(f"Linked page changed since it was cached: {url}")
+    await page_validators_cache.put(validators_key, validators)
+    return validators.content_hash
+
+
+async def _cache_key(callback_context: CallbackContext) -> Optional[str]:
+    """
+    Derive the cache key from every job source in the user message.
+
+    The message may hold the job as pasted text, an attached document or a link, next to
+    the CV and instructions, and we can't tell which is which. So the key covers all of
+    them: the whitespace-normalized text, the bytes of each attached document (or
+    uploaded artifact) and the visible text of each linked page.
+
+    Returns:
+        "job:<sha256>", or None when part of the message can't be covered (a file
+        reference, an artifact or page that can't be read)
+    """
+    user_content = callback_context.user_content
+    if not user_content or not user_content.parts:
+        return None
+
+    sources = []
+    texts = []
+    artifact_names = set()
+    for part in user_content.parts:
+        if part.thought:
+            continue
+        if part.text:
+            texts.append(part.text)
+        elif part.inline_data and part.inline_data.data:
+            sources.append(f"doc:{content_hash(part.inline_data.data)}")
+        elif part.file_data and part.file_data.display_name:
+            # File reference next to an uploaded artifact placeholder (resolved below)
+            artifact_names.add(part.file_data.display_name)
+        else:
+            return None
+    text = "\n".join(texts)
+
+    uploaded = set(UPLOADED_ARTIFACT_PATTERN.findall(text))
+    if not artifact_names <= uploaded:
+        return None
+    for filename in sorted(uploaded):
+        artifact = await callback_context.load_artifact(filename=filename)
+        artifact_hash = part_content_hash(artifact) if artifact else None
+        if artifact_hash is None:
+            return None
+        sources.append(f"doc:{artifact_hash}")
+    text = UPLOADED_ARTIFACT_PATTERN.sub(" ", text)
+
+    for url in sorted({canonicalize_url(match) for match in URL_PATTERN.findall(text)}):
+        page_hash = await _page_hash(url)
+        if page_hash is None:
+            return None
+        sources.append(f"page:{page_hash}")
+
+    normalized = " ".join(URL_PATTERN.sub(" ", text).split()).lower()
+    if normalized:
+        sources.append(f"text:{content_hash(normalized.encode('utf-8'))}")
+    if not sources:
+        return None
+    combined = "\n".join(sorted(sources))
+    return f"job:{content_hash(combined.encode('utf-8'))}"
+
+
+async def before_agent_callback(callback_context: CallbackContext) -> Optional[types.Content]:
+    """Answer from the cache when these job sources were already parsed."""
+    try:
+        key = await _cache_key(callback_context)
+        if key is None:
+            return None
+
+        cached = await job_requirements_cache.get(key)
+        if cached is None:
+            callback_context.state[JOB_CACHE_KEY_STATE_KEY] = key
+            # A previous posting's parse must not be cached under this key if this parse fails
+            callback_context.state[JOB_REQUIREMENTS_STATE_KEY] = None
+            return None
+
+        logger.info("Job requirements cache hit; skipping the model call")
+        callback_context.state[JOB_REQUIREMENTS_STATE_KEY] = cached.model_dump()
+        return types.Content(role="model", parts=[types.Part.from_text(text=cached.model_dump_json())])
+    except Exception as e:
+        logger.error(f"Error in before_agent_callback: {str(e)}", exc_info=True)
+        return None
+
+
+async def after_agent_callback(callback_context: CallbackContext) -> None:
+    """Store the freshly parsed requirements under the key of their job sources."""
+    try:
+        key: Optional[str] = callback_context.state.get(JOB_CACHE_KEY_STATE_KEY)
+        result = callback_context.state.get(JOB_REQUIREMENTS_STATE_KEY)
+        if not key or not result:
+            return None
+        callback_context.state[JOB_CACHE_KEY_STATE_KEY] = None
+        await job_requirements_cache.put(key, JobRequirement.model_validate(result))
+    except Exception as e:
+        logger.error(f"Error in after_agent_callback: {str(e)}", exc_info=True)
+    return None
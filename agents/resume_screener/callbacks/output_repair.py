@@ -0,0 +1,106 @@
+"""
+Structured output repair callbacks for the parsing agents.
+
+When a parsing agent's final answer doesn't validate against its output_schema, ADK
+fails the run (or the model has to be prompted again). These model callbacks repair the
+answer locally first (see utils/structured_output.py): near-JSON text responses and
+set_model_response arguments are coerced against the schema, and only the fields that
+cannot be recovered are asked for again, in a short follow-up request.
+"""
+
+import logging
+from collections import OrderedDict
+from typing import Optional, Type
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.genai import types
+from pydantic import BaseModel, ValidationError
+
+from ..config import OUTPUT_REPAIR_REASK
+from ..utils.structured_output import coerce_to_schema, repair_structured_output
+
+logger = logging.getLogger(__name__)
+
+# Name of ADK's structured output tool, used when output_schema is combined with tools
+SET_MODEL_RESPONSE_TOOL = "set_model_response"
+
+# Requests remembered for a re-ask (one per in-flight invocation is enough)
+MAX_PENDING_REQUESTS = 256
+
+
+class OutputRepair:
+    """Model callbacks that repair one agent's structured output against `schema`."""
+
+    def __init__(self, schema: Type[BaseModel], llm: Optional[BaseLlm] = None):
+        self.schema = schema
+        self.llm = llm if OUTPUT_REPAIR_REASK else None
+        self._requests: "OrderedDict[str, LlmRequest]" = OrderedDict()
+
+    async def before_model_callback(
+        self, callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> Optional[LlmResponse]:
+        """Remember the request, so a re-ask can replay the same instructions and document."""
+        if self.llm is not None:
+            self._requests[callback_context.invocation_id] = llm_request
+            self._requests.move_to_end(callback_context.invocation_id)
+            while len(self._requests) > MAX_PENDING_REQUESTS:
+                self._requests.popitem(last=False)
+        return None
+
+    async def after_model_callback(
+        self, callback_context: CallbackContext, llm_response: LlmResponse
+    ) -> Optional[LlmResponse]:
+        """Replace an invalid structured answer with its local repair."""
+        try:
+            if llm_response.partial or not llm_response.content or not llm_response.content.parts:
+                return None
+            parts = llm_response.content.parts
+
+            calls = [part.function_call for part in parts if part.function_call]
+            if calls:
+                return self._repair_tool_call(llm_response, calls)
+
+            text = "".join(part.text for part in parts if part.text and not part.thought)
+            if not text.strip():
+                return None
+            instance, report = await repair_structured_output(
+                text,
+                self.schema,
+                llm=self.llm,
+                llm_request=self._requests.get(callback_context.invocation_id),
+            )
+            if instance is None or not report["repaired"]:
+                return None
+
+            repaired_parts = [part for part in parts if part.thought]
+            repaired_parts.append(types.Part.from_text(text=instance.model_dump_json(exclude_unset=True)))
+            return llm_response.model_copy(update={"content": types.Content(role="model", parts=repaired_parts)})
+        except Exception as e:
+            logger.error(f"Error in after_model_callback: {str(e)}", exc_info=True)
+            return None
+        finally:
+            if not llm_response.partial:
+                self._requests.pop(callback_context.invocation_id, None)
+
+    def _repair_tool_call(self, llm_response: LlmResponse, calls) -> Optional[LlmResponse]:
+        """Coerce set_model_response arguments in place (no re-ask: the call is already structured)."""
+        repaired = False
+        for call in calls:
+            if call.name != SET_MODEL_RESPONSE_TOOL:
+                continue
+            try:
+                self.schema.model_validate(call.args or {})
+                continue
+            except ValidationError:
+                pass
+            instance, unrecovered = coerce_to_schema(call.args or {}, self.schema)
+            if instance is None:
+                continue
+            call.args = instance.model_dump(exclude_unset=True)
+            repaired = True
+            logger.info(
+                f"Repaired {self.schema.__name__} set_model_response arguments locally "
+                f"(dropped: {unrecovered or 'none'})"
+            )
+        return llm_response if repaired else None
@@ -1,3 +1,23 @@
 from .utils import get_current_date
 from .llm import *
 from .config import EXA_API_KEY, DEFAULT_SEARCH_RESULTS_LIMIT
+from .config import (
+    SCREENING_MODE,
+    BULK_SCREENING_CONCURRENCY,
+    BULK_CV_ARTIFACT_PATTERN,
+    BULK_JOB_ARTIFACT_PATTERN,
+    CV_EXTRACTION_WORKERS,
+    CV_EXTRACTION_CACHE_SIZE,
+    SESSION_SERVICE_URI,
+    SESSION_DB_SSL,
+    PARSE_CACHE_BACKEND,
+    PARSE_CACHE_DB_PATH,
+    PARSE_CACHE_PRUNE_AFTER_DAYS,
+    JOB_CACHE_REVALIDATE_SECONDS,
+    JOB_CACHE_FETCH_TIMEOUT_SECONDS,
+    MATCH_WEIGHTS,
+    MATCH_NARRATE_TOP_K,
+    SKILL_TAXONOMY_PATH,
+    CANDIDATE_POOL_DB_PATH,
+    OUTPUT_REPAIR_REASK,
+)
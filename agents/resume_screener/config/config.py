@@ -11,4 +11,52 @@ load_dotenv()
 EXA_API_KEY = os.environ.get("EXA_API_KEY")
 
 # Search settings
-DEFAULT_SEARCH_RESULTS_LIMIT = 5
\ No newline at end of file
+DEFAULT_SEARCH_RESULTS_LIMIT = 5
+# Screening mode: "single" screens one CV per run, "bulk" screens every uploaded CV against one job
+SCREENING_MODE = os.environ.get("SCREENING_MODE", "single").lower()
+# Bulk screening: maximum CV parses in flight at once
+BULK_SCREENING_CONCURRENCY = int(os.environ.get("BULK_SCREENING_CONCURRENCY", "8"))
+# Bulk screening: comma-separated glob patterns selecting which session artifacts are CVs (case-insensitive)
+BULK_CV_ARTIFACT_PATTERN = os.environ.get("BULK_CV_ARTIFACT_PATTERN", "*")
+# Bulk screening: artifacts matching these patterns are never CVs, even when they match the CV patterns
+BULK_JOB_ARTIFACT_PATTERN = os.environ.get("BULK_JOB_ARTIFACT_PATTERN", "*job*,*posting*,*requirement*,*vacancy*")
+
+# CV text extraction: process pool size and number of extracted documents kept in memory (by content hash)
+CV_EXTRACTION_WORKERS = int(os.environ.get("CV_EXTRACTION_WORKERS", "2"))
+CV_EXTRACTION_CACHE_SIZE = int(os.environ.get("CV_EXTRACTION_CACHE_SIZE", "512"))
+
+# Session database (also used by the Postgres parse cache backend) and its asyncpg SSL
+# mode, read from the same variables as run_adk.py (empty disables SSL)
+SESSION_SERVICE_URI = os.environ.get("SESSION_SERVICE_URI")
+SESSION_DB_SSL = os.environ.get("SESSION_DB_SSL", "require")
+
+# Parse cache for structured results: "sqlite", "postgres" (uses SESSION_SERVICE_URI) or "none"
+PARSE_CACHE_BACKEND = os.environ.get("PARSE_CACHE_BACKEND", "sqlite").lower()
+PARSE_CACHE_DB_PATH = os.environ.get(
+    "PARSE_CACHE_DB_PATH",
+    os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "resume_screener", "parse_cache.db"),
+)
+# Parse cache: entries of other schema versions are deleted once this old (0 keeps them)
+PARSE_CACHE_PRUNE_AFTER_DAYS = float(os.environ.get("PARSE_CACHE_PRUNE_AFTER_DAYS", "30"))
+
+# Job requirements cache: trust a cached posting for this long before revalidating the page
+JOB_CACHE_REVALIDATE_SECONDS = int(os.environ.get("JOB_CACHE_REVALIDATE_SECONDS", "3600"))
+JOB_CACHE_FETCH_TIMEOUT_SECONDS = int(os.environ.get("JOB_CACHE_FETCH_TIMEOUT_SECONDS", "10"))
+
+# Matching: component weights (renormalized over the components a job specifies)
+MATCH_WEIGHTS = os.environ.get(
+    "MATCH_WEIGHTS",
+    "required_skills=0.45,preferred_skills=0.15,experience=0.2,education=0.1,languages=0.05,certifications=0.05",
+)
+# Matching: number of top candidates passed to the narrator
+MATCH_NARRATE_TOP_K = int(os.environ.get("MATCH_NARRATE_TOP_K", "10"))
+
+# Skill taxonomy: optional JSON file ({"canonical skill": ["alias", ...]}) extending the bundled one
+SKILL_TAXONOMY_PATH = os.environ.get("SKILL_TAXONOMY_PATH")
+
+# Structured output repair: ask the model again for fields that can't be repaired locally
+OUTPUT_REPAIR_REASK = os.environ.get("OUTPUT_REPAIR_REASK", "true").lower() in ("true", "1", "yes")
+
+# Candidate pool: SQLite file keeping every scored candidate (and its PII) across sessions;
+# opt-in, unset keeps parsed candidates in session state only
+CANDIDATE_POOL_DB_PATH = os.environ.get("CANDIDATE_POOL_DB_PATH", "")
@@ -0,0 +1,15 @@
+"""
+Resume Screener matching package.
+"""
+
+from .engine import rank_candidates, CandidateFeatures, JobFeatures, PartialScores
+from .candidate_pool import CandidatePool, get_candidate_pool
+
+__all__ = [
+    "rank_candidates",
+    "CandidateFeatures",
+    "JobFeatures",
+    "PartialScores",
+    "CandidatePool",
+    "get_candidate_pool",
+]
@@ -0,0 +1,405 @@
+"""
+Persistent, searchable pool of parsed candidates.
+
+Parsed candidates normally live only in one session's state. When enabled
+(CANDIDATE_POOL_DB_PATH), the pool keeps every scored candidate in a local SQLite
+file, keyed by the content hash of its CV, together with its precomputed matching
+features, so a later question such as "Python + Kubernetes candidates in Berlin" is
+answered from the pool instead of by re-screening CVs.
+
+On first use the pool is loaded into memory with inverted indexes:
+
+- canonical skill id -> candidate ids (skill taxonomy, so "k8s" finds "Kubernetes")
+- location token -> candidate ids ("Berlin, Germany" -> berlin, germany)
+- language -> candidate ids
+
+A query intersects the postings of its filters, ranks the retrieved candidates with
+the matching engine's scores and keeps the best k with a bounded heap.
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+import numpy as np
+
+from ..config import CANDIDATE_POOL_DB_PATH
+from ..schemas import CandidateInfoFlat, JobRequirement
+from ..utils.skill_taxonomy import skill_taxonomy
+from .engine import (
+    COMPONENTS,
+    TERM_COMPONENTS,
+    CandidateFeatures,
+    JobFeatures,
+    in_education_field,
+    normalize_terms,
+    rank_features,
+    score_component,
+    top_indices,
+    weight_vector,
+)
+
+logger = logging.getLogger(__name__)
+
+_CREATE_TABLE = """
+CREATE TABLE IF NOT EXISTS candidate_pool (
+    candidate_id TEXT PRIMARY KEY,
+    location TEXT,
+    source TEXT,
+    features TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    updated_at DOUBLE PRECISION NOT NULL
+)
+"""
+
+_TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+
+def location_tokens(location: Optional[str]) -> Set[str]:
+    """Lowercase word tokens of a location ("Berlin, Germany" -> {"berlin", "germany"})."""
+    return set(_TOKEN_PATTERN.findall(location.lower())) if location else set()
+
+
+class CandidatePool:
+    """
+    Candidate store in a local SQLite file with in-memory inverted indexes (thread-safe, blocking).
+
+    Each candidate owns a row; postings are sets of rows, and experience and education
+    are kept as columns, so queries are scored with NumPy over whole columns.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._rows: Dict[str, int] = {}
+        self._features: List[Optional[CandidateFeatures]] = []
+        self._locations: List[Optional[str]] = []
+        self._indexes: Dict[str, Dict[Any, Set[int]]] = {
+            "skills": defaultdict(set),
+            "location": defaultdict(set),
+            "languages": defaultdict(set),
+            "certifications": defaultdict(set),
+        }
+        # Column arrays and row masks, rebuilt lazily after writes
+        self._columns: Optional[Dict[str, np.ndarray]] = None
+        self._masks: Dict[Tuple[str, Any], np.ndarray] = {}
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(_CREATE_TABLE)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """A connection that commits on success and is always closed."""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            started = time.perf_counter()
+            with self._connect() as conn:
+                rows = conn.execute("SELECT candidate_id, location, features FROM candidate_pool").fetchall()
+            for candidate_id, location, record in rows:
+                self._index(CandidateFeatures.from_record(candidate_id, json.loads(record)), location)
+            self._loaded = True
+            logger.info(f"Loaded {len(rows)} candidate(s) into the pool in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    def _terms(self, features: CandidateFeatures, location: Optional[str]) -> Dict[str, Iterable[Any]]:
+        return {
+            "skills": features.skills,
+            "location": location_tokens(location),
+            "languages": features.languages,
+            "certifications": features.certifications,
+        }
+
+    def _index(self, features: CandidateFeatures, location: Optional[str]) -> None:
+        row = self._rows.get(features.candidate_id)
+        if row is not None and self._unchanged(row, features, location):
+            # Re-screening the same CV keeps the columns and posting masks
+            return
+        if row is None:
+            row = len(self._features)
+            self._rows[features.candidate_id] = row
+            self._features.append(None)
+            self._locations.append(None)
+        else:
+            self._unindex(row)
+        self._features[row] = features
+        self._locations[row] = location
+        for name, terms in self._terms(features, location).items():
+            for term in terms:
+                self._indexes[name][term].add(row)
+        self._invalidate()
+
+    def _unchanged(self, row: int, features: CandidateFeatures, location: Optional[str]) -> bool:
+        current = self._features[row]
+        return (
+            current is not None
+            and self._locations[row] == location
+            and current.to_record() == features.to_record()
+        )
+
+    def _unindex(self, row: int) -> None:
+        features = self._features[row]
+        if features is None:
+            return
+        for name, terms in self._terms(features, self._locations[row]).items():
+            for term in terms:
+                self._indexes[name][term].discard(row)
+        self._features[row] = None
+        self._locations[row] = None
+        self._invalidate()
+
+    def _invalidate(self) -> None:
+        self._columns = None
+        self._masks.clear()
+
+    def _get_columns(self) -> Dict[str, np.ndarray]:
+        columns = self._columns
+        if columns is None:
+            count = len(self._features)
+            features = self._features
+            columns = {
+                "alive": np.fromiter((f is not None for f in features), dtype=bool, count=count),
+                "years": np.fromiter((f.years if f else 0.0 for f in features), dtype=np.float64, count=count),
+                "levels": np.fromiter((f.education_level if f else 0 for f in features), dtype=np.float64, count=count),
+            }
+            self._columns = columns
+        return columns
+
+    def _mask(self, index: str, term: Any) -> np.ndarray:
+        """Boolean row mask of one posting list (cached until the next write)."""
+        mask = self._masks.get((index, term))
+        if mask is None:
+            posting = self._indexes[index].get(term, ())
+            mask = np.zeros(len(self._features), dtype=bool)
+            if posting:
+                mask[np.fromiter(posting, dtype=np.int64, count=len(posting))] = True
+            self._masks[(index, term)] = mask
+        return mask
+
+    def _field_mask(self, job: JobFeatures) -> np.ndarray:
+        """Rows whose education mentions one of the job's fields (cached until the next write)."""
+        key = ("education_field", tuple(job.education_fields))
+        mask = self._masks.get(key)
+        if mask is None:
+            mask = np.fromiter(
+                (f is not None and in_education_field(job, f.education_text) for f in self._features),
+                dtype=bool,
+                count=len(self._features),
+            )
+            self._masks[key] = mask
+        return mask
+
+    def _component_scores(self, job: JobFeatures) -> np.ndarray:
+        """Scores of every row on every component (rows x COMPONENTS)."""
+        columns = self._get_columns()
+        # A term component's matrix is made of cached per-term posting masks
+        matrices = {
+            name: np.column_stack([self._mask(TERM_COMPONENTS[name], term) for term in getattr(job, name)])
+            for name in TERM_COMPONENTS
+            if getattr(job, name)
+        }
+        in_field = self._field_mask(job) if job.education_fields else None
+        scores = np.empty((len(self._features), len(COMPONENTS)), dtype=np.float64)
+        for index, name in enumerate(COMPONENTS):
+            scores[:, index] = score_component(job, name, matrices, columns["years"], columns["levels"], in_field)
+        return scores
+
+    def add(
+        self,
+        candidate: Union[CandidateInfoFlat, Dict[str, Any]],
+        candidate_id: str,
+        source: Optional[str] = None,
+    ) -> str:
+        """Insert or replace one candidate; returns its pool id."""
+        return self.add_many([(candidate, candidate_id, source)])[0]
+
+    def add_many(
+        self,
+        candidates: Iterable[Tuple[Union[CandidateInfoFlat, Dict[str, Any]], str, Optional[str]]],
+    ) -> List[str]:
+        """
+        Insert or replace candidates in one transaction.
+
+        Args:
+            candidates: (parsed candidate, candidate_id, source such as the CV filename)
+                tuples; the scoring agent uses the CV's content hash as the id, so
+                re-parsing the same CV updates its entry even if the parse differs
+
+        Returns:
+            The pool ids, in input order
+        """
+        self._ensure_loaded()
+        rows = []
+        indexed = []
+        for candidate, candidate_id, source in candidates:
+            if isinstance(candidate, dict):
+                candidate = CandidateInfoFlat.model_validate(candidate)
+            features = CandidateFeatures(candidate_id, candidate)
+            rows.append(
+                (
+                    candidate_id,
+                    candidate.location,
+                    source,
+                    json.dumps(features.to_record()),
+                    candidate.model_dump_json(),
+                    time.time(),
+                )
+            )
+            indexed.append((features, candidate.location))
+
+        with self._lock:
+            with self._connect() as conn:
+                conn.executemany("INSERT OR REPLACE INTO candidate_pool VALUES (?, ?, ?, ?, ?, ?)", rows)
+            for features, location in indexed:
+                self._index(features, location)
+        return [row[0] for row in rows]
+
+    def remove(self, candidate_id: str) -> bool:
+        """Delete a candidate; returns whether it was in the pool."""
+        self._ensure_loaded()
+        with self._lock:
+            with self._connect() as conn:
+                deleted = conn.execute("DELETE FROM candidate_pool WHERE candidate_id = ?", (candidate_id,)).rowcount
+            row = self._rows.get(candidate_id)
+            if row is not None:
+                self._unindex(row)
+        return bool(deleted)
+
+    def get(self, candidate_id: str) -> Optional[CandidateInfoFlat]:
+        """The full parsed candidate, or None if it isn't in the pool."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT payload FROM candidate_pool WHERE candidate_id = ?", (candidate_id,)).fetchone()
+        return CandidateInfoFlat.model_validate_json(row[0]) if row else None
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return int(self._get_columns()["alive"].sum())
+
+    def _filter_terms(
+        self,
+        skills: Optional[Iterable[str]],
+        location: Optional[str],
+        languages: Optional[Iterable[str]],
+    ) -> List[Tuple[str, Any]]:
+        """(index, term) pairs a candidate must all match."""
+        terms = [("skills", skill_id) for skill_id in skill_taxonomy.resolve_all(skills or ())]
+        terms += [("location", token) for token in location_tokens(location)]
+        terms += [("languages", language) for language in normalize_terms(languages)]
+        return terms
+
+    def filter_ids(
+        self,
+        skills: Optional[Iterable[str]] = None,
+        location: Optional[str] = None,
+        languages: Optional[Iterable[str]] = None,
+    ) -> Set[str]:
+        """Ids of candidates having all of `skills`, every token of `location` and all of `languages`."""
+        self._ensure_loaded()
+        with self._lock:
+            postings = [self._indexes[index].get(term, set()) for index, term in self._filter_terms(skills, location, languages)]
+            if postings:
+                # Start from the shortest list so the intersection stays cheap
+                postings.sort(key=len)
+                rows = set(postings[0]).intersection(*postings[1:])
+            else:
+                rows = range(len(self._features))
+            return {self._features[row].candidate_id for row in rows if self._features[row] is not None}
+
+    def search(
+        self,
+        job: Union[JobRequirement, Dict[str, Any]],
+        top_k: int = 10,
+        skills: Optional[Iterable[str]] = None,
+        location: Optional[str] = None,
+        languages: Optional[Iterable[str]] = None,
+        weights: Optional[Dict[str, float]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Retrieve and rank pool candidates against a job.
+
+        Filters (skills, location, languages) are hard constraints answered from the
+        inverted indexes. Without filters, candidates sharing at least one required or
+        preferred skill with the job are retrieved (all candidates if the job lists no
+        skills). Only the retrieved candidates are ranked.
+
+        Args:
+            job: Job requirements to score against
+            top_k: Number of results to return
+            skills: Skills every result must have (aliases are resolved)
+            location: Location every result must match (all words, e.g. "Berlin")
+            languages: Languages every result must speak
+            weights: Component weights (default: MATCH_WEIGHTS)
+
+        Returns:
+            The engine ranking ("job", "weights", "results" with location added) plus
+            "total_candidates" (pool size), "retrieved" and "query_ms"
+        """
+        started = time.perf_counter()
+        job_features = JobFeatures(job)
+        self._ensure_loaded()
+
+        with self._lock:
+            columns = self._get_columns()
+            filters = self._filter_terms(skills, location, languages)
+            retrieved = columns["alive"].copy()
+            if filters:
+                for index, term in filters:
+                    retrieved &= self._mask(index, term)
+            else:
+                job_skills = [*job_features.required_skills, *job_features.preferred_skills]
+                if job_skills:
+                    retrieved &= np.logical_or.reduce([self._mask("skills", skill_id) for skill_id in job_skills])
+            rows = np.flatnonzero(retrieved)
+
+            scores = self._component_scores(job_features)
+            totals = scores[rows] @ weight_vector(job_features, weights) * 100
+            best = [self._features[rows[i]] for i in top_indices(totals, top_k)]
+            locations = {f.candidate_id: self._locations[self._rows[f.candidate_id]] for f in best}
+            pool_size = int(columns["alive"].sum())
+
+        # Re-rank the winners with the engine for the usual output and evidence
+        ranking = rank_features(job_features, best, weights=weights)
+        for result in ranking["results"]:
+            result["location"] = locations[result["candidate_id"]]
+        ranking.update(
+            total_candidates=pool_size,
+            retrieved=len(rows),
+            query_ms=round((time.perf_counter() - started) * 1000, 1),
+        )
+        return ranking
+
+
+_pool: Optional[CandidatePool] = None
+_pool_created = False
+
+
+def get_candidate_pool() -> Optional[CandidatePool]:
+    """The shared candidate pool, or None if it is disabled (CANDIDATE_POOL_DB_PATH unset) or unavailable."""
+    global _pool, _pool_created
+    if not _pool_created:
+        _pool_created = True
+        if CANDIDATE_POOL_DB_PATH:
+            try:
+                _pool = CandidatePool(CANDIDATE_POOL_DB_PATH)
+            except Exception as e:
+                logger.error(f"Could not open candidate pool at {CANDIDATE_POOL_DB_PATH}: {e}", exc_info=True)
+    return _pool
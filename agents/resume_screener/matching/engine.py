@@ -0,0 +1,633 @@
+"""
+Local, deterministic candidate-job matching.
+
+Candidates and the job are turned into normalized features once (canonical skill ids
+from the skill taxonomy, years of experience, education level, languages,
+certifications). Scores are then computed for all candidates at once with NumPy:
+
+- a boolean candidate x requirement matrix per term list (required/preferred skills,
+  languages, certifications), whose row means are the coverage scores,
+- vectors for experience and education ratios,
+- a weighted sum over the components that the job actually specifies.
+
+Each result carries per-requirement evidence (matched/missing terms, years, degree
+level), so the LLM only has to narrate the ranking, not compute it.
+
+PartialScores keeps the per-requirement columns and component scores of one candidate
+set between runs, so an edited job re-scores only the components it changed.
+"""
+
+import hashlib
+import heapq
+import json
+import logging
+import re
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from ..config import MATCH_WEIGHTS
+from ..schemas import CandidateInfoFlat, JobRequirement
+from ..utils.skill_taxonomy import SkillId, skill_taxonomy
+
+logger = logging.getLogger(__name__)
+
+COMPONENTS = (
+    "required_skills",
+    "preferred_skills",
+    "experience",
+    "education",
+    "languages",
+    "certifications",
+)
+
+# Term list components: (job field, candidate feature)
+TERM_COMPONENTS = {
+    "required_skills": "skills",
+    "preferred_skills": "skills",
+    "languages": "languages",
+    "certifications": "certifications",
+}
+# Term list components whose terms are skill taxonomy ids rather than strings
+SKILL_COMPONENTS = ("required_skills", "preferred_skills")
+
+# Ordinal education levels, checked from highest to lowest
+EDUCATION_LEVELS = (
+    (5, re.compile(r"ph\.?\s?d|doctor|doctorate", re.IGNORECASE)),
+    (4, re.compile(r"master|m\.?\s?sc|\bmba\b|m\.?\s?eng|\bm\.?a\.?\b|\bms\b|msc", re.IGNORECASE)),
+    (3, re.compile(r"bachelor|b\.?\s?sc|\bb\.?a\.?\b|b\.?\s?eng|\bbs\b|undergraduate|licenciatura|university degree", re.IGNORECASE)),
+    (2, re.compile(r"associate|diploma|\bhnd\b|vocational", re.IGNORECASE)),
+    (1, re.compile(r"high school|secondary|\bged\b", re.IGNORECASE)),
+)
+EDUCATION_LEVEL_NAMES = {0: None, 1: "High school", 2: "Associate/Diploma", 3: "Bachelor's", 4: "Master's", 5: "PhD"}
+
+# Years implied by seniority words when no number is given
+SENIORITY_YEARS = (
+    (re.compile(r"\b(entry|graduate|intern|trainee)\b", re.IGNORECASE), 0.0),
+    (re.compile(r"\bjunior\b", re.IGNORECASE), 1.0),
+    (re.compile(r"\b(mid|intermediate)\b", re.IGNORECASE), 3.0),
+    (re.compile(r"\bsenior\b", re.IGNORECASE), 5.0),
+    (re.compile(r"\b(lead|staff|principal|head)\b", re.IGNORECASE), 8.0),
+)
+
+_YEARS_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*(?:\+|-|–|to|or more)?\s*(?:\d+(?:\.\d+)?)?\s*\+?\s*(?:years?|yrs?)", re.IGNORECASE)
+_YEAR_PATTERN = re.compile(r"\b(19[5-9]\d|20\d{2})\b")
+_PRESENT_PATTERN = re.compile(r"present|current|now|today|ongoing", re.IGNORECASE)
+_MONTHS = {
+    name: index
+    for index, names in enumerate(
+        (("jan", "january"), ("feb", "february"), ("mar", "march"), ("apr", "april"), ("may",), ("jun", "june"),
+         ("jul", "july"), ("aug", "august"), ("sep", "sept", "september"), ("oct", "october"), ("nov", "november"),
+         ("dec", "december")),
+        start=1,
+    )
+    for name in names
+}
+_MONTH_PATTERN = re.compile(r"\b(" + "|".join(sorted(_MONTHS, key=len, reverse=True)) + r")\b", re.IGNORECASE)
+_NUMERIC_MONTH_PATTERN = re.compile(r"\b(0?[1-9]|1[0-2])\s*[/.-]\s*(19[5-9]\d|20\d{2})\b")
+_PARENTHETICAL_PATTERN = re.compile(r"\s*[\(\[].*?[\)\]]")
+_LEVEL_SUFFIX_PATTERN = re.compile(r"\s*[-:–]\s*(native|fluent|advanced|intermediate|basic|beginner|professional|conversational|c[12]|b[12]|a[12])\b.*$", re.IGNORECASE)
+
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """Parse "required_skills=0.45,experience=0.2,..." into component weights."""
+    weights = {}
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        name, value = item.split("=", 1)
+        name = name.strip()
+        if name in COMPONENTS:
+            weights[name] = float(value)
+    return weights
+
+
+DEFAULT_WEIGHTS = parse_weights(MATCH_WEIGHTS)
+
+
+def normalize_term(term: Any) -> str:
+    """Lowercase a skill/language/certification and drop proficiency notes and extra spaces."""
+    text = _LEVEL_SUFFIX_PATTERN.sub("", _PARENTHETICAL_PATTERN.sub("", str(term)))
+    return " ".join(text.lower().split()).strip(" .,;:")
+
+
+def normalize_terms(values: Optional[Iterable[Any]]) -> List[str]:
+    """Normalize a list of terms, dropping empties and duplicates but keeping order."""
+    seen = {}
+    for value in values or ():
+        term = normalize_term(value)
+        if term:
+            seen.setdefault(term, None)
+    return list(seen)
+
+
+def education_level(text: Optional[str]) -> int:
+    """Ordinal education level (0 = unknown, 5 = PhD) mentioned in a degree text."""
+    if not text:
+        return 0
+    for level, pattern in EDUCATION_LEVELS:
+        if pattern.search(text):
+            return level
+    return 0
+
+
+def required_years(text: Optional[str]) -> Optional[float]:
+    """Minimum years of experience asked for ("3-5 years" -> 3, "Senior" -> 5), None if unspecified."""
+    if not text:
+        return None
+    match = _YEARS_PATTERN.search(text)
+    if match:
+        return float(match.group(1))
+    for pattern, years in SENIORITY_YEARS:
+        if pattern.search(text):
+            return years
+    return None
+
+
+def _month_index(text: Optional[str], today: date, is_end: bool) -> Optional[int]:
+    """Convert "Mar 2019", "03/2019", "2019" or "Present" to a month index (year * 12 + month)."""
+    if not text:
+        return None
+    text = str(text)
+    if _PRESENT_PATTERN.search(text):
+        return today.year * 12 + today.month
+    numeric = _NUMERIC_MONTH_PATTERN.search(text)
+    if numeric:
+        return int(numeric.group(2)) * 12 + int(numeric.group(1))
+    year = _YEAR_PATTERN.search(text)
+    if not year:
+        return None
+    month = _MONTH_PATTERN.search(text)
+    # A bare year counts from January to December
+    month_number = _MONTHS[month.group(1).lower()] if month else (12 if is_end else 1)
+    return int(year.group(1)) * 12 + month_number
+
+
+def experience_years(work_experience: Optional[List[dict]], today: Optional[date] = None) -> float:
+    """Total years of experience, merging overlapping positions so they count once."""
+    today = today or date.today()
+    intervals = []
+    for position in work_experience or ():
+        if not isinstance(position, dict):
+            continue
+        start = _month_index(position.get("start_date"), today, is_end=False)
+        end = _month_index(position.get("end_date"), today, is_end=True)
+        if start is None:
+            continue
+        if end is None:
+            # Only a start date: count the start month itself
+            end = start
+        if end >= start:
+            intervals.append((start, end + 1))
+
+    total_months = 0
+    current_start = current_end = None
+    for start, end in sorted(intervals):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                total_months += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        total_months += current_end - current_start
+    return round(total_months / 12, 1)
+
+
+class CandidateFeatures:
+    """Normalized, score-ready view of one parsed candidate."""
+
+    __slots__ = ("candidate_id", "name", "skills", "years", "education_level", "education_text", "languages", "certifications")
+
+    def __init__(self, candidate_id: str, candidate: Union[CandidateInfoFlat, Dict[str, Any]]):
+        if isinstance(candidate, dict):
+            candidate = CandidateInfoFlat.model_validate(candidate)
+        self.candidate_id = candidate_id
+        self.name = candidate.name
+        self.skills = set(candidate.skill_ids)
+        self.years = experience_years(candidate.work_experience)
+        self.education_level = max(
+            (education_level(edu.get("degree")) for edu in candidate.education if isinstance(edu, dict)),
+            default=0,
+        )
+        self.education_text = " ".join(
+            f"{edu.get('degree') or ''} {edu.get('field_of_study') or ''}".lower()
+            for edu in candidate.education
+            if isinstance(edu, dict)
+        )
+        self.languages = set(normalize_terms(candidate.languages))
+        self.certifications = set(normalize_terms(candidate.certifications))
+
+    def to_record(self) -> Dict[str, Any]:
+        """JSON-serializable features; skills are stored by canonical name, not process-local id."""
+        return {
+            "name": self.name,
+            "skills": sorted(skill_names(self.skills)),
+            "years": self.years,
+            "education_level": self.education_level,
+            "education_text": self.education_text,
+            "languages": sorted(self.languages),
+            "certifications": sorted(self.certifications),
+        }
+
+    @classmethod
+    def from_record(cls, candidate_id: str, record: Dict[str, Any]) -> "CandidateFeatures":
+        """Rebuild features saved with `to_record` without re-validating the candidate."""
+        features = cls.__new__(cls)
+        features.candidate_id = candidate_id
+        features.name = record.get("name")
+        features.skills = skill_taxonomy.id_set(record.get("skills") or ())
+        features.years = float(record.get("years") or 0.0)
+        features.education_level = int(record.get("education_level") or 0)
+        features.education_text = record.get("education_text") or ""
+        features.languages = set(record.get("languages") or ())
+        features.certifications = set(record.get("certifications") or ())
+        return features
+
+
+class JobFeatures:
+    """Normalized, score-ready view of the job requirements."""
+
+    def __init__(self, job: Union[JobRequirement, Dict[str, Any]]):
+        if isinstance(job, dict):
+            job = JobRequirement.model_validate(job)
+        self.job_title = job.job_title
+        self.company = job.company
+        self.required_skills = list(job.required_skill_ids)
+        # A skill listed as both required and preferred only counts as required
+        required = set(self.required_skills)
+        self.preferred_skills = [s for s in job.preferred_skill_ids if s not in required]
+        self.languages = normalize_terms(job.languages)
+        self.certifications = normalize_terms(job.certifications)
+        self.required_years = required_years(job.required_experience)
+        self.required_education_level = education_level(job.required_education)
+        self.education_fields = normalize_terms(job.education_field)
+
+    def active_components(self) -> List[str]:
+        """Components the job actually specifies; the others don't affect the score."""
+        active = [name for name in TERM_COMPONENTS if getattr(self, name)]
+        if self.required_years:
+            active.append("experience")
+        if self.required_education_level or self.education_fields:
+            active.append("education")
+        return [name for name in COMPONENTS if name in active]
+
+
+def skill_names(skill_ids: Iterable[SkillId]) -> List[str]:
+    """Canonical names of skill ids, for evidence and summaries."""
+    return [skill_taxonomy.name(skill_id) for skill_id in skill_ids]
+
+
+def term_matrix(candidates: Sequence[CandidateFeatures], attribute: str, terms: Sequence[Any]) -> np.ndarray:
+    """Boolean matrix: candidate i has term j."""
+    matrix = np.zeros((len(candidates), len(terms)), dtype=bool)
+    if not terms:
+        return matrix
+    columns = {term: j for j, term in enumerate(terms)}
+    rows, cols = [], []
+    for i, candidate in enumerate(candidates):
+        for term in getattr(candidate, attribute):
+            j = columns.get(term)
+            if j is not None:
+                rows.append(i)
+                cols.append(j)
+    matrix[rows, cols] = True
+    return matrix
+
+
+def score_component(
+    job: JobFeatures,
+    name: str,
+    matrices: Dict[str, np.ndarray],
+    years: np.ndarray,
+    levels: np.ndarray,
+    in_field: Optional[np.ndarray],
+) -> np.ndarray:
+    """Scores in [0, 1] of every candidate on one component (1 when the job doesn't specify it)."""
+    if name in TERM_COMPONENTS:
+        return matrices[name].mean(axis=1) if getattr(job, name) else np.ones(len(years))
+
+    if name == "experience":
+        return np.minimum(years / job.required_years, 1.0) if job.required_years else np.ones(len(years))
+
+    education = np.ones(len(years), dtype=np.float64)
+    if job.required_education_level:
+        education = np.minimum(levels / job.required_education_level, 1.0)
+    if job.education_fields:
+        # The field of study refines the level; it never outweighs it
+        education = education * np.where(in_field, 1.0, 0.8) if job.required_education_level else in_field.astype(np.float64)
+    return education
+
+
+def score_components(
+    job: JobFeatures,
+    matrices: Dict[str, np.ndarray],
+    years: np.ndarray,
+    levels: np.ndarray,
+    in_field: Optional[np.ndarray],
+) -> np.ndarray:
+    """
+    Component scores from precomputed candidate columns.
+
+    Args:
+        job: Job features
+        matrices: Boolean candidate x term matrix per TERM_COMPONENTS entry
+        years: Years of experience per candidate
+        levels: Education level per candidate
+        in_field: Whether each candidate studied one of the job's fields (None if the job names none)
+
+    Returns:
+        A (candidates x COMPONENTS) array in [0, 1]
+    """
+    return np.column_stack(
+        [score_component(job, name, matrices, years, levels, in_field) for name in COMPONENTS]
+    ).reshape(len(years), len(COMPONENTS))
+
+
+def in_education_field(job: JobFeatures, education_text: str) -> bool:
+    return any(field in education_text for field in job.education_fields)
+
+
+def component_scores(job: JobFeatures, candidates: Sequence[CandidateFeatures]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Score every candidate on every component.
+
+    Returns:
+        (scores, term_matrices): a (candidates x COMPONENTS) array in [0, 1] and the
+        boolean term matrices used as evidence
+    """
+    count = len(candidates)
+    matrices = {
+        name: term_matrix(candidates, attribute, getattr(job, name)) for name, attribute in TERM_COMPONENTS.items()
+    }
+    years = np.fromiter((c.years for c in candidates), dtype=np.float64, count=count)
+    levels = np.fromiter((c.education_level for c in candidates), dtype=np.float64, count=count)
+    in_field = None
+    if job.education_fields:
+        in_field = np.fromiter((in_education_field(job, c.education_text) for c in candidates), dtype=bool, count=count)
+    return score_components(job, matrices, years, levels, in_field), matrices
+
+
+def _pack(column: np.ndarray) -> str:
+    return np.packbits(column).tobytes().hex()
+
+
+def _unpack(data: str, count: int) -> np.ndarray:
+    return np.unpackbits(np.frombuffer(bytes.fromhex(data), dtype=np.uint8), count=count).astype(bool)
+
+
+def _term_key(name: str, term: Any) -> str:
+    """Stable key of a requirement term; skill ids are process-local, their names are not."""
+    return skill_taxonomy.name(term) if name in SKILL_COMPONENTS else str(term)
+
+
+def component_signature(job: JobFeatures, name: str) -> str:
+    """What a component's scores depend on in the job; equal signatures give equal scores."""
+    if name in TERM_COMPONENTS:
+        value: Any = [_term_key(name, term) for term in getattr(job, name)]
+    elif name == "experience":
+        value = job.required_years
+    else:
+        value = [job.required_education_level, job.education_fields]
+    return json.dumps(value)
+
+
+class PartialScores:
+    """
+    Per-requirement partial scores of one candidate set, kept between scoring runs.
+
+    Holds a boolean column per requirement term (candidate has the skill, language,
+    certification or field of study) and a score column per component, tagged with the
+    component's signature. When the same candidates are scored against an edited job,
+    components with an unchanged signature are reused, and the changed ones are
+    re-scored for all candidates in one vectorized pass; only terms not seen before
+    need a new column. The state is plain JSON, so it can live in session state.
+    """
+
+    def __init__(self, fingerprint: str, count: int):
+        self.fingerprint = fingerprint
+        self.count = count
+        self.terms: Dict[str, np.ndarray] = {}
+        self.fields: Dict[str, np.ndarray] = {}
+        self.components: Dict[str, Tuple[str, np.ndarray]] = {}
+        # Components recomputed by the last score() call
+        self.rescored: List[str] = []
+
+    @staticmethod
+    def fingerprint_of(candidates: Sequence[Tuple[str, Union[CandidateInfoFlat, Dict[str, Any]]]]) -> str:
+        """Hash of the candidate ids and parsed candidates, in order."""
+        digest = hashlib.sha256()
+        for candidate_id, candidate in candidates:
+            if isinstance(candidate, CandidateInfoFlat):
+                candidate = candidate.model_dump()
+            digest.update(json.dumps([candidate_id, candidate], sort_keys=True, default=str).encode("utf-8"))
+        return digest.hexdigest()
+
+    @classmethod
+    def from_state(
+        cls,
+        data: Optional[Dict[str, Any]],
+        candidates: Sequence[Tuple[str, Union[CandidateInfoFlat, Dict[str, Any]]]],
+    ) -> "PartialScores":
+        """Restore the partial scores of these candidates, or start empty if they changed."""
+        partials = cls(cls.fingerprint_of(candidates), len(candidates))
+        if not data or data.get("fingerprint") != partials.fingerprint or data.get("count") != partials.count:
+            return partials
+        try:
+            count = partials.count
+            partials.terms = {key: _unpack(value, count) for key, value in data.get("terms", {}).items()}
+            partials.fields = {key: _unpack(value, count) for key, value in data.get("fields", {}).items()}
+            partials.components = {
+                name: (signature, np.asarray(scores, dtype=np.float64))
+                for name, (signature, scores) in data.get("components", {}).items()
+                if name in COMPONENTS and len(scores) == count
+            }
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable partial scores: {e}")
+            return cls(partials.fingerprint, partials.count)
+        return partials
+
+    def to_state(self) -> Dict[str, Any]:
+        return {
+            "fingerprint": self.fingerprint,
+            "count": self.count,
+            "terms": {key: _pack(column) for key, column in self.terms.items()},
+            "fields": {key: _pack(column) for key, column in self.fields.items()},
+            "components": {name: [signature, scores.tolist()] for name, (signature, scores) in self.components.items()},
+        }
+
+    def _matrix(self, job: JobFeatures, name: str, candidates: Sequence[CandidateFeatures], used: Dict[str, np.ndarray]) -> np.ndarray:
+        """Candidate x term matrix of one component from cached columns, computing only new terms."""
+        terms = getattr(job, name)
+        attribute = TERM_COMPONENTS[name]
+        columns = []
+        for term in terms:
+            key = f"{attribute}:{_term_key(name, term)}"
+            column = self.terms.get(key)
+            if column is None:
+                column = np.fromiter((term in getattr(c, attribute) for c in candidates), dtype=bool, count=self.count)
+            used[key] = column
+            columns.append(column)
+        if not columns:
+            return np.zeros((self.count, 0), dtype=bool)
+        return np.column_stack(columns)
+
+    def _in_field(self, job: JobFeatures, candidates: Sequence[CandidateFeatures]) -> np.ndarray:
+        fields = {}
+        for field in job.education_fields:
+            column = self.fields.get(field)
+            if column is None:
+                column = np.fromiter((field in c.education_text for c in candidates), dtype=bool, count=self.count)
+            fields[field] = column
+        # Columns of fields the job no longer names are dropped
+        self.fields = fields
+        return np.logical_or.reduce(list(fields.values()))
+
+    def score(self, job: JobFeatures, candidates: Sequence[CandidateFeatures]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """Same result as `component_scores`, re-scoring only the components whose signature changed."""
+        used: Dict[str, np.ndarray] = {}
+        matrices = {name: self._matrix(job, name, candidates, used) for name in TERM_COMPONENTS}
+        self.terms = used
+        years = np.fromiter((c.years for c in candidates), dtype=np.float64, count=self.count)
+        levels = np.fromiter((c.education_level for c in candidates), dtype=np.float64, count=self.count)
+
+        if not job.education_fields:
+            self.fields = {}
+
+        scores = np.empty((self.count, len(COMPONENTS)), dtype=np.float64)
+        self.rescored = []
+        for index, name in enumerate(COMPONENTS):
+            signature = component_signature(job, name)
+            cached = self.components.get(name)
+            if cached is None or cached[0] != signature:
+                in_field = self._in_field(job, candidates) if name == "education" and job.education_fields else None
+                cached = (signature, score_component(job, name, matrices, years, levels, in_field))
+                self.components[name] = cached
+                self.rescored.append(name)
+            scores[:, index] = cached[1]
+        return scores, matrices
+
+
+def weight_vector(job: JobFeatures, weights: Optional[Dict[str, float]] = None) -> np.ndarray:
+    """Component weights, zero for components the job doesn't specify, summing to 1."""
+    weights = weights or DEFAULT_WEIGHTS
+    active = set(job.active_components())
+    vector = np.array([weights.get(name, 0.0) if name in active else 0.0 for name in COMPONENTS])
+    total = vector.sum()
+    return vector / total if total > 0 else vector
+
+
+def _evidence(
+    job: JobFeatures,
+    candidate: CandidateFeatures,
+    index: int,
+    matrices: Dict[str, np.ndarray],
+) -> Dict[str, Any]:
+    evidence: Dict[str, Any] = {}
+    for name in TERM_COMPONENTS:
+        terms = getattr(job, name)
+        if terms:
+            row = matrices[name][index]
+            if name in SKILL_COMPONENTS:
+                terms = skill_names(terms)
+            evidence[name] = {
+                "matched": [term for term, hit in zip(terms, row) if hit],
+                "missing": [term for term, hit in zip(terms, row) if not hit],
+            }
+    if job.required_years:
+        evidence["experience"] = {"candidate_years": candidate.years, "required_years": job.required_years}
+    if job.required_education_level or job.education_fields:
+        evidence["education"] = {
+            "candidate_level": EDUCATION_LEVEL_NAMES[candidate.education_level],
+            "required_level": EDUCATION_LEVEL_NAMES[job.required_education_level],
+            "fields": job.education_fields,
+        }
+    return evidence
+
+
+def top_indices(totals: np.ndarray, top_k: Optional[int] = None) -> List[int]:
+    """Indices of the best totals, highest first; ties keep the input order."""
+    if top_k is None or top_k >= len(totals):
+        return np.argsort(-totals, kind="stable").tolist()
+    if top_k <= 0:
+        return []
+    # Shortlist everything tied with or above the k-th best, then a bounded heap orders it;
+    # cheaper than sorting a large pool for a short list
+    threshold = np.partition(totals, -top_k)[-top_k]
+    shortlist = np.flatnonzero(totals >= threshold).tolist()
+    return heapq.nlargest(top_k, shortlist, key=totals.__getitem__)
+
+
+def rank_features(
+    job_features: JobFeatures,
+    features: Sequence[CandidateFeatures],
+    top_k: Optional[int] = None,
+    weights: Optional[Dict[str, float]] = None,
+    partial_scores: Optional[PartialScores] = None,
+) -> Dict[str, Any]:
+    """Score and rank already-featurized candidates (see `rank_candidates`)."""
+    if partial_scores is not None:
+        scores, matrices = partial_scores.score(job_features, features)
+    else:
+        scores, matrices = component_scores(job_features, features)
+    weight = weight_vector(job_features, weights)
+    totals = scores @ weight * 100 if features else np.zeros(0)
+    order = top_indices(totals, top_k)
+
+    active = job_features.active_components()
+    results = []
+    for rank, index in enumerate(order, start=1):
+        candidate = features[index]
+        results.append(
+            {
+                "rank": rank,
+                "candidate_id": candidate.candidate_id,
+                "name": candidate.name,
+                "score": round(float(totals[index]), 1),
+                "components": {
+                    name: round(float(scores[index, COMPONENTS.index(name)]) * 100, 1) for name in active
+                },
+                "evidence": _evidence(job_features, candidate, index, matrices),
+            }
+        )
+
+    return {
+        "job": {
+            "job_title": job_features.job_title,
+            "company": job_features.company,
+            "required_skills": skill_names(job_features.required_skills),
+            "preferred_skills": skill_names(job_features.preferred_skills),
+            "required_years": job_features.required_years,
+            "required_education": EDUCATION_LEVEL_NAMES[job_features.required_education_level],
+        },
+        "weights": {name: round(float(w), 3) for name, w in zip(COMPONENTS, weight) if w > 0},
+        "total_candidates": len(features),
+        "results": results,
+    }
+
+
+def rank_candidates(
+    job: Union[JobRequirement, Dict[str, Any]],
+    candidates: Sequence[Tuple[str, Union[CandidateInfoFlat, Dict[str, Any]]]],
+    top_k: Optional[int] = None,
+    weights: Optional[Dict[str, float]] = None,
+    partial_scores: Optional[PartialScores] = None,
+) -> Dict[str, Any]:
+    """
+    Score and rank candidates against one job.
+
+    Args:
+        job: Parsed job requirements
+        candidates: (candidate_id, parsed candidate) pairs
+        top_k: Only return the best k results (default: all)
+        weights: Component weights (default: MATCH_WEIGHTS)
+        partial_scores: Partial scores of these candidates from an earlier run (see
+            PartialScores.from_state); only components the job changed are re-scored
+
+    Returns:
+        Dict with the job summary, the normalized weights and "results": ranked dicts with
+        candidate_id, name, score (0-100), per-component scores and per-requirement evidence
+    """
+    features = [CandidateFeatures(candidate_id, candidate) for candidate_id, candidate in candidates]
+    return rank_features(JobFeatures(job), features, top_k=top_k, weights=weights, partial_scores=partial_scores)
@@ -0,0 +1,276 @@
+"""
+Structured schemas for parsed candidates and job requirements.
+
+Shared by the parsing agents, the bulk screening agent and the parse cache.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Union
+from pydantic import BaseModel, Field, PrivateAttr, model_validator
+
+from .utils.skill_taxonomy import SkillId, skill_taxonomy
+
+
+# Field normalizers, shared by all schemas and applied in a single `mode='before'` pass.
+# Each returns its input unchanged (the same object) when it is already normalized, so
+# validating state, cache payloads or model output that was validated before costs
+# only a type check per field.
+
+def _split_csv(value: str) -> List[str]:
+    return [s.strip() for s in value.split(',') if s.strip()]
+
+
+def _to_list(value: Any) -> Any:
+    """Comma-separated string or None -> list; lists pass through."""
+    if type(value) is list:
+        return value
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return _split_csv(value)
+    return value
+
+
+def _to_skill_list(value: Any) -> Any:
+    """Like _to_list, also flattening {"technical": ..., "soft": ...} dicts."""
+    if isinstance(value, dict):
+        all_skills = []
+        for key in ("technical", "soft"):
+            group = _to_list(value.get(key))
+            if isinstance(group, list):
+                all_skills.extend(group)
+        return all_skills
+    return _to_list(value)
+
+
+def _to_location(value: Any) -> Any:
+    """{"city": ..., "country": ...} -> "city, country"."""
+    if isinstance(value, dict):
+        parts = [str(value[key]) for key in ("city", "country") if key in value]
+        return ", ".join(parts) if parts else None
+    return value
+
+
+def _to_position(exp: Any) -> Any:
+    """Work experience dict: "title" -> "job_title", description list -> text."""
+    if not isinstance(exp, dict):
+        return exp
+    needs_title = "title" in exp and not exp.get("job_title")
+    needs_description = isinstance(exp.get("description"), list)
+    if not (needs_title or needs_description):
+        return exp
+    exp = dict(exp)
+    if needs_title:
+        exp["job_title"] = exp.pop("title")
+    if needs_description:
+        exp["description"] = " ".join(exp["description"]) if exp["description"] else None
+    return exp
+
+
+def _to_positions(value: Any) -> Any:
+    if type(value) is not list:
+        return value
+    positions = [_to_position(exp) for exp in value]
+    return value if all(new is old for new, old in zip(positions, value)) else positions
+
+
+def _to_remote_flag(value: Any) -> Any:
+    if isinstance(value, str):
+        return value.lower() in ("true", "yes", "1", "remote", "available")
+    return value
+
+
+def _normalize(data: Any, handlers: Dict[str, Callable[[Any], Any]]) -> Any:
+    """Apply field handlers, copying the input dict only if a field actually changes."""
+    if not isinstance(data, dict):
+        return data
+    normalized = data
+    for field, handler in handlers.items():
+        if field in data:
+            value = data[field]
+            new_value = handler(value)
+            if new_value is not value:
+                if normalized is data:
+                    normalized = dict(data)
+                normalized[field] = new_value
+    return normalized
+
+
+def _name_from_personal_information(data: Any) -> Any:
+    """Use personal_information.name when the top-level name is missing."""
+    if isinstance(data, dict) and not data.get("name"):
+        personal = data.get("personal_information")
+        if isinstance(personal, dict) and personal.get("name"):
+            data = {**data, "name": personal.get("name")}
+    return data
+
+
+_CANDIDATE_HANDLERS = {
+    "skills": _to_skill_list,
+    "languages": _to_list,
+    "certifications": _to_list,
+    "location": _to_location,
+    "work_experience": _to_positions,
+}
+
+_JOB_LIST_FIELDS = (
+    'required_skills', 'preferred_skills', 'education_field',
+    'languages', 'certifications', 'responsibilities', 'benefits'
+)
+_JOB_HANDLERS = {
+    **{field: _to_list for field in _JOB_LIST_FIELDS},
+    "location": _to_location,
+    "remote_option": _to_remote_flag,
+}
+
+
+class Education(BaseModel):
+    degree: Optional[str] = Field(None, description="Degree or qualification name")
+    institution: Optional[str] = Field(None, description="School or university name")
+    field_of_study: Optional[str] = Field(None, description="Field of study or major")
+    graduation_year: Optional[int] = Field(None, description="Year of graduation")
+    gpa: Optional[str] = Field(None, description="GPA or grade if mentioned")
+
+
+class WorkExperience(BaseModel):
+    job_title: Optional[str] = Field(None, description="Job title or position (also accepts 'title' field)")
+    title: Optional[str] = Field(None, description="Alternative field name for job title")
+    company: Optional[str] = Field(None, description="Company or organization name")
+    start_date: Optional[str] = Field(None, description="Start date (month/year or year)")
+    end_date: Optional[str] = Field(None, description="End date (month/year or year, or 'Present' if current)")
+    description: Optional[Union[str, List[str]]] = Field(None, description="Job description or key responsibilities (can be string or list)")
+    
+    @model_validator(mode='before')
+    def normalize_fields(cls, data):
+        """Normalize job_title from title field and description from list"""
+        return _to_position(data)
+
+
+# Simple and flexible schema for ADK output_schema
+# Following ADK best practices: use simple types, List[dict] for nested structures
+class CandidateInfoFlat(BaseModel):
+    """Simple, flexible schema that accepts various input formats.
+    
+    Uses List[dict] for nested structures (work_experience, education) as per ADK best practices.
+    Accepts flexible input types (str, list, dict) for skills/languages/certifications
+    and normalizes them to List[str] via validators.
+    """
+    name: Optional[str] = Field(None, description="Full name of the candidate")
+    email: Optional[str] = Field(None, description="Email address")
+    phone: Optional[str] = Field(None, description="Phone number")
+    location: Optional[str] = Field(None, description="City and country")
+    linkedin: Optional[str] = Field(None, description="LinkedIn profile URL")
+    summary: Optional[str] = Field(None, description="Professional summary or objective")
+    # Accept flexible input types, validators will normalize to List[str]
+    skills: Union[str, List[str], dict, None] = Field(default_factory=list, description="Skills - accepts string, list, or dict")
+    work_experience: List[dict] = Field(default_factory=list, description="Work experience as list of dicts with keys: job_title, company, start_date, end_date, description")
+    education: List[dict] = Field(default_factory=list, description="Education as list of dicts with keys: degree, institution, field_of_study, graduation_year, gpa")
+    # Accept flexible input types, validators will normalize to List[str]
+    languages: Union[str, List[str], None] = Field(default_factory=list, description="Languages - accepts string or list")
+    certifications: Union[str, List[str], None] = Field(default_factory=list, description="Certifications - accepts string or list")
+    # Canonical skill ids from the skill taxonomy (not part of the LLM schema)
+    _skill_ids: List[SkillId] = PrivateAttr(default_factory=list)
+    
+    @property
+    def skill_ids(self) -> List[SkillId]:
+        """Canonical taxonomy ids of `skills` ("JS" and "JavaScript" share one id)."""
+        return self._skill_ids
+    
+    @model_validator(mode='before')
+    def normalize_inputs(cls, data):
+        """Convert various input formats to expected types (single pass; normalized input is left as is)"""
+        return _normalize(_name_from_personal_information(data), _CANDIDATE_HANDLERS)
+    
+    @model_validator(mode='after')
+    def ensure_lists(self):
+        """Ensure list fields are always lists - final safety check, then resolve skill ids"""
+        for field_name in ('skills', 'languages', 'certifications'):
+            if type(getattr(self, field_name)) is not list:
+                setattr(self, field_name, [])
+        
+        self._skill_ids = skill_taxonomy.resolve_all(self.skills)
+        return self
+
+
+# Full schema with nested models for validation (used for post-processing)
+class CandidateInfo(BaseModel):
+    name: Optional[str] = Field(None, description="Full name of the candidate")
+    personal_information: Optional[dict] = Field(None, description="Personal information object (may contain name)")
+    email: Optional[str] = Field(None, description="Email address")
+    phone: Optional[str] = Field(None, description="Phone number")
+    location: Optional[Union[str, dict]] = Field(None, description="City and country (can be string or dict)")
+    linkedin: Optional[str] = Field(None, description="LinkedIn profile URL")
+    summary: Optional[str] = Field(None, description="Professional summary or objective")
+    skills: Optional[Union[List[str], dict]] = Field(default_factory=list, description="List of technical and soft skills (can be flat list or dict with technical/soft keys)")
+    work_experience: List[WorkExperience] = Field(default_factory=list, description="Work experience history")
+    education: List[Education] = Field(default_factory=list, description="Educational background")
+    languages: Optional[List[str]] = Field(None, description="Languages spoken with proficiency levels")
+    certifications: Optional[List[str]] = Field(None, description="Professional certifications")
+    
+    @model_validator(mode='before')
+    def normalize_fields(cls, data):
+        """Normalize fields from various formats before the nested models are validated"""
+        return _normalize(_name_from_personal_information(data), _CANDIDATE_HANDLERS)
+
+
+class JobRequirement(BaseModel):
+    """Simple, flexible schema for job requirements that accepts various input formats.
+    
+    Uses flexible Union types for list fields to handle comma-separated strings
+    and normalizes them to List[str] via validators.
+    """
+    job_title: Optional[str] = Field(None, description="Job title or position name (optional)")
+    company: Optional[str] = Field(None, description="Company or organization name")
+    location: Optional[str] = Field(None, description="Job location (city, country, or remote)")
+    employment_type: Optional[str] = Field(None, description="Full-time, Part-time, Contract, Internship, etc.")
+    salary_range: Optional[str] = Field(None, description="Salary range if mentioned")
+    
+    # Requirements - accept flexible input types, validators will normalize to List[str]
+    required_skills: Union[str, List[str], None] = Field(default_factory=list, description="Required technical and professional skills")
+    preferred_skills: Union[str, List[str], None] = Field(default_factory=list, description="Preferred or nice-to-have skills")
+    required_experience: Optional[str] = Field(None, description="Required years of experience or experience level")
+    required_education: Optional[str] = Field(None, description="Required education level or degree")
+    education_field: Union[str, List[str], None] = Field(default_factory=list, description="Preferred fields of study if specified")
+    
+    # Additional requirements - accept flexible input types
+    languages: Union[str, List[str], None] = Field(default_factory=list, description="Required languages and proficiency levels")
+    certifications: Union[str, List[str], None] = Field(default_factory=list, description="Required certifications or licenses")
+    work_authorization: Optional[str] = Field(None, description="Work authorization requirements (visa, citizenship, etc.)")
+    
+    # Job details
+    job_description: Optional[str] = Field(None, description="Detailed job description or summary")
+    responsibilities: Union[str, List[str], None] = Field(default_factory=list, description="Key responsibilities and duties")
+    benefits: Union[str, List[str], None] = Field(default_factory=list, description="Benefits and perks offered")
+    
+    # Additional info
+    application_deadline: Optional[str] = Field(None, description="Application deadline if mentioned")
+    start_date: Optional[str] = Field(None, description="Expected start date if mentioned")
+    remote_option: Optional[Union[bool, str]] = Field(None, description="Whether remote work is available (can be bool or string)")
+    # Canonical skill ids from the skill taxonomy (not part of the LLM schema)
+    _required_skill_ids: List[SkillId] = PrivateAttr(default_factory=list)
+    _preferred_skill_ids: List[SkillId] = PrivateAttr(default_factory=list)
+    
+    @property
+    def required_skill_ids(self) -> List[SkillId]:
+        """Canonical taxonomy ids of `required_skills`."""
+        return self._required_skill_ids
+    
+    @property
+    def preferred_skill_ids(self) -> List[SkillId]:
+        """Canonical taxonomy ids of `preferred_skills`."""
+        return self._preferred_skill_ids
+    
+    @model_validator(mode='before')
+    def normalize_inputs(cls, data):
+        """Convert various input formats to expected types (single pass; normalized input is left as is)"""
+        return _normalize(data, _JOB_HANDLERS)
+    
+    @model_validator(mode='after')
+    def ensure_lists(self):
+        """Ensure list fields are always lists - final safety check, then resolve skill ids"""
+        for field_name in _JOB_LIST_FIELDS:
+            if type(getattr(self, field_name)) is not list:
+                setattr(self, field_name, [])
+        
+        self._required_skill_ids = skill_taxonomy.resolve_all(self.required_skills)
+        self._preferred_skill_ids = skill_taxonomy.resolve_all(self.preferred_skills)
+        return self
@@ -1,4 +1,6 @@
 from .doc_parser_agent import doc_parser_agent
 from .job_requirements_agent import job_requirements_agent
+from .match_scoring_agent import match_scoring_agent
+from .match_narrator_agent import match_narrator_agent
 
-__all__ = ["doc_parser_agent", "job_requirements_agent"]
\ No newline at end of file
+__all__ = ["doc_parser_agent", "job_requirements_agent", "match_scoring_agent", "match_narrator_agent"]
@@ -0,0 +1,244 @@
+"""
+Bulk Screening Agent - Parses many CVs against one job posting concurrently
+
+The job requirements are parsed once by job_requirements_agent. Every CV artifact in the
+session is then parsed with a direct structured-output model call, with at most
+BULK_SCREENING_CONCURRENCY parses in flight. One event is emitted per CV as soon as it
+finishes, so results stream in and the batch takes roughly as long as the slowest parse.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, AsyncGenerator, Dict, List
+
+from pydantic import Field, ValidationError
+
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.adk.models import LlmRequest
+from google.genai import types
+
+from ..callbacks.candidate_cache import candidate_cache
+from ..config import BULK_SCREENING_CONCURRENCY, BULK_CV_ARTIFACT_PATTERN, OUTPUT_REPAIR_REASK
+from ..schemas import CandidateInfoFlat
+from ..tools.artifact_tools import is_cv_artifact_name
+from ..tools.document_extraction import extract_part
+from ..utils.model_calls import generate_content
+from ..utils.parse_cache import part_content_hash
+from ..utils.structured_output import repair_structured_output
+
+logger = logging.getLogger(__name__)
+
+# Artifact types the CV parser can read
+CV_MIME_TYPES = (
+    "application/pdf",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "application/msword",
+    "text/",
+)
+
+# Session state keys written by the bulk screening agent
+CANDIDATE_STATE_PREFIX = "candidate:"
+BULK_SUMMARY_STATE_KEY = "bulk_screening_summary"
+
+BULK_CV_PARSER_INSTRUCTION = """
+You are a CV/Resume parser that extracts structured information from a single candidate document.
+
+## Your Task:
+Extract all relevant information from the CV/resume below and return it according to the output schema.
+
+## Important:
+- Only extract information that is clearly stated; leave fields as null/empty rather than guessing
+- Extract dates in their original format (don't convert)
+- For current positions, use "Present" as end_date
+- List skills as individual items, not comma-separated strings
+- **work_experience** and **education** must be lists of dictionaries with keys:
+  - work_experience: job_title, company, start_date, end_date, description
+  - education: degree, institution, field_of_study, graduation_year, gpa
+- Preserve the original wording from the CV when possible
+"""
+
+
+def _is_cv_artifact(part: types.Part) -> bool:
+    """Whether a loaded artifact is a document the CV parser can read."""
+    if part.text:
+        return True
+    mime_type = part.inline_data.mime_type if part.inline_data else None
+    return bool(mime_type) and mime_type.startswith(CV_MIME_TYPES)
+
+
+class BulkScreeningAgent(BaseAgent):
+    """Parses the job requirements once, then every uploaded CV concurrently."""
+
+    job_requirements_agent: BaseAgent
+    cv_parser_agent: LlmAgent = Field(description="Agent whose model parses each CV")
+    max_concurrency: int = BULK_SCREENING_CONCURRENCY
+    cv_artifact_pattern: str = BULK_CV_ARTIFACT_PATTERN
+
+    def __init__(self, job_requirements_agent: BaseAgent, cv_parser_agent: LlmAgent, **kwargs):
+        super().__init__(
+            job_requirements_agent=job_requirements_agent,
+            cv_parser_agent=cv_parser_agent,
+            sub_agents=[job_requirements_agent],
+            **kwargs,
+        )
+
+    async def _list_cv_artifacts(self, ctx: InvocationContext) -> List[str]:
+        if ctx.artifact_service is None:
+            return []
+        filenames = await ctx.artifact_service.list_artifact_keys(
+            app_name=ctx.app_name,
+            user_id=ctx.user_id,
+            session_id=ctx.session.id,
+        )
+        return sorted(
+            name
+            for name in filenames
+            if is_cv_artifact_name(name, ctx.session.state, self.cv_artifact_pattern)
+        )
+
+    async def _parse_cv(
+        self,
+        ctx: InvocationContext,
+        filename: str,
+        semaphore: asyncio.Semaphore,
+    ) -> Dict[str, Any]:
+        """Load one CV artifact and parse it into a CandidateInfoFlat dict."""
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                part = await ctx.artifact_service.load_artifact(
+                    app_name=ctx.app_name,
+                    user_id=ctx.user_id,
+                    session_id=ctx.session.id,
+                    filename=filename,
+                )
+                if part is None or not _is_cv_artifact(part):
+                    return {"filename": filename, "status": "skipped", "message": "Not a CV document"}
+
+                # Same CV already parsed under the current schema: no model call
+                cache_key = part_content_hash(part)
+                cached = await candidate_cache.get(cache_key) if cache_key else None
+                if cached is not None:
+                    return {
+                        "filename": filename,
+                        "status": "success",
+                        "candidate": cached.model_dump(),
+                        "content_hash": cache_key,
+                        "cached": True,
+                        "duration_ms": (time.perf_counter() - started) * 1000,
+                    }
+
+                # Send compact sectioned text when it can be extracted locally
+                extracted = await extract_part(part, filename)
+                if extracted is not None:
+                    part = types.Part.from_text(text=extracted["text"])
+
+                model = self.cv_parser_agent.canonical_model
+                llm_request = LlmRequest(
+                    model=model.model,
+                    contents=[
+                        types.Content(
+                            role="user",
+                            parts=[types.Part.from_text(text=f"CV file: {filename}"), part],
+                        )
+                    ],
+                    config=types.GenerateContentConfig(system_instruction=BULK_CV_PARSER_INSTRUCTION),
+                )
+                llm_request.set_output_schema(CandidateInfoFlat)
+
+                response_text = ""
+                async for llm_response in generate_content(model, llm_request):
+                    if llm_response.content and llm_response.content.parts:
+                        response_text += "".join(p.text or "" for p in llm_response.content.parts)
+
+                # Near-miss JSON is repaired locally; only unrecoverable fields are asked for again
+                candidate, repair = await repair_structured_output(
+                    response_text,
+                    CandidateInfoFlat,
+                    llm=model if OUTPUT_REPAIR_REASK else None,
+                    llm_request=llm_request,
+                )
+                if candidate is None:
+                    logger.error(f"Invalid parser output for {filename}: no candidate fields found")
+                    return {"filename": filename, "status": "error", "message": "Invalid parser output: no candidate fields found"}
+                if cache_key:
+                    await candidate_cache.put(cache_key, candidate)
+                return {
+                    "filename": filename,
+                    "status": "success",
+                    "candidate": candidate.model_dump(),
+                    "content_hash": cache_key,
+                    "cached": False,
+                    "text_extracted": extracted is not None,
+                    "repaired": repair["repaired"],
+                    "duration_ms": (time.perf_counter() - started) * 1000,
+                }
+            except ValidationError as e:
+                logger.error(f"Invalid parser output for {filename}: {e}")
+                return {"filename": filename, "status": "error", "message": f"Invalid parser output: {e}"}
+            except Exception as e:
+                logger.error(f"Failed to parse CV {filename}: {e}", exc_info=True)
+                return {"filename": filename, "status": "error", "message": str(e)}
+
+    def _event(self, ctx: InvocationContext, text: str, state_delta: Dict[str, Any]) -> Event:
+        return Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part.from_text(text=text)]),
+            actions=EventActions(state_delta=state_delta),
+        )
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        batch_started = time.perf_counter()
+
+        # 1. Parse the job requirements once for the whole batch
+        async for event in self.job_requirements_agent.run_async(ctx):
+            yield event
+
+        # 2. Fan out CV parsing with bounded concurrency, streaming each result
+        filenames = await self._list_cv_artifacts(ctx)
+        if not filenames:
+            yield self._event(ctx, "No CV artifacts found to screen.", {})
+            return
+
+        logger.info(f"Bulk screening {len(filenames)} CV artifact(s) (concurrency {self.max_concurrency})")
+        semaphore = asyncio.Semaphore(max(1, self.max_concurrency))
+        tasks = [asyncio.create_task(self._parse_cv(ctx, name, semaphore)) for name in filenames]
+
+        statuses: Dict[str, str] = {}
+        try:
+            for completed, next_result in enumerate(asyncio.as_completed(tasks), start=1):
+                result = await next_result
+                statuses[result["filename"]] = result["status"]
+
+                if result["status"] == "success":
+                    name = result["candidate"].get("name") or "unknown candidate"
+                    text = f"[{completed}/{len(tasks)}] Parsed {result['filename']}: {name}"
+                else:
+                    text = f"[{completed}/{len(tasks)}] {result['filename']} {result['status']}: {result['message']}"
+
+                # Tagged with the run, so later runs in the session don't score stale results
+                state_value = {**result, "invocation_id": ctx.invocation_id}
+                yield self._event(ctx, text, {f"{CANDIDATE_STATE_PREFIX}{result['filename']}": state_value})
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        summary = {
+            "total": len(filenames),
+            "succeeded": sum(1 for status in statuses.values() if status == "success"),
+            "failed": sum(1 for status in statuses.values() if status == "error"),
+            "skipped": sum(1 for status in statuses.values() if status == "skipped"),
+            "statuses": statuses,
+            "duration_ms": (time.perf_counter() - batch_started) * 1000,
+        }
+        yield self._event(
+            ctx,
+            f"Bulk screening finished: {summary['succeeded']}/{summary['total']} CV(s) parsed "
+            f"in {summary['duration_ms'] / 1000:.1f}s",
+            {BULK_SUMMARY_STATE_KEY: summary},
+        )
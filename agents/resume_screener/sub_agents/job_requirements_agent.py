@@ -2,103 +2,17 @@
 Job Requirements Parser Agent - Extracts structured data from job postings or requirement documents
 """
 
-from typing import List, Optional, Union
-from pydantic import BaseModel, Field, model_validator
-
 from google.adk.agents import LlmAgent
 from google.adk.tools import load_artifacts, url_context
 
+from ..callbacks import job_requirements_cache
+from ..callbacks.output_repair import OutputRepair
 from ..config.llm import FAST_MODEL
+from ..schemas import JobRequirement
 from ..tools.artifact_tools import save_artifact
 
-class JobRequirement(BaseModel):
-    """Simple, flexible schema for job requirements that accepts various input formats.
-    
-    Uses flexible Union types for list fields to handle comma-separated strings
-    and normalizes them to List[str] via validators.
-    """
-    job_title: Optional[str] = Field(None, description="Job title or position name (optional)")
-    company: Optional[str] = Field(None, description="Company or organization name")
-    location: Optional[str] = Field(None, description="Job location (city, country, or remote)")
-    employment_type: Optional[str] = Field(None, description="Full-time, Part-time, Contract, Internship, etc.")
-    salary_range: Optional[str] = Field(None, description="Salary range if mentioned")
-    
-    # Requirements - accept flexible input types, validators will normalize to List[str]
-    required_skills: Union[str, List[str], None] = Field(default_factory=list, description="Required technical and professional skills")
-    preferred_skills: Union[str, List[str], None] = Field(default_factory=list, description="Preferred or nice-to-have skills")
-    required_experience: Optional[str] = Field(None, description="Required years of experience or experience level")
-    required_education: Optional[str] = Field(None, description="Required education level or degree")
-    education_field: Union[str, List[str], None] = Field(default_factory=list, description="Preferred fields of study if specified")
-    
-    # Additional requirements - accept flexible input types
-    languages: Union[str, List[str], None] = Field(default_factory=list, description="Required languages and proficiency levels")
-    certifications: Union[str, List[str], None] = Field(default_factory=list, description="Required certifications or licenses")
-    work_authorization: Optional[str] = Field(None, description="Work authorization requirements (visa, citizenship, etc.)")
-    
-    # Job details
-    job_description: Optional[str] = Field(None, description="Detailed job description or summary")
-    responsibilities: Union[str, List[str], None] = Field(default_factory=list, description="Key responsibilities and duties")
-    benefits: Union[str, List[str], None] = Field(default_factory=list, description="Benefits and perks offered")
-    
-    # Additional info
-    application_deadline: Optional[str] = Field(None, description="Application deadline if mentioned")
-    start_date: Optional[str] = Field(None, description="Expected start date if mentioned")
-    remote_option: Optional[Union[bool, str]] = Field(None, description="Whether remote work is available (can be bool or string)")
-    
-    @model_validator(mode='before')
-    def normalize_inputs(cls, data):
-        """Convert various input formats to expected types"""
-        if not isinstance(data, dict):
-            return data
-        
-        # List fields that can be strings - convert comma-separated strings to lists
-        list_fields = [
-            'required_skills', 'preferred_skills', 'education_field',
-            'languages', 'certifications', 'responsibilities', 'benefits'
-        ]
-        
-        for field in list_fields:
-            if field in data and isinstance(data[field], str):
-                data[field] = [s.strip() for s in data[field].split(',') if s.strip()]
-        
-        # Normalize location from dict to string
-        if 'location' in data and isinstance(data['location'], dict):
-            parts = []
-            if "city" in data['location']:
-                parts.append(str(data['location']["city"]))
-            if "country" in data['location']:
-                parts.append(str(data['location']["country"]))
-            data['location'] = ", ".join(parts) if parts else None
-        
-        return data
-    
-    @model_validator(mode='after')
-    def ensure_lists(self):
-        """Ensure list fields are always lists - final safety check"""
-        list_fields = {
-            'required_skills': self.required_skills,
-            'preferred_skills': self.preferred_skills,
-            'education_field': self.education_field,
-            'languages': self.languages,
-            'certifications': self.certifications,
-            'responsibilities': self.responsibilities,
-            'benefits': self.benefits,
-        }
-        
-        for field_name, field_value in list_fields.items():
-            if field_value is None:
-                setattr(self, field_name, [])
-            elif isinstance(field_value, str):
-                setattr(self, field_name, [s.strip() for s in field_value.split(',') if s.strip()])
-            elif not isinstance(field_value, list):
-                setattr(self, field_name, [])
-        
-        # Normalize remote_option if it's a string
-        if isinstance(self.remote_option, str):
-            self.remote_option = self.remote_option.lower() in ("true", "yes", "1", "remote", "available")
-        
-        return self
-
+# Repairs near-miss structured output locally instead of failing the run
+output_repair = OutputRepair(JobRequirement, FAST_MODEL)
 
 job_requirements_agent = LlmAgent(
     name="job_requirements_parser",
@@ -106,6 +20,11 @@ job_requirements_agent = LlmAgent(
     description="AI agent that parses job requirements from text, documents, or web URLs and extracts structured information",
     tools=[save_artifact, load_artifacts, url_context],
     output_schema=JobRequirement,
+    output_key="job_requirements",  # Shared with the bulk screening and matching stages
+    before_agent_callback=job_requirements_cache.before_agent_callback,  # Cache lookup/revalidation
+    after_agent_callback=job_requirements_cache.after_agent_callback,  # Cache write
+    before_model_callback=output_repair.before_model_callback,  # Keeps the request for a targeted re-ask
+    after_model_callback=output_repair.after_model_callback,  # Local JSON repair
     instruction="""
 You are a Job Requirements Parser that extracts structured information from job postings, job descriptions, or requirement documents.
 
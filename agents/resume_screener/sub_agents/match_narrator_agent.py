@@ -0,0 +1,16 @@
+"""
+Match Narrator Agent - Explains the precomputed match ranking to the recruiter
+"""
+
+from google.adk.agents import LlmAgent
+
+from ..config.llm import FAST_MODEL
+from ..prompt.prompt import prompt_v1
+
+match_narrator_agent = LlmAgent(
+    name="match_narrator_agent",
+    model=FAST_MODEL,
+    description="Presents the deterministic match scores and evidence as a screening report",
+    instruction=prompt_v1,
+    include_contents="none",  # Everything it needs is in state["match_results"]
+)
@@ -0,0 +1,142 @@
+"""
+Match Scoring Agent - Ranks parsed candidates against the parsed job without an LLM
+
+Reads state["job_requirements"] and the parsed candidates (state["candidate_info"] in
+single mode, state["candidate:<filename>"] in bulk mode), scores them with the local
+matching engine and writes the ranking to state for the narrator. The partial scores
+are kept in state["match_partial_scores"], so when the recruiter edits the job and the
+same candidates are scored again, only the changed components are recomputed.
+"""
+
+import asyncio
+import logging
+from typing import Any, AsyncGenerator, Dict, List, Tuple
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+
+from ..config import MATCH_NARRATE_TOP_K
+from ..matching import PartialScores, get_candidate_pool, rank_candidates
+
+logger = logging.getLogger(__name__)
+
+# Session state keys read and written by the scoring agent
+JOB_REQUIREMENTS_STATE_KEY = "job_requirements"
+CANDIDATE_INFO_STATE_KEY = "candidate_info"
+CANDIDATE_STATE_PREFIX = "candidate:"
+MATCH_RESULTS_STATE_KEY = "match_results"
+MATCH_RANKING_STATE_KEY = "match_ranking"
+MATCH_PARTIAL_SCORES_STATE_KEY = "match_partial_scores"
+# Written by the candidate cache: content hash of the single CV screened in this run
+CV_SOURCE_STATE_KEY = "temp:cv_source"
+
+
+def collect_candidates(state: Dict[str, Any], invocation_id: str) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Parsed candidates of the current run: its bulk results if any, else the single candidate.
+
+    Bulk results of earlier runs stay in session state; they are ignored, so a later
+    single-CV screening in the same session scores the new CV.
+    """
+    candidates = [
+        (key[len(CANDIDATE_STATE_PREFIX):], value["candidate"])
+        for key, value in state.items()
+        if key.startswith(CANDIDATE_STATE_PREFIX)
+        and isinstance(value, dict)
+        and value.get("status") == "success"
+        and value.get("invocation_id") == invocation_id
+    ]
+    if not candidates and state.get(CANDIDATE_INFO_STATE_KEY):
+        candidates = [(CANDIDATE_INFO_STATE_KEY, state[CANDIDATE_INFO_STATE_KEY])]
+    return candidates
+
+
+def cv_content_hashes(state: Dict[str, Any], invocation_id: str) -> Dict[str, str]:
+    """Content hash of each current-run candidate's CV, by candidate source (when known)."""
+    hashes = {
+        key[len(CANDIDATE_STATE_PREFIX):]: value["content_hash"]
+        for key, value in state.items()
+        if key.startswith(CANDIDATE_STATE_PREFIX)
+        and isinstance(value, dict)
+        and value.get("invocation_id") == invocation_id
+        and value.get("content_hash")
+    }
+    single = state.get(CV_SOURCE_STATE_KEY)
+    if isinstance(single, dict) and single.get("invocation_id") == invocation_id and single.get("content_hash"):
+        hashes[CANDIDATE_INFO_STATE_KEY] = single["content_hash"]
+    return hashes
+
+
+async def add_to_pool(candidates: List[Tuple[str, Dict[str, Any]]], content_hashes: Dict[str, str]) -> None:
+    """Keep scored candidates searchable across sessions (see matching/candidate_pool.py)."""
+    pool = get_candidate_pool()
+    if pool is None:
+        return
+    # Pool ids are the CVs' content hashes, so re-screening a CV updates its entry even when
+    # the model parses it slightly differently; candidates without a known CV are left out
+    entries = [
+        (candidate, content_hashes[source], source) for source, candidate in candidates if source in content_hashes
+    ]
+    if len(entries) < len(candidates):
+        logger.info(f"Not pooling {len(candidates) - len(entries)} candidate(s) without a CV content hash")
+    if not entries:
+        return
+    try:
+        await asyncio.to_thread(pool.add_many, entries)
+    except Exception as e:
+        logger.warning(f"Could not add candidates to the pool: {e}")
+
+
+class MatchScoringAgent(BaseAgent):
+    """Deterministic scoring step between the parsers and the narrator."""
+
+    top_k: int = MATCH_NARRATE_TOP_K
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        state = ctx.session.state
+        job = state.get(JOB_REQUIREMENTS_STATE_KEY)
+        candidates = collect_candidates(state, ctx.invocation_id)
+
+        if not job or not candidates:
+            missing = "job requirements" if not job else "parsed candidates"
+            text = f"Cannot score yet: no {missing} in this session."
+            state_delta = {MATCH_RESULTS_STATE_KEY: {"error": text}}
+        else:
+            partials = PartialScores.from_state(state.get(MATCH_PARTIAL_SCORES_STATE_KEY), candidates)
+            ranking = rank_candidates(job, candidates, partial_scores=partials)
+            await add_to_pool(candidates, cv_content_hashes(state, ctx.invocation_id))
+            results = ranking["results"]
+            logger.info(
+                f"Scored {len(results)} candidate(s) against {ranking['job']['job_title']} "
+                f"(re-scored: {', '.join(partials.rescored) or 'none'})"
+            )
+
+            # The narrator only needs the best candidates; the full ranking stays compact
+            state_delta = {
+                MATCH_RESULTS_STATE_KEY: {**ranking, "results": results[: self.top_k]},
+                MATCH_RANKING_STATE_KEY: [
+                    {"candidate_id": r["candidate_id"], "name": r["name"], "score": r["score"]} for r in results
+                ],
+                MATCH_PARTIAL_SCORES_STATE_KEY: partials.to_state(),
+            }
+            best = results[0]
+            text = (
+                f"Scored {len(results)} candidate(s); best match: "
+                f"{best['name'] or best['candidate_id']} ({best['score']}%)"
+            )
+
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part.from_text(text=text)]),
+            actions=EventActions(state_delta=state_delta),
+        )
+
+
+match_scoring_agent = MatchScoringAgent(
+    name="match_scoring_agent",
+    description="Scores parsed candidates against the parsed job requirements with the local matching engine",
+)
@@ -5,7 +5,11 @@ Resume Screener Agent Tools package.
 # Artifact tools
 from .artifact_tools import save_artifact, load_artifact
 
+# Document extraction tools
+from .document_extraction import extract_cv_text
+
 __all__ = [
     "save_artifact",
     "load_artifact",
+    "extract_cv_text",
 ]
@@ -2,11 +2,42 @@
 Artifact management tools for saving and loading documents.
 """
 
-from typing import Dict, Any, Optional
+import fnmatch
+from typing import Dict, Any, Mapping, Optional
 from google.genai import types
 from google.adk.tools import FunctionTool, load_artifacts
 from google.adk.tools.tool_context import ToolContext
 
+from ..config import BULK_CV_ARTIFACT_PATTERN, BULK_JOB_ARTIFACT_PATTERN
+
+# Session state key listing the artifacts written by save_artifact (never uploaded CVs)
+SAVED_ARTIFACTS_STATE_KEY = "saved_artifacts"
+
+
+def _matches_any(filename: str, patterns: str) -> bool:
+    name = filename.lower()
+    return any(
+        fnmatch.fnmatchcase(name, pattern.strip().lower())
+        for pattern in patterns.split(",")
+        if pattern.strip()
+    )
+
+
+def is_cv_artifact_name(
+    filename: str,
+    state: Optional[Mapping[str, Any]] = None,
+    cv_pattern: str = BULK_CV_ARTIFACT_PATTERN,
+) -> bool:
+    """
+    Whether a session artifact should be screened as a CV.
+
+    The name must match one of the CV patterns and none of the job posting patterns,
+    and the artifact must not have been written by an agent through save_artifact.
+    """
+    if state is not None and filename in (state.get(SAVED_ARTIFACTS_STATE_KEY) or ()):
+        return False
+    return _matches_any(filename, cv_pattern) and not _matches_any(filename, BULK_JOB_ARTIFACT_PATTERN)
+
 
 async def save_artifact_tool(
     filename: str,
@@ -54,6 +85,9 @@ async def save_artifact_tool(
             filename=filename,
             artifact=artifact_part
         )
+        saved = list(tool_context.state.get(SAVED_ARTIFACTS_STATE_KEY) or [])
+        if filename not in saved:
+            tool_context.state[SAVED_ARTIFACTS_STATE_KEY] = saved + [filename]
         
         return {
             "status": "success",
@@ -0,0 +1,262 @@
+"""
+Local text extraction for CV documents.
+
+Sending a raw PDF/DOCX to the model bills the whole document as multimodal input. This
+module extracts the text locally instead (PDF via pypdf, DOCX from its XML, TXT as is),
+splits it into the usual CV sections (Experience, Education, Skills, ...) and renders
+a compact sectioned text for the model.
+
+Parsing is CPU-bound, so it runs in a process pool. Results are cached by the SHA-256
+of the document bytes, so the same CV is only extracted once per process.
+"""
+
+import asyncio
+import hashlib
+import io
+import logging
+import re
+import time
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from xml.etree import ElementTree
+
+from google.adk.tools import FunctionTool
+from google.adk.tools.tool_context import ToolContext
+from google.genai import types
+
+from ..config import CV_EXTRACTION_WORKERS, CV_EXTRACTION_CACHE_SIZE
+
+# Optional: pypdf is only needed for PDF documents.
+try:
+    from pypdf import PdfReader
+except ModuleNotFoundError:
+    PdfReader = None
+
+logger = logging.getLogger(__name__)
+
+PDF_MIME_TYPE = "application/pdf"
+DOCX_MIME_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+EXTENSION_MIME_TYPES = {
+    ".pdf": PDF_MIME_TYPE,
+    ".docx": DOCX_MIME_TYPE,
+    ".txt": "text/plain",
+    ".md": "text/markdown",
+}
+
+# Canonical section name -> header keywords (matched on short lines only)
+SECTION_HEADERS = {
+    "summary": r"summary|profile|professional summary|about me|objective|career objective",
+    "experience": r"experience|work experience|professional experience|employment|employment history|work history|career history",
+    "education": r"education|academic background|qualifications|education and training",
+    "skills": r"skills|technical skills|core skills|key skills|competencies|core competencies|technologies|tech stack",
+    "languages": r"languages|language skills",
+    "certifications": r"certifications|certificates|licenses|licenses and certifications|courses",
+    "projects": r"projects|personal projects|selected projects",
+}
+
+_HEADER_PATTERN = re.compile(
+    r"^\s*(?:" + "|".join(f"(?P<{name}>{pattern})" for name, pattern in SECTION_HEADERS.items()) + r")\s*:?\s*$",
+    re.IGNORECASE,
+)
+_MAX_HEADER_LENGTH = 40
+
+_WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+_executor: Optional[ProcessPoolExecutor] = None
+_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    """Create the shared process pool on first use."""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=max(1, CV_EXTRACTION_WORKERS))
+    return _executor
+
+
+def _pdf_lines(data: bytes) -> Tuple[List[str], int]:
+    if PdfReader is None:
+        raise RuntimeError("pypdf is not installed; cannot extract text from PDF documents")
+    reader = PdfReader(io.BytesIO(data))
+    lines = []
+    for page in reader.pages:
+        lines.extend((page.extract_text() or "").splitlines())
+    return lines, len(reader.pages)
+
+
+def _docx_lines(data: bytes) -> List[str]:
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        root = ElementTree.fromstring(archive.read("word/document.xml"))
+    lines = []
+    for paragraph in root.iter(f"{_WORD_NS}p"):
+        text = "".join(node.text or "" for node in paragraph.iter(f"{_WORD_NS}t"))
+        lines.append(text)
+    return lines
+
+
+def _split_sections(lines: List[str]) -> Dict[str, str]:
+    """Group lines under the last recognized section header ("header" before the first one)."""
+    sections: Dict[str, List[str]] = {"header": []}
+    current = "header"
+    for raw_line in lines:
+        line = " ".join(raw_line.split())
+        if not line:
+            continue
+        if len(line) <= _MAX_HEADER_LENGTH:
+            match = _HEADER_PATTERN.match(line)
+            if match:
+                current = match.lastgroup
+                sections.setdefault(current, [])
+                continue
+        sections[current].append(line)
+    return {name: "\n".join(body) for name, body in sections.items() if body}
+
+
+def _extract(data: bytes, mime_type: str) -> Dict[str, Any]:
+    """Extract and section a document (runs in a worker process)."""
+    started = time.perf_counter()
+    page_count = None
+    if mime_type == PDF_MIME_TYPE:
+        lines, page_count = _pdf_lines(data)
+    elif mime_type == DOCX_MIME_TYPE:
+        lines = _docx_lines(data)
+    elif mime_type.startswith("text/"):
+        lines = data.decode("utf-8", errors="replace").splitlines()
+    else:
+        raise ValueError(f"Unsupported document type: {mime_type}")
+
+    sections = _split_sections(lines)
+    text = "\n\n".join(
+        body if name == "header" else f"## {name.title()}\n{body}" for name, body in sections.items()
+    )
+    return {
+        "format": mime_type,
+        "page_count": page_count,
+        "sections": sections,
+        "text": text,
+        "char_count": len(text),
+        "extraction_ms": (time.perf_counter() - started) * 1000,
+    }
+
+
+def guess_mime_type(filename: str, mime_type: Optional[str] = None) -> Optional[str]:
+    """Use the declared MIME type, falling back to the filename extension."""
+    if mime_type and mime_type != "application/octet-stream":
+        return mime_type
+    for extension, guessed in EXTENSION_MIME_TYPES.items():
+        if filename.lower().endswith(extension):
+            return guessed
+    return mime_type
+
+
+async def extract_document(data: bytes, mime_type: str) -> Dict[str, Any]:
+    """
+    Extract sectioned text from a PDF, DOCX or text document.
+
+    Args:
+        data: Raw document bytes
+        mime_type: Document MIME type
+
+    Returns:
+        Dict with "sha256", "format", "sections", "text" (compact sectioned rendering),
+        "char_count", "page_count", "extraction_ms" and "cached"
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    cached = _cache.get(digest)
+    if cached is not None:
+        _cache.move_to_end(digest)
+        return {**cached, "cached": True}
+
+    loop = asyncio.get_running_loop()
+    result = await loop.run_in_executor(_get_executor(), _extract, data, mime_type)
+    result["sha256"] = digest
+
+    _cache[digest] = result
+    while len(_cache) > max(0, CV_EXTRACTION_CACHE_SIZE):
+        _cache.popitem(last=False)
+    return {**result, "cached": False}
+
+
+async def extract_part(part: types.Part, filename: str) -> Optional[Dict[str, Any]]:
+    """
+    Extract sectioned text from an artifact Part.
+
+    Returns:
+        The extraction result, or None if the part has no extractable text (for example a
+        scanned PDF or an image); callers should then fall back to the raw document
+    """
+    if part.text:
+        data, mime_type = part.text.encode("utf-8"), "text/plain"
+    elif part.inline_data and part.inline_data.data:
+        data = part.inline_data.data
+        mime_type = guess_mime_type(filename, part.inline_data.mime_type)
+    else:
+        return None
+
+    if not mime_type or not (mime_type in (PDF_MIME_TYPE, DOCX_MIME_TYPE) or mime_type.startswith("text/")):
+        return None
+
+    try:
+        result = await extract_document(data, mime_type)
+    except Exception as e:
+        logger.warning(f"Local text extraction failed for {filename}: {e}")
+        return None
+    return result if result["text"].strip() else None
+
+
+async def extract_cv_text_tool(
+    filename: str,
+    tool_context: Optional[ToolContext] = None,
+) -> Dict[str, Any]:
+    """
+    Extract the text of an uploaded CV artifact, split into sections.
+
+    Reads PDF, DOCX and text artifacts locally and returns compact text with section
+    headings (Experience, Education, Skills, ...). Use this instead of loading the raw
+    document. If it reports status "no_text" (e.g. a scanned PDF), load the artifact
+    with load_artifacts instead.
+
+    Args:
+        filename: Name of the CV artifact (e.g. "cv.pdf")
+        tool_context: Tool context (automatically provided)
+
+    Returns:
+        Dict with status, filename, sections (names found), text and char_count
+    """
+    if not tool_context:
+        return {"status": "error", "message": "Tool context not available"}
+
+    try:
+        part = await tool_context.load_artifact(filename=filename)
+        if part is None:
+            return {"status": "error", "message": f"Artifact '{filename}' not found"}
+
+        result = await extract_part(part, filename)
+        if result is None:
+            return {
+                "status": "no_text",
+                "filename": filename,
+                "message": "No text could be extracted locally. Use load_artifacts to read the document.",
+            }
+
+        logger.info(
+            f"Extracted {result['char_count']} chars from {filename} "
+            f"(sections: {list(result['sections'])}, cached: {result['cached']})"
+        )
+        return {
+            "status": "success",
+            "filename": filename,
+            "sections": list(result["sections"]),
+            "text": result["text"],
+            "char_count": result["char_count"],
+        }
+    except Exception as e:
+        logger.error(f"Error extracting text from {filename}: {e}", exc_info=True)
+        return {"status": "error", "message": f"Failed to extract text: {str(e)}"}
+
+
+# Create FunctionTool instance
+extract_cv_text = FunctionTool(extract_cv_text_tool)
@@ -0,0 +1,34 @@
+"""
+Direct model calls made outside the LLM flow (bulk CV parses, structured output re-asks).
+
+Those calls skip the model callbacks, so the server's MetricsPlugin never sees them. A
+server can hand in its own recorder through register_server_hooks (run_adk.py does when
+it loads the agent); without one, generate_content calls the model directly.
+"""
+
+from typing import AsyncGenerator, Callable, Optional
+
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+
+GenerateContent = Callable[[BaseLlm, LlmRequest], AsyncGenerator[LlmResponse, None]]
+
+_recorded_generate_content: Optional[GenerateContent] = None
+
+
+def register_server_hooks(generate_content: Optional[GenerateContent] = None, **_) -> None:
+    """
+    Install hooks from the serving process; hooks this agent doesn't use are ignored.
+
+    Args:
+        generate_content: Replacement for llm.generate_content_async(llm_request) that
+            records the call (e.g. in the server's model metrics)
+    """
+    global _recorded_generate_content
+    _recorded_generate_content = generate_content
+
+
+def generate_content(llm: BaseLlm, llm_request: LlmRequest) -> AsyncGenerator[LlmResponse, None]:
+    """llm.generate_content_async, through the server's recorder when one is registered."""
+    if _recorded_generate_content is None:
+        return llm.generate_content_async(llm_request)
+    return _recorded_generate_content(llm, llm_request)
@@ -0,0 +1,277 @@
+"""
+Persistent cache of structured parse results.
+
+The same CV is often screened against several openings. Parsed results are stored under
+the SHA-256 of the document bytes plus a version hash of the output schema, so a repeat
+parse is a lookup instead of an LLM call, and any change to the schema (fields,
+descriptions, types) naturally misses the old entries.
+
+Backends (opened on first use):
+- "sqlite" (default): local file at PARSE_CACHE_DB_PATH
+- "postgres": the database behind SESSION_SERVICE_URI, through an asyncpg pool, with the
+  same SESSION_DB_SSL setting as the session service
+- "none": caching disabled
+
+Entries of other schema versions are left alone while a rolling deploy may still run
+workers on them; they're pruned once older than PARSE_CACHE_PRUNE_AFTER_DAYS.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional, Type
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from google.genai import types
+from pydantic import BaseModel
+
+from ..config import (
+    PARSE_CACHE_BACKEND,
+    PARSE_CACHE_DB_PATH,
+    PARSE_CACHE_PRUNE_AFTER_DAYS,
+    SESSION_DB_SSL,
+    SESSION_SERVICE_URI,
+)
+
+# Optional: asyncpg is only needed for the Postgres backend.
+try:
+    import asyncpg
+except ModuleNotFoundError:
+    asyncpg = None
+
+logger = logging.getLogger(__name__)
+
+_CREATE_TABLE = """
+CREATE TABLE IF NOT EXISTS parse_cache (
+    namespace TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    schema_version TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at DOUBLE PRECISION NOT NULL,
+    PRIMARY KEY (namespace, content_hash, schema_version)
+)
+"""
+
+
+def content_hash(data: bytes) -> str:
+    """SHA-256 hex digest of a document's bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def part_content_hash(part: types.Part) -> Optional[str]:
+    """SHA-256 of an artifact Part's document bytes (or text), None if it has neither."""
+    if part.inline_data and part.inline_data.data:
+        return content_hash(part.inline_data.data)
+    if part.text:
+        return content_hash(part.text.encode("utf-8"))
+    return None
+
+
+def asyncpg_dsn(uri: str) -> str:
+    """
+    Plain postgresql:// DSN for asyncpg from a SQLAlchemy-style session URI.
+
+    The driver suffix (postgresql+asyncpg://) is dropped, and so are the libpq-only
+    sslmode/channel_binding arguments: SSL is passed to asyncpg separately.
+    """
+    parsed = urlsplit(uri)
+    scheme = "postgresql" if parsed.scheme.split("+")[0] in ("postgres", "postgresql") else parsed.scheme
+    qs = parse_qsl(parsed.query, keep_blank_values=True)
+    filtered = [(k, v) for (k, v) in qs if k.lower() not in {"sslmode", "channel_binding", "channelbinding"}]
+    return urlunsplit(parsed._replace(scheme=scheme, query=urlencode(filtered)))
+
+
+def schema_version(model: Type[BaseModel]) -> str:
+    """Short hash of a model's JSON schema; changes whenever the schema changes."""
+    schema = json.dumps(model.model_json_schema(), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(schema.encode("utf-8")).hexdigest()[:16]
+
+
+class SqliteParseCache:
+    """Parse cache in a local SQLite file (blocking; called through a thread)."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(_CREATE_TABLE)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """A connection that commits on success and is always closed."""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _get(self, namespace: str, key: str, version: str) -> Optional[str]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT payload FROM parse_cache WHERE namespace = ? AND content_hash = ? AND schema_version = ?",
+                (namespace, key, version),
+            ).fetchone()
+        return row[0] if row else None
+
+    def _put(self, namespace: str, key: str, version: str, payload: str) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO parse_cache VALUES (?, ?, ?, ?, ?)",
+                (namespace, key, version, payload, time.time()),
+            )
+
+    def _prune(self, namespace: str, version: str, before: float) -> int:
+        with self._connect() as conn:
+            return conn.execute(
+                "DELETE FROM parse_cache WHERE namespace = ? AND schema_version != ? AND created_at < ?",
+                (namespace, version, before),
+            ).rowcount
+
+    async def get(self, namespace: str, key: str, version: str) -> Optional[str]:
+        return await asyncio.to_thread(self._get, namespace, key, version)
+
+    async def put(self, namespace: str, key: str, version: str, payload: str) -> None:
+        await asyncio.to_thread(self._put, namespace, key, version, payload)
+
+    async def prune(self, namespace: str, version: str, before: float) -> int:
+        return await asyncio.to_thread(self._prune, namespace, version, before)
+
+
+class PostgresParseCache:
+    """Parse cache in Postgres, sharing the session database."""
+
+    def __init__(self, uri: str):
+        self.dsn = asyncpg_dsn(uri)
+        self._pool = None
+        self._pool_lock: Optional[asyncio.Lock] = None
+
+    async def _get_pool(self):
+        if self._pool is not None:
+            return self._pool
+        if self._pool_lock is None:
+            self._pool_lock = asyncio.Lock()
+        async with self._pool_lock:
+            if self._pool is None:
+                pool = await asyncpg.create_pool(self.dsn, min_size=1, max_size=4, ssl=SESSION_DB_SSL or None)
+                async with pool.acquire() as conn:
+                    await conn.execute(_CREATE_TABLE)
+                self._pool = pool
+        return self._pool
+
+    async def get(self, namespace: str, key: str, version: str) -> Optional[str]:
+        pool = await self._get_pool()
+        return await pool.fetchval(
+            "SELECT payload FROM parse_cache WHERE namespace = $1 AND content_hash = $2 AND schema_version = $3",
+            namespace,
+            key,
+            version,
+        )
+
+    async def put(self, namespace: str, key: str, version: str, payload: str) -> None:
+        pool = await self._get_pool()
+        await pool.execute(
+            """
+            INSERT INTO parse_cache VALUES ($1, $2, $3, $4, $5)
+            ON CONFLICT (namespace, content_hash, schema_version)
+            DO UPDATE SET payload = EXCLUDED.payload, created_at = EXCLUDED.created_at
+            """,
+            namespace,
+            key,
+            version,
+            payload,
+            time.time(),
+        )
+
+    async def prune(self, namespace: str, version: str, before: float) -> int:
+        pool = await self._get_pool()
+        status = await pool.execute(
+            "DELETE FROM parse_cache WHERE namespace = $1 AND schema_version != $2 AND created_at < $3",
+            namespace,
+            version,
+            before,
+        )
+        return int(status.split()[-1])
+
+
+class ModelParseCache:
+    """Typed view of the parse cache for one pydantic model."""
+
+    def __init__(self, namespace: str, model: Type[BaseModel]):
+        self.namespace = namespace
+        self.model = model
+        self.version = schema_version(model)
+        self._pruned = False
+
+    @property
+    def backend(self):
+        return _get_backend()
+
+    async def get(self, key: str) -> Optional[BaseModel]:
+        """Return the cached, validated model for `key`, or None on a miss."""
+        backend = self.backend
+        if backend is None:
+            return None
+        try:
+            if not self._pruned and PARSE_CACHE_PRUNE_AFTER_DAYS > 0:
+                # Entries of other schema versions can't hit here; once old enough, no
+                # worker of a rolling deploy still writes or reads them either
+                self._pruned = True
+                before = time.time() - PARSE_CACHE_PRUNE_AFTER_DAYS * 86400
+                removed = await backend.prune(self.namespace, self.version, before)
+                if removed:
+                    logger.info(f"Pruned {removed} {self.namespace} cache entries from other schema versions")
+            payload = await backend.get(self.namespace, key, self.version)
+            return self.model.model_validate_json(payload) if payload else None
+        except Exception as e:
+            logger.warning(f"Parse cache lookup failed ({self.namespace}): {e}")
+            return None
+
+    async def put(self, key: str, value: BaseModel) -> None:
+        backend = self.backend
+        if backend is None:
+            return
+        try:
+            await backend.put(self.namespace, key, self.version, value.model_dump_json())
+        except Exception as e:
+            logger.warning(f"Parse cache write failed ({self.namespace}): {e}")
+
+
+def _create_backend():
+    if PARSE_CACHE_BACKEND == "none":
+        return None
+    if PARSE_CACHE_BACKEND == "postgres":
+        if asyncpg is None or not SESSION_SERVICE_URI:
+            logger.warning("Postgres parse cache needs asyncpg and SESSION_SERVICE_URI; falling back to SQLite")
+        else:
+            return PostgresParseCache(SESSION_SERVICE_URI)
+    return SqliteParseCache(PARSE_CACHE_DB_PATH)
+
+
+_backend = None
+_backend_created = False
+
+
+def _get_backend():
+    """The configured backend, opened on first use (once per process)."""
+    global _backend, _backend_created
+    if not _backend_created:
+        _backend_created = True
+        try:
+            _backend = _create_backend()
+        except Exception as e:
+            logger.error(f"Could not open parse cache ({PARSE_CACHE_BACKEND}): {e}", exc_info=True)
+            _backend = None
+    return _backend
+
+
+def get_parse_cache(namespace: str, model: Type[BaseModel]) -> ModelParseCache:
+    """Return a cache for `model` entries under `namespace`; the backend opens on first use."""
+    return ModelParseCache(namespace, model)
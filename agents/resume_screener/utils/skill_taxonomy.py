@@ -0,0 +1,206 @@
+"""
+Skill taxonomy: maps free-text skills to canonical integer ids.
+
+"JS", "JavaScript" and "ECMAScript" are the same skill, but plain string splitting
+never matches them. The taxonomy (data/skill_taxonomy.json, optionally extended by
+SKILL_TAXONOMY_PATH) lists each canonical skill with its aliases:
+
+- an exact alias table resolves a normalized skill string in one dict lookup,
+- an Aho-Corasick automaton over the aliases finds skills inside longer phrases
+  ("5 years of ReactJS and Node" -> react, node.js) in a single pass over the text.
+
+Skills the taxonomy doesn't know are identified by their normalized text instead of
+being added to the taxonomy, so the shared tables stay fixed in size and matching is
+set intersection on ids (integers, or strings for unknown skills).
+"""
+
+import json
+import logging
+import os
+import threading
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from ..config import SKILL_TAXONOMY_PATH
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TAXONOMY_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "skill_taxonomy.json")
+
+# A taxonomy skill's integer id, or the normalized text of a skill the taxonomy doesn't know
+SkillId = Union[int, str]
+
+# Resolved skill strings memoized per process (the same few thousand strings recur across CVs)
+RESOLVE_CACHE_SIZE = 65536
+
+# Plain aliases shorter than this only match exactly ("r", "go", "ml" are too ambiguous inside
+# phrases); aliases with symbols ("c#", "c++") are distinctive enough at any length
+MIN_PHRASE_ALIAS_LENGTH = 3
+
+
+def normalize_skill(text: str) -> str:
+    """Lowercase and collapse whitespace; keeps symbols such as +, #, . and /."""
+    return " ".join(str(text).lower().split()).strip(" ,;:")
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum()
+
+
+class AhoCorasick:
+    """Multi-pattern matcher: finds every alias occurrence in one pass over the text."""
+
+    def __init__(self, patterns: Iterable[Tuple[str, int]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[int, int]]] = [[]]
+
+        for pattern, value in patterns:
+            node = 0
+            for char in pattern:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                node = next_node
+            self._output[node].append((len(pattern), value))
+
+        # Breadth-first construction of the failure links
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                if node == 0:
+                    continue
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find(self, text: str) -> List[Tuple[int, int, int]]:
+        """All matches as (start, end, value), including overlapping ones."""
+        matches = []
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            for length, value in self._output[node]:
+                matches.append((index - length + 1, index + 1, value))
+        return matches
+
+
+class SkillTaxonomy:
+    """Canonical skills with aliases, exact lookup and phrase matching."""
+
+    def __init__(self, skills: Dict[str, List[str]]):
+        self.names: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self._aliases: Dict[str, int] = {}
+        self._resolved: Dict[str, Tuple[SkillId, ...]] = {}
+        # Skill ids are resolved from several threads (asyncio.to_thread); guards the memo
+        self._lock = threading.Lock()
+
+        for canonical, aliases in skills.items():
+            skill_id = self._intern(normalize_skill(canonical))
+            for alias in [canonical, *aliases]:
+                self._aliases.setdefault(normalize_skill(alias), skill_id)
+
+        self._automaton = AhoCorasick(
+            (alias, skill_id)
+            for alias, skill_id in self._aliases.items()
+            if len(alias) >= MIN_PHRASE_ALIAS_LENGTH or not alias.isalnum()
+        )
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "SkillTaxonomy":
+        """Load the bundled taxonomy, extended (or overridden per skill) by the file at `path`."""
+        with open(DEFAULT_TAXONOMY_PATH, encoding="utf-8") as f:
+            skills = json.load(f)
+        if path:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    for canonical, aliases in json.load(f).items():
+                        skills[canonical] = sorted(set(skills.get(canonical, [])) | set(aliases))
+            except Exception as e:
+                logger.error(f"Could not load skill taxonomy from {path}: {e}")
+        return cls(skills)
+
+    def _intern(self, name: str) -> int:
+        # Only called while loading the taxonomy; the tables are read-only afterwards
+        skill_id = self._ids.get(name)
+        if skill_id is None:
+            skill_id = len(self.names)
+            self._ids[name] = skill_id
+            self.names.append(name)
+        return skill_id
+
+    def name(self, skill_id: SkillId) -> str:
+        return self.names[skill_id] if isinstance(skill_id, int) else skill_id
+
+    def is_known(self, skill_id: SkillId) -> bool:
+        """Whether the id belongs to a taxonomy skill rather than an ad-hoc term."""
+        return isinstance(skill_id, int)
+
+    def find_in_text(self, text: str) -> List[int]:
+        """Skill ids mentioned in a phrase, longest non-overlapping whole-word matches first."""
+        matches = self._automaton.find(text)
+        # Prefer longer matches ("react native" over "react"), then earlier ones
+        matches.sort(key=lambda m: (m[0] - m[1], m[0]))
+        taken = [False] * len(text)
+        found = []
+        for start, end, skill_id in matches:
+            if start > 0 and _is_word_char(text[start - 1]) and _is_word_char(text[start]):
+                continue
+            if end < len(text) and _is_word_char(text[end]) and _is_word_char(text[end - 1]):
+                continue
+            if any(taken[start:end]):
+                continue
+            taken[start:end] = [True] * (end - start)
+            found.append((start, skill_id))
+        return list(dict.fromkeys(skill_id for _, skill_id in sorted(found)))
+
+    def resolve(self, skill: str) -> List[SkillId]:
+        """
+        Canonical ids for one free-text skill.
+
+        Exact alias first, then aliases found inside the phrase; an unknown skill is
+        identified by its normalized text, so it still matches identical strings without
+        growing the taxonomy.
+        """
+        resolved = self._resolved.get(skill)
+        if resolved is None:
+            text = normalize_skill(skill)
+            if not text:
+                resolved = ()
+            elif text in self._aliases:
+                resolved = (self._aliases[text],)
+            else:
+                resolved = tuple(self.find_in_text(text) or [text])
+            with self._lock:
+                if len(self._resolved) >= RESOLVE_CACHE_SIZE:
+                    self._resolved.clear()
+                self._resolved[skill] = resolved
+        return list(resolved)
+
+    def resolve_all(self, skills: Iterable[str]) -> List[SkillId]:
+        """Canonical ids for a list of skills, deduplicated, in order of appearance."""
+        ids: Dict[SkillId, None] = {}
+        resolved = self._resolved
+        for skill in skills or ():
+            if not isinstance(skill, str):
+                skill = str(skill)
+            for skill_id in resolved.get(skill) or self.resolve(skill):
+                ids[skill_id] = None
+        return list(ids)
+
+    def id_set(self, skills: Iterable[str]) -> Set[SkillId]:
+        return set(self.resolve_all(skills))
+
+
+skill_taxonomy = SkillTaxonomy.load(SKILL_TAXONOMY_PATH)
@@ -0,0 +1,451 @@
+"""
+Local repair of structured (JSON) model output.
+
+Slightly malformed output for an output_schema (trailing text, code fences, single
+quotes, Python literals, trailing commas, truncated JSON, wrapped or renamed fields)
+would otherwise fail validation and cost another full model round-trip. Repair runs
+in three steps:
+
+1. parse_near_json: a tolerant parser that reads what the model meant, closing
+   truncated strings and containers
+2. coerce_to_schema: unwraps nesting, maps field-name variants and coerces values
+   field by field; fields that still don't validate are dropped and reported
+3. reask_fields: only for fields that could not be recovered (invalid, or lost to
+   truncation), a short follow-up asks the model for just those fields
+"""
+
+import json
+import logging
+import re
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from google.adk.models import BaseLlm, LlmRequest
+from google.genai import types
+from pydantic import BaseModel, TypeAdapter, ValidationError, create_model
+
+from .model_calls import generate_content
+
+logger = logging.getLogger(__name__)
+
+_CODE_FENCE_PATTERN = re.compile(r"```(?:json|JSON)?\s*(.*?)(?:```|$)", re.DOTALL)
+_NUMBER_PATTERN = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+_LITERALS = {
+    "true": True, "True": True, "false": False, "False": False,
+    "null": None, "None": None, "undefined": None, "NaN": None,
+}
+_BARE_WORD_END = set(",:]}\n")
+_WRAPPER_KEYS = ("data", "result", "results", "output", "response", "json", "answer")
+
+# At most this much of the broken answer is echoed back in a re-ask
+MAX_REASK_ECHO_CHARS = 4000
+
+
+class _LenientJsonParser:
+    """Recursive-descent parser for JSON as models actually write it."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.pos = 0
+        self.truncated = False
+        # Top-level key whose value was cut off by truncation, if any
+        self.truncated_key: Optional[str] = None
+        self._depth = 0
+
+    def _peek(self) -> str:
+        return self.text[self.pos] if self.pos < len(self.text) else ""
+
+    def _skip(self) -> None:
+        """Skip whitespace and // or /* */ comments."""
+        text = self.text
+        while self.pos < len(text):
+            char = text[self.pos]
+            if char.isspace():
+                self.pos += 1
+            elif text.startswith("//", self.pos):
+                end = text.find("\n", self.pos)
+                self.pos = len(text) if end < 0 else end + 1
+            elif text.startswith("/*", self.pos):
+                end = text.find("*/", self.pos + 2)
+                self.pos = len(text) if end < 0 else end + 2
+            else:
+                break
+
+    def value(self) -> Any:
+        self._skip()
+        char = self._peek()
+        if not char:
+            self.truncated = True
+            return None
+        if char == "{":
+            return self._object()
+        if char == "[":
+            return self._array()
+        if char in "\"'":
+            return self._string(char)
+        if char in "-+." or char.isdigit():
+            match = _NUMBER_PATTERN.match(self.text, self.pos)
+            if match:
+                self.pos = match.end()
+                number = match.group(0)
+                return float(number) if any(c in number for c in ".eE") else int(number)
+        return self._bare_word()
+
+    def _object(self) -> Dict[str, Any]:
+        self.pos += 1
+        self._depth += 1
+        result: Dict[str, Any] = {}
+        while True:
+            self._skip()
+            char = self._peek()
+            if not char:
+                self.truncated = True
+                break
+            if char == "}":
+                self.pos += 1
+                break
+            if char == ",":
+                self.pos += 1
+                continue
+            key = self._string(char) if char in "\"'" else self._bare_word(as_key=True)
+            self._skip()
+            if self._peek() == ":":
+                self.pos += 1
+            self._skip()
+            if not self._peek():
+                # Cut off before the value: drop the key
+                self.truncated = True
+                if self._depth == 1 and self.truncated_key is None:
+                    self.truncated_key = str(key)
+                break
+            value = self.value()
+            if self.truncated and self._depth == 1 and self.truncated_key is None:
+                self.truncated_key = str(key)
+            result[str(key)] = value
+            if self.truncated:
+                break
+        self._depth -= 1
+        return result
+
+    def _array(self) -> List[Any]:
+        self.pos += 1
+        self._depth += 1
+        result: List[Any] = []
+        while True:
+            self._skip()
+            char = self._peek()
+            if not char:
+                self.truncated = True
+                break
+            if char == "]":
+                self.pos += 1
+                break
+            if char == ",":
+                self.pos += 1
+                continue
+            result.append(self.value())
+            if self.truncated:
+                break
+        self._depth -= 1
+        return result
+
+    def _string(self, quote: str) -> str:
+        self.pos += 1
+        text = self.text
+        chunks = []
+        while self.pos < len(text):
+            char = text[self.pos]
+            if char == quote:
+                self.pos += 1
+                return "".join(chunks)
+            if char == "\\" and self.pos + 1 < len(text):
+                escape = text[self.pos + 1]
+                if escape == "u" and re.fullmatch(r"[0-9a-fA-F]{4}", text[self.pos + 2 : self.pos + 6]):
+                    chunks.append(chr(int(text[self.pos + 2 : self.pos + 6], 16)))
+                    self.pos += 6
+                    continue
+                chunks.append({"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f"}.get(escape, escape))
+                self.pos += 2
+                continue
+            chunks.append(char)
+            self.pos += 1
+        self.truncated = True
+        return "".join(chunks)
+
+    def _bare_word(self, as_key: bool = False) -> Any:
+        """Unquoted keys, Python/JS literals and unquoted strings."""
+        start = self.pos
+        text = self.text
+        while self.pos < len(text) and text[self.pos] not in _BARE_WORD_END:
+            self.pos += 1
+        if self.pos == start:
+            # A stray delimiter: skip it so parsing always advances
+            self.pos += 1
+            return None
+        word = text[start : self.pos].strip()
+        if as_key:
+            return word
+        return _LITERALS[word] if word in _LITERALS else word
+
+
+def strip_code_fence(text: str) -> str:
+    """Return the body of the first ``` fenced block, or the text itself."""
+    match = _CODE_FENCE_PATTERN.search(text)
+    return match.group(1) if match else text
+
+
+def parse_near_json(text: str) -> Tuple[Any, bool, Optional[str]]:
+    """
+    Parse the first JSON object or array in model output, tolerating common mistakes.
+
+    Returns:
+        (value, truncated, truncated_key): value is None if the text has no object or
+        array; truncated_key is the top-level key whose value was cut off
+    """
+    body = strip_code_fence(text)
+    starts = [index for index in (body.find("{"), body.find("[")) if index >= 0]
+    if not starts:
+        return None, False, None
+    parser = _LenientJsonParser(body[min(starts):])
+    value = parser.value()
+    return value, parser.truncated, parser.truncated_key
+
+
+def _field_key(name: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", name.lower())
+
+
+def _unwrap(data: Any, schema: Type[BaseModel]) -> Any:
+    """Find the schema's object inside lists and wrapper objects ({"candidate": {...}})."""
+    fields = {_field_key(name) for name in schema.model_fields}
+    for _ in range(3):
+        if isinstance(data, list):
+            objects = [item for item in data if isinstance(item, dict)]
+            if not objects:
+                return data
+            data = objects[0]
+            continue
+        if not isinstance(data, dict) or any(_field_key(key) in fields for key in data):
+            return data
+        nested = [value for value in data.values() if isinstance(value, (dict, list))]
+        wrapped = [
+            value
+            for key, value in data.items()
+            if _field_key(key) in (*_WRAPPER_KEYS, _field_key(schema.__name__)) and isinstance(value, (dict, list))
+        ]
+        if wrapped:
+            data = wrapped[0]
+        elif len(nested) == 1:
+            data = nested[0]
+        else:
+            return data
+    return data
+
+
+def _item_text(item: Any) -> Optional[str]:
+    """Text of a list item: {"name": "Python", "level": ...} -> "Python"."""
+    if isinstance(item, dict):
+        for key in ("name", "value", "title", "skill", "language"):
+            if isinstance(item.get(key), str):
+                return item[key]
+        return next((value for value in item.values() if isinstance(value, str)), None)
+    return None if item is None or isinstance(item, list) else str(item)
+
+
+def _value_candidates(value: Any) -> List[Any]:
+    """Plausible coercions of a value that failed its field's validation, most faithful first."""
+    candidates: List[Any] = []
+    if isinstance(value, list):
+        strings = [text for text in map(_item_text, value) if text]
+        candidates.append([{"description": item} if isinstance(item, str) else item for item in value])
+        candidates.append(strings)
+        candidates.append(", ".join(strings))
+    elif isinstance(value, dict):
+        candidates.append([value])
+        # {"English": "native", "German": "B2"} -> ["English (native)", "German (B2)"]
+        candidates.append([f"{key} ({item})" if isinstance(item, str) and item else str(key) for key, item in value.items()])
+        candidates.append(json.dumps(value))
+    elif value is not None:
+        candidates.append(str(value))
+        candidates.append([value])
+    candidates.append(None)
+    return candidates
+
+
+def coerce_to_schema(
+    data: Any,
+    schema: Type[BaseModel],
+    lost_fields: Optional[List[str]] = None,
+) -> Tuple[Optional[BaseModel], List[str]]:
+    """
+    Validate near-schema data, repairing what can be repaired locally.
+
+    Args:
+        data: Parsed model output
+        schema: Target pydantic model
+        lost_fields: Fields known to be incomplete (e.g. cut off by truncation)
+
+    Returns:
+        (instance, unrecovered): the validated instance (None if the data isn't an object
+        or no schema field could be recovered from it) and the fields that had to be
+        dropped or are known to be incomplete
+    """
+    data = _unwrap(data, schema)
+    if not isinstance(data, dict):
+        return None, []
+
+    # Map field-name variants ("jobTitle", "Required Skills") to the schema's names
+    names = {_field_key(name): name for name in schema.model_fields}
+    fields: Dict[str, Any] = {}
+    for key, value in data.items():
+        name = key if key in schema.model_fields else names.get(_field_key(key))
+        if name is not None and name not in fields:
+            fields[name] = value
+
+    unrecovered = [name for name in (lost_fields or []) if name in schema.model_fields]
+    for name in unrecovered:
+        fields.pop(name, None)
+
+    for _ in range(len(fields) + 1):
+        if not fields:
+            # Every field is optional, so {} would validate; that's not a recovered answer
+            return None, unrecovered
+        try:
+            return schema.model_validate(fields), unrecovered
+        except ValidationError as e:
+            failing = {str(error["loc"][0]) for error in e.errors() if error.get("loc")}
+            failing &= set(fields)
+            if not failing:
+                break
+            for name in failing:
+                adapter = TypeAdapter(schema.model_fields[name].annotation)
+                for candidate in _value_candidates(fields[name]):
+                    try:
+                        adapter.validate_python(candidate)
+                    except ValidationError:
+                        continue
+                    if candidate is None:
+                        break
+                    fields[name] = candidate
+                    break
+                else:
+                    candidate = None
+                if candidate is None:
+                    fields.pop(name)
+                    unrecovered.append(name)
+
+    if not fields:
+        return None, unrecovered
+    try:
+        return schema.model_validate(fields), unrecovered
+    except ValidationError:
+        return None, unrecovered
+
+
+async def reask_fields(
+    llm: BaseLlm,
+    llm_request: LlmRequest,
+    schema: Type[BaseModel],
+    fields: List[str],
+    previous_output: str,
+) -> Dict[str, Any]:
+    """
+    Ask the model again for only the fields that could not be recovered.
+
+    The original request (instructions and document) is replayed with the broken answer
+    and a short correction turn; the response schema only has the missing fields, so the
+    answer is small and fast.
+    """
+    partial_schema = create_model(
+        f"{schema.__name__}Fields",
+        **{name: (schema.model_fields[name].annotation, None) for name in fields},
+    )
+    system_instruction = llm_request.config.system_instruction if llm_request.config else None
+    request = LlmRequest(
+        model=llm_request.model or llm.model,
+        contents=[
+            *llm_request.contents,
+            types.Content(role="model", parts=[types.Part.from_text(text=previous_output[:MAX_REASK_ECHO_CHARS])]),
+            types.Content(
+                role="user",
+                parts=[
+                    types.Part.from_text(
+                        text=(
+                            "Your previous answer could not be read completely. Return a JSON object with "
+                            f"only these fields: {', '.join(fields)}."
+                        )
+                    )
+                ],
+            ),
+        ],
+        config=types.GenerateContentConfig(system_instruction=system_instruction),
+    )
+    request.set_output_schema(partial_schema)
+
+    text = ""
+    async for llm_response in generate_content(llm, request):
+        if llm_response.content and llm_response.content.parts:
+            text += "".join(part.text or "" for part in llm_response.content.parts if not part.thought)
+
+    value, _, _ = parse_near_json(text)
+    instance, _ = coerce_to_schema(value, partial_schema)
+    if instance is None:
+        return {}
+    return {name: value for name, value in instance.model_dump().items() if name in fields and value is not None}
+
+
+async def repair_structured_output(
+    text: str,
+    schema: Type[BaseModel],
+    llm: Optional[BaseLlm] = None,
+    llm_request: Optional[LlmRequest] = None,
+) -> Tuple[Optional[BaseModel], Dict[str, Any]]:
+    """
+    Validate model output against a schema, repairing it locally when needed.
+
+    Args:
+        text: Raw model output
+        schema: Target pydantic model
+        llm: Model for the targeted re-ask (None disables it)
+        llm_request: The request that produced `text` (needed for the re-ask)
+
+    Returns:
+        (instance, report): instance is None if no schema field could be read at all (the
+        text is then left alone and nothing is re-asked); report has "repaired" (local
+        repair was needed and recovered at least one field), "reasked" and "unrecovered"
+        field lists
+    """
+    report: Dict[str, Any] = {"repaired": False, "reasked": [], "unrecovered": []}
+    try:
+        return schema.model_validate_json(strip_code_fence(text).strip()), report
+    except ValidationError:
+        pass
+
+    value, truncated, truncated_key = parse_near_json(text)
+    lost = [truncated_key] if truncated_key else []
+    instance, unrecovered = coerce_to_schema(value, schema, lost_fields=lost)
+    if instance is None:
+        return None, report
+    report["repaired"] = True
+
+    if truncated:
+        # Everything after the cut is missing too
+        present = set(instance.model_dump(exclude_unset=True))
+        unrecovered += [name for name in schema.model_fields if name not in present and name not in unrecovered]
+
+    if unrecovered and llm is not None and llm_request is not None:
+        try:
+            fixes = await reask_fields(llm, llm_request, schema, unrecovered, text)
+            if fixes:
+                merged = {**instance.model_dump(exclude_unset=True), **fixes}
+                instance, still_missing = coerce_to_schema(merged, schema)
+                report["reasked"] = sorted(fixes)
+                unrecovered = [name for name in unrecovered if name not in fixes] + still_missing
+        except Exception as e:
+            logger.warning(f"Re-ask for {schema.__name__} fields {unrecovered} failed: {e}")
+
+    report["unrecovered"] = unrecovered
+    logger.info(
+        f"Repaired {schema.__name__} output locally (truncated: {truncated}, "
+        f"re-asked: {report['reasked'] or 'none'}, unrecovered: {unrecovered or 'none'})"
+    )
+    return instance, report
@@ -5,12 +5,19 @@ Usage:
   1) Ensure .env contains SESSION_SERVICE_URI (and optionally AGENTS_DIR).
   2) (Optional) Install python-dotenv if you want automatic .env loading.
   3) Run: python run_adk.py
+     Set WEB_CONCURRENCY to serve from several worker processes (see adk_server/serving.py).
+     python run_adk.py --profile-startup [--trace FILE] reports import and agent load times
+     (see adk_server/startup_profile.py).
 """
 
+import argparse
+import importlib
+import logging
 import os
-from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import sys
 
-import uvicorn
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
 from google.adk.cli.fast_api import get_fast_api_app
 
 # Optional: load .env automatically if python-dotenv is installed.
@@ -21,8 +28,37 @@ except ModuleNotFoundError:
     # Safe to ignore; just ensure SESSION_SERVICE_URI is in environment.
     pass
 
+from adk_server import compaction, metrics, session_db, startup_profile
+from adk_server.admission import AdmissionController, AdmissionMiddleware
+from adk_server.agent_loading import LazyAgentLoader
+from adk_server.readiness import readiness
+from adk_server.serving import serve
+
+logger = logging.getLogger(__name__)
+
+# Agents with an image job queue (IMAGE_JOB_MODE), served by the image job status route
+IMAGE_JOB_AGENTS = ("image_generation_agent",)
+
 
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve the agent directory with the ADK API server.")
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="report module import and agent load times instead of serving (exit status 1 over budget)",
+    )
+    parser.add_argument("--trace", metavar="FILE", help="with --profile-startup, also write the profile as JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if args.profile_startup:
+        sys.exit(startup_profile.main(args.trace))
+    port = int(os.getenv("PORT", "8000"))  # Railway sets PORT env var
+    serve(build_app, host="0.0.0.0", port=port)
+
+
+def build_app() -> FastAPI:
+    """Build the ADK API app; agents are imported on first use unless listed in PRELOAD_AGENTS."""
     agents_dir = os.getenv("AGENTS_DIR", ".")
     session_uri = os.getenv("SESSION_SERVICE_URI")
     port = int(os.getenv("PORT", "8000"))  # Railway sets PORT env var
@@ -30,34 +66,104 @@ def main() -> None:
     if not session_uri:
         raise RuntimeError("SESSION_SERVICE_URI is required (set it in .env or env vars).")
 
-    session_uri = _normalize_to_asyncpg_uri(session_uri)
-    connect_args = {"ssl": "require"}
+    session_uri = session_db.normalize_uri(session_uri)
+    # Pool, timeouts, SSL and statement caches come from the SESSION_DB_* env vars
+    session_db.register_session_service()
+
+    # Agents that call a model directly record those calls through the metrics hook
+    hooks = {"generate_content": metrics.generate_content} if metrics.enabled() else {}
+    agent_loader = LazyAgentLoader(agents_dir, hooks=hooks)
+    agent_loader.preload()
 
     app = get_fast_api_app(
         agents_dir=agents_dir,
+        agent_loader=agent_loader,
+        # Warms the session pool and preloaded agents' MCP toolsets in each worker (/readyz)
+        lifespan=readiness.lifespan(agent_loader),
         session_service_uri=session_uri,
-        session_db_kwargs={"connect_args": connect_args},
+        session_db_kwargs=session_db.engine_kwargs(session_uri),
         web=False,         # API only, no web UI assets
         a2a=False,         # set True if you use A2A
         host="0.0.0.0",
         port=port,
         url_prefix=None,
         reload_agents=False,  # set True in dev for hot reload of agents
+        # Batch event writes (SESSION_EVENT_BATCH*), compact old tool results and cap the
+        # history sent to the model (SESSION_COMPACTION_*)
+        extra_plugins=[
+            "adk_server.event_batching.event_batch_plugin",
+            "adk_server.compaction.compaction_plugin",
+        ]
+        + (["adk_server.metrics.metrics_plugin"] if metrics.enabled() else []),
     )
-
-    uvicorn.run(app, host="0.0.0.0", port=port)
-
-
-def _normalize_to_asyncpg_uri(uri: str) -> str:
-    """Convert to asyncpg scheme and strip unsupported query args (sslmode/channel_binding)."""
-    if uri.startswith("postgresql://"):
-        uri = uri.replace("postgresql://", "postgresql+asyncpg://", 1)
-
-    parsed = urlsplit(uri)
-    qs = parse_qsl(parsed.query, keep_blank_values=True)
-    filtered = [(k, v) for (k, v) in qs if k.lower() not in {"sslmode", "channel_binding", "channelbinding"}]
-    new_query = urlencode(filtered)
-    return urlunsplit(parsed._replace(query=new_query))
+    app.state.agent_loader = agent_loader
+    # Per-agent concurrency limits and wait queues for /run and /run_sse (ADMISSION_*)
+    admission = AdmissionController(agent_loader)
+    app.add_middleware(AdmissionMiddleware, controller=admission)
+    if metrics.enabled():
+        # /metrics, and request timing around admission control (METRICS_ENABLED)
+        metrics.install(app, agent_loader.list_agents(), admission)
+
+    @app.get("/healthz")
+    async def healthz() -> dict:
+        """Liveness: the worker is serving requests."""
+        return readiness.liveness()
+
+    @app.get("/readyz")
+    async def readyz() -> JSONResponse:
+        """Readiness: 200 once the worker is warmed up, 503 before; per-component status and timings."""
+        ready, body = readiness.report()
+        return JSONResponse(body, status_code=200 if ready else 503)
+
+    @app.get("/stats/session-pool")
+    async def session_pool_stats() -> dict:
+        """Connection pool of this worker: checked-out, idle, overflow, waiting, wait times."""
+        return session_db.pool_stats() or {}
+
+    @app.get("/stats/session-cache")
+    async def session_cache_stats() -> dict:
+        """Session cache of this worker: size, hit ratio, revalidations, invalidations."""
+        cache = session_db.get_session_cache()
+        return cache.stats() if cache else {}
+
+    @app.get("/stats/event-batching")
+    async def event_batching_stats() -> dict:
+        """Batched event writes of this worker: batches, events per batch, write time."""
+        batcher = session_db.get_event_batcher()
+        return batcher.stats() if batcher else {}
+
+    @app.get("/stats/admission")
+    async def admission_stats() -> dict:
+        """Per-agent admission control of this worker: running, queue depth, shed requests."""
+        return admission.stats()
+
+    @app.get("/stats/compaction")
+    async def compaction_stats() -> dict:
+        """Compacted events and characters saved, and history trimmed to the context budget."""
+        return compaction.compaction_plugin.stats()
+
+    @app.get("/apps/{app_name}/users/{user_id}/sessions/{session_id}/archive")
+    async def archived_events(app_name: str, user_id: str, session_id: str) -> list:
+        """Full versions of the session's compacted events."""
+        db_service = session_db.get_session_service()
+        if db_service is None:
+            return []
+        return await compaction.compaction_plugin.archive.list(db_service, app_name, user_id, session_id)
+
+    @app.get("/apps/{app_name}/users/{user_id}/sessions/{session_id}/image-jobs/{job_id}")
+    async def image_job_status(app_name: str, user_id: str, session_id: str, job_id: str) -> dict:
+        """Status of a queued image generation, so clients can wait without another agent turn."""
+        if app_name not in IMAGE_JOB_AGENTS:
+            raise HTTPException(status_code=404, detail=f"{app_name} has no image jobs")
+        # Loading the agent puts the agents directory on sys.path
+        agent_loader.load_agent(app_name)
+        image_jobs = importlib.import_module(f"{app_name}.tools.image_jobs")
+        job = await image_jobs.image_job_queue.status(job_id)
+        if job is None or job["session_id"] != session_id or job["user_id"] != user_id:
+            raise HTTPException(status_code=404, detail=f"Unknown image job: {job_id}")
+        return job
+
+    return app
 
 
 if __name__ == "__main__":